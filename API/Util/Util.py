@@ -1,10 +1,20 @@
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import io
 import base64
+import threading
+from collections import OrderedDict
+
+# matplotlib se importa en el primer gráfico (arranque más rápido; ver ARRANQUE_RAPIDO en app.py)
+def _matplotlib():
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    return Figure, FigureCanvasAgg
 
 def plot_lime_custom(exp, num_features=10):
+    _matplotlib()
+    import matplotlib.pyplot as plt
+
     features = exp.as_list(label=exp.available_labels()[0])[:num_features]
     nombres = [f[0] for f in features]
     impactos = [f[1] for f in features]
@@ -26,13 +36,14 @@ def construir_tabla_lime(exp, df):
 
     Args:
         exp: Objeto Explanation de LIME.
-        df: DataFrame con la instancia evaluada (una sola fila).
+        df: DataFrame con la instancia evaluada (una sola fila) o un
+            diccionario {caracteristica: valor}.
 
     Returns:
         Lista de diccionarios con las columnas: caracteristica, valor, influencia.
     """
     explicaciones = exp.as_list()
-    fila = df.iloc[0]
+    fila = df.iloc[0] if hasattr(df, "iloc") else df
     tabla = []
 
     for feature_str, peso in explicaciones:
@@ -58,24 +69,64 @@ def construir_tabla_lime(exp, df):
 
     return tabla
 
-def plot_probabilidades_clases(probas, clases):
-
-    plt.figure(figsize=(8,5))
-    colores = ['blue' if c != 'predicho' else 'green' for c in clases] 
+# Plantillas de figura reutilizables por conjunto de clases y caché de PNG por
+# vector de probabilidades redondeado (las etiquetas muestran 2 decimales)
+DECIMALES_GRAFICO = 2
+MAX_GRAFICOS_CACHE = 256
+_plantillas_grafico = {}
+_cache_graficos = OrderedDict()
+_lock_graficos = threading.Lock()
+
+
+def _crear_plantilla_grafico(clases):
+    """Figura fuera de pyplot (segura entre hilos) con barras y textos a actualizar"""
+    Figure, FigureCanvasAgg = _matplotlib()
+    fig = Figure(figsize=(8, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    barras = ax.barh(clases, [0.0] * len(clases), color='skyblue')
+    ax.set_xlabel("Probabilidad")
+    ax.set_title("Probabilidades por clase")
+    ax.set_xlim(0, 1)
+    textos = [ax.text(0.01, i, "", color='black', va='center') for i in range(len(clases))]
+    fig.tight_layout()
+    return {"fig": fig, "barras": barras, "textos": textos, "lock": threading.Lock()}
+
+
+def datos_probabilidades(probas, clases):
+    """Vector clase/probabilidad para dibujar el gráfico en el cliente"""
+    return {
+        "clases": [str(c) for c in clases],
+        "probabilidades": [round(float(p), 4) for p in probas],
+    }
 
-    plt.barh(clases, probas, color='skyblue')
-    plt.xlabel("Probabilidad")
-    plt.title("Probabilidades por clase")
-    plt.xlim(0, 1)
 
-    for i, v in enumerate(probas):
-        plt.text(v + 0.01, i, f"{v:.2f}", color='black', va='center')
-
-    plt.tight_layout()
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    plt.close()
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-    return img_base64
\ No newline at end of file
+def plot_probabilidades_clases(probas, clases):
+    clases = tuple(str(c) for c in clases)
+    redondeadas = tuple(round(float(p), DECIMALES_GRAFICO) for p in probas)
+    clave = (clases, redondeadas)
+
+    with _lock_graficos:
+        img_base64 = _cache_graficos.get(clave)
+        if img_base64 is not None:
+            _cache_graficos.move_to_end(clave)
+            return img_base64
+        plantilla = _plantillas_grafico.get(clases)
+        if plantilla is None:
+            plantilla = _plantillas_grafico[clases] = _crear_plantilla_grafico(list(clases))
+
+    with plantilla["lock"]:
+        for barra, texto, i, v in zip(plantilla["barras"], plantilla["textos"], range(len(clases)), redondeadas):
+            barra.set_width(v)
+            texto.set_position((v + 0.01, i))
+            texto.set_text(f"{v:.2f}")
+
+        buf = io.BytesIO()
+        plantilla["fig"].savefig(buf, format='png', bbox_inches='tight')
+        img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
+
+    with _lock_graficos:
+        _cache_graficos[clave] = img_base64
+        while len(_cache_graficos) > MAX_GRAFICOS_CACHE:
+            _cache_graficos.popitem(last=False)
+    return img_base64
@@ -0,0 +1,126 @@
+# Util/admision.py
+"""
+Control de admisión de /predict con degradación por etapas.
+
+Cuenta las peticiones en curso y, según la carga, decide cuánto trabajo hace
+cada una:
+    0 completo         LIME con todas las muestras y gráfico
+    1 menos_muestras   LIME con una fracción de las muestras
+    2 sin_grafico      además, sin PNG (solo el vector de probabilidades)
+    3 solo_prediccion  sin explicación
+Por encima de max_en_curso se rechaza (503 + Retry-After) en lugar de encolar.
+
+Si el cliente envía un plazo, también se baja de nivel cuando la latencia
+observada del nivel (media móvil exponencial) no cabe en el tiempo restante.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+NIVELES = ("completo", "menos_muestras", "sin_grafico", "solo_prediccion")
+SOLO_PREDICCION = len(NIVELES) - 1
+
+
+class Saturado(Exception):
+    """La petición no se admite; reintentar pasados `reintentar_en` segundos"""
+
+    def __init__(self, motivo, reintentar_en):
+        super().__init__(motivo)
+        self.motivo = motivo
+        self.reintentar_en = reintentar_en
+
+
+class Admision:
+    """Decisión para una petición; medir=False excluye su duración de las estimaciones"""
+
+    def __init__(self, nivel):
+        self.nivel = nivel
+        self.medir = True
+
+    @property
+    def nombre(self):
+        return NIVELES[self.nivel]
+
+    @property
+    def degradada(self):
+        return self.nivel > 0
+
+
+class ControlAdmision:
+    def __init__(self, umbrales=(4, 8, 16), max_en_curso=32, reintentar_segundos=1.0, alfa=0.2, activo=False):
+        """umbrales[i]: peticiones en curso a partir de las cuales se pasa al nivel i + 1"""
+        if len(umbrales) != SOLO_PREDICCION:
+            raise ValueError(f"Se esperaban {SOLO_PREDICCION} umbrales de degradación")
+        self.umbrales = tuple(sorted(umbrales))
+        self.max_en_curso = max_en_curso
+        self.reintentar = max(1, int(math.ceil(reintentar_segundos)))
+        self.alfa = alfa
+        self.activo = activo
+        self._lock = threading.Lock()
+        self._en_curso = 0
+        self._estimaciones = [None] * len(NIVELES)
+        self.admitidas = dict.fromkeys(NIVELES, 0)
+        self.rechazadas = 0
+        self.plazos_vencidos = 0
+
+    def _nivel_por_plazo(self, restante):
+        for nivel, estimacion in enumerate(self._estimaciones):
+            if estimacion is None or estimacion <= restante:
+                return nivel
+        return SOLO_PREDICCION
+
+    def admitir(self, restante=None):
+        """Devuelve la Admision de la petición o lanza Saturado; restante en segundos (opcional)"""
+        with self._lock:
+            if not self.activo:
+                # Desactivado: solo se cuentan las peticiones, todas con la respuesta completa
+                self._en_curso += 1
+                self.admitidas[NIVELES[0]] += 1
+                return Admision(0)
+            if restante is not None and restante <= 0:
+                self.plazos_vencidos += 1
+                raise Saturado("plazo_vencido", self.reintentar)
+            if self._en_curso >= self.max_en_curso:
+                self.rechazadas += 1
+                raise Saturado("saturado", self.reintentar)
+            self._en_curso += 1
+            nivel = sum(1 for umbral in self.umbrales if self._en_curso > umbral)
+            if restante is not None:
+                nivel = max(nivel, self._nivel_por_plazo(restante))
+            self.admitidas[NIVELES[nivel]] += 1
+            return Admision(nivel)
+
+    def terminar(self, admision, duracion):
+        with self._lock:
+            self._en_curso -= 1
+            if admision.medir:
+                anterior = self._estimaciones[admision.nivel]
+                self._estimaciones[admision.nivel] = (
+                    duracion if anterior is None else anterior + self.alfa * (duracion - anterior)
+                )
+
+    @contextmanager
+    def admision(self, restante=None):
+        admision = self.admitir(restante)
+        inicio = time.perf_counter()
+        try:
+            yield admision
+        finally:
+            self.terminar(admision, time.perf_counter() - inicio)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "activo": self.activo,
+                "en_curso": self._en_curso,
+                "umbrales": dict(zip(NIVELES[1:], self.umbrales)),
+                "max_en_curso": self.max_en_curso,
+                "admitidas": dict(self.admitidas),
+                "rechazadas": self.rechazadas,
+                "plazos_vencidos": self.plazos_vencidos,
+                "latencia_estimada_ms": {
+                    nombre: round(e * 1000, 1) if e is not None else None
+                    for nombre, e in zip(NIVELES, self._estimaciones)
+                },
+            }
@@ -0,0 +1,168 @@
+# Util/arranque.py
+"""
+Utilidades de arranque: memoria por proceso y estado compartido de workers.
+
+Con gunicorn --preload los modelos viven en páginas compartidas copy-on-write;
+Pss/Shared de /proc/self/smaps_rollup muestran cuánto se comparte realmente.
+Cada worker escribe su estado en un directorio común para poder reportar la
+memoria de todos desde cualquiera de ellos.
+
+MedidorImportaciones registra cuánto tarda en ejecutarse cada módulo importado
+(tiempo acumulado, incluye sus propias importaciones), también los diferidos
+que se importan en la primera petición.
+"""
+import importlib.abc
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+DIR_ESTADO_WORKERS = os.environ.get(
+    "ESTADO_WORKERS_DIR", os.path.join(tempfile.gettempdir(), "api_tesis_workers")
+)
+
+
+class _CargadorMedido(importlib.abc.Loader):
+    def __init__(self, cargador, medidor):
+        self.cargador = cargador
+        self.medidor = medidor
+
+    def create_module(self, spec):
+        return self.cargador.create_module(spec)
+
+    def exec_module(self, modulo):
+        inicio = time.perf_counter()
+        try:
+            self.cargador.exec_module(modulo)
+        finally:
+            self.medidor.registrar(modulo.__name__, time.perf_counter() - inicio)
+
+    def __getattr__(self, nombre):
+        # get_resource_reader, get_data, etc. del cargador original
+        return getattr(self.cargador, nombre)
+
+
+class MedidorImportaciones(importlib.abc.MetaPathFinder):
+    """Buscador de sys.meta_path que envuelve el cargador de cada módulo para medirlo"""
+
+    def __init__(self):
+        self.tiempos = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def instalar(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def desinstalar(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def registrar(self, nombre, duracion):
+        with self._lock:
+            self.tiempos[nombre] = duracion
+
+    def find_spec(self, nombre, ruta=None, objetivo=None):
+        if getattr(self._local, "buscando", False):
+            return None
+        self._local.buscando = True
+        try:
+            for buscador in sys.meta_path:
+                if buscador is self or not hasattr(buscador, "find_spec"):
+                    continue
+                spec = buscador.find_spec(nombre, ruta, objetivo)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _CargadorMedido(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._local.buscando = False
+
+    def resumen(self, limite=15):
+        """Paquetes de primer nivel más costosos (ms, acumulados) y el número de módulos importados"""
+        with self._lock:
+            tiempos = dict(self.tiempos)
+        raiz = {nombre: t for nombre, t in tiempos.items() if "." not in nombre}
+        return {
+            "modulos": len(tiempos),
+            "mas_lentos_ms": {
+                nombre: round(t * 1000, 1) for nombre, t in sorted(raiz.items(), key=lambda x: -x[1])[:limite]
+            },
+        }
+
+
+def memoria_proceso():
+    """RSS/PSS/compartida/privada en MB del proceso actual (Linux); RSS máximo en otros sistemas"""
+    memoria = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for linea in f:
+                partes = linea.split()
+                if len(partes) >= 2 and partes[0].rstrip(":") in (
+                    "Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"
+                ):
+                    memoria[partes[0].rstrip(":").lower() + "_mb"] = round(int(partes[1]) / 1024, 1)
+        return memoria
+    except OSError:
+        pass
+    try:
+        import resource
+        # ru_maxrss: KB en Linux, bytes en macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss_max_mb": round(maxrss / 1024, 1)}
+    except ImportError:
+        return {}
+
+
+def registrar_estado_worker(info, directorio=DIR_ESTADO_WORKERS):
+    """Escribe (atómicamente) el estado del worker actual en <directorio>/<pid>.json"""
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        datos = dict(info, pid=os.getpid(), memoria=memoria_proceso(), actualizado=time.time())
+        fd, tmp = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(datos, f)
+        os.replace(tmp, os.path.join(directorio, f"{os.getpid()}.json"))
+    except OSError:
+        pass
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+
+
+def leer_estados_workers(directorio=DIR_ESTADO_WORKERS):
+    """Estados de los workers vivos; los archivos de procesos terminados se eliminan"""
+    estados = []
+    if not os.path.isdir(directorio):
+        return estados
+    for nombre in os.listdir(directorio):
+        if not nombre.endswith(".json"):
+            continue
+        ruta = os.path.join(directorio, nombre)
+        try:
+            pid = int(nombre[:-5])
+        except ValueError:
+            continue
+        if not _proceso_vivo(pid):
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(ruta) as f:
+                estados.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(estados, key=lambda e: e.get("pid", 0))
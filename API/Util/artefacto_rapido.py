@@ -0,0 +1,175 @@
+# Util/artefacto_rapido.py
+"""
+Artefacto de carga rápida para los .pkl de modelos.
+
+Junto a cada artefacto (model/X.pkl) se guarda model/X.rapido/ con:
+    modelos.joblib   el mismo diccionario de modelos, sin compresión (joblib
+                     guarda los arreglos NumPy en crudo y los abre con mmap_mode="r")
+    cabecera.json    formato, sha256/tamaño/mtime del .pkl de origen, sha256 y
+                     tamaño de modelos.joblib, versión de sklearn y, por modelo,
+                     tipo, used_features y classes_
+
+Al cargar se valida la cabecera contra el .pkl: si tamaño y mtime coinciden no
+se vuelve a leer el origen; si no, se compara su sha256. Un artefacto que no
+valida (origen cambiado, otra versión de sklearn, datos truncados) se ignora y
+se carga el .pkl.
+
+Convertir (desde la carpeta API):
+    python -m Util.artefacto_rapido model/modelos_experimento_B.pkl
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import joblib
+
+FORMATO = 1
+SUFIJO = ".rapido"
+NOMBRE_DATOS = "modelos.joblib"
+NOMBRE_CABECERA = "cabecera.json"
+
+log = logging.getLogger("api.modelos")
+
+
+def ruta_rapida(ruta_pkl):
+    return os.path.splitext(ruta_pkl)[0] + SUFIJO
+
+
+def sha256_archivo(ruta, bloque=1 << 20):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for parte in iter(lambda: f.read(bloque), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def _version_sklearn():
+    import sklearn
+    return sklearn.__version__
+
+
+def _describir(modelos):
+    descripcion = {}
+    for nombre, modelo in modelos.items():
+        used = getattr(modelo, "used_features", None)
+        clases = getattr(modelo, "classes_", None)
+        descripcion[nombre] = {
+            "tipo": type(modelo).__name__,
+            "used_features": list(used) if used is not None else None,
+            "classes_": [str(c) for c in clases] if clases is not None else None,
+        }
+    return descripcion
+
+
+def convertir(ruta_pkl, modelos=None):
+    """Escribe <ruta>.rapido/ (de forma atómica) y devuelve la cabecera"""
+    if modelos is None:
+        modelos = joblib.load(ruta_pkl)
+    destino = ruta_rapida(ruta_pkl)
+    estado = os.stat(ruta_pkl)
+    temporal = tempfile.mkdtemp(prefix=os.path.basename(destino) + ".", dir=os.path.dirname(destino) or ".")
+    try:
+        ruta_datos = os.path.join(temporal, NOMBRE_DATOS)
+        joblib.dump(modelos, ruta_datos, compress=0)
+        cabecera = {
+            "formato": FORMATO,
+            "origen": os.path.basename(ruta_pkl),
+            "origen_sha256": sha256_archivo(ruta_pkl),
+            "origen_tamano": estado.st_size,
+            "origen_mtime_ns": estado.st_mtime_ns,
+            "datos_sha256": sha256_archivo(ruta_datos),
+            "datos_tamano": os.path.getsize(ruta_datos),
+            "sklearn": _version_sklearn(),
+            "modelos": _describir(modelos),
+        }
+        with open(os.path.join(temporal, NOMBRE_CABECERA), "w", encoding="utf-8") as f:
+            json.dump(cabecera, f, indent=2, ensure_ascii=False)
+        if os.path.isdir(destino):
+            shutil.rmtree(destino)
+        os.replace(temporal, destino)
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+    return cabecera
+
+
+def leer_cabecera(ruta_pkl):
+    try:
+        with open(os.path.join(ruta_rapida(ruta_pkl), NOMBRE_CABECERA), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def validar(ruta_pkl, cabecera, verificar_datos=False):
+    """Motivo por el que el artefacto rápido no sirve para ruta_pkl, o None si es válido"""
+    if cabecera is None:
+        return "sin cabecera"
+    if cabecera.get("formato") != FORMATO:
+        return f"formato {cabecera.get('formato')} no soportado"
+    if cabecera.get("sklearn") != _version_sklearn():
+        return f"generado con sklearn {cabecera.get('sklearn')}"
+    estado = os.stat(ruta_pkl)
+    if (estado.st_size, estado.st_mtime_ns) != (cabecera.get("origen_tamano"), cabecera.get("origen_mtime_ns")):
+        # mtime distinto (copia, checkout): solo vale si el contenido es el mismo
+        if estado.st_size != cabecera.get("origen_tamano") or sha256_archivo(ruta_pkl) != cabecera.get("origen_sha256"):
+            return "el .pkl de origen cambió"
+    ruta_datos = os.path.join(ruta_rapida(ruta_pkl), NOMBRE_DATOS)
+    try:
+        if os.path.getsize(ruta_datos) != cabecera.get("datos_tamano"):
+            return "datos incompletos"
+    except OSError:
+        return "sin datos"
+    if verificar_datos and sha256_archivo(ruta_datos) != cabecera.get("datos_sha256"):
+        return "checksum de los datos no coincide"
+    return None
+
+
+def cargar(ruta_pkl, verificar_datos=False, generar=True):
+    """
+    Carga el artefacto rápido si es válido (mmap, sin descompresión); si no,
+    el .pkl y, con generar=True, deja escrito el artefacto rápido para el próximo arranque.
+    Devuelve (modelos, origen) con origen "rapido" o "pkl".
+    """
+    cabecera = leer_cabecera(ruta_pkl)
+    motivo = validar(ruta_pkl, cabecera, verificar_datos)
+    if motivo is None:
+        modelos = joblib.load(os.path.join(ruta_rapida(ruta_pkl), NOMBRE_DATOS), mmap_mode="r")
+        if _describir(modelos) == cabecera["modelos"]:
+            return modelos, "rapido"
+        motivo = "los modelos no coinciden con la cabecera"
+
+    if cabecera is not None:
+        log.warning("⚠️ Artefacto rápido de %s ignorado: %s", os.path.basename(ruta_pkl), motivo)
+    modelos = joblib.load(ruta_pkl)
+    if generar:
+        try:
+            convertir(ruta_pkl, modelos)
+            log.info("⚡ Artefacto rápido generado en %s", ruta_rapida(ruta_pkl))
+        except OSError as e:
+            log.warning("⚠️ No se pudo generar el artefacto rápido: %s", e)
+    return modelos, "pkl"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera el artefacto de carga rápida de un .pkl de modelos")
+    parser.add_argument("pkl", nargs="+")
+    parser.add_argument("--verificar", action="store_true", help="Valida un artefacto existente sin regenerarlo")
+    args = parser.parse_args()
+
+    for ruta in args.pkl:
+        if args.verificar:
+            motivo = validar(ruta, leer_cabecera(ruta), verificar_datos=True)
+            print(f"{'✅' if motivo is None else '❌'} {ruta}: {motivo or 'válido'}")
+            continue
+        cabecera = convertir(ruta)
+        print(f"✅ {ruta_rapida(ruta)}: {', '.join(cabecera['modelos'])} "
+              f"({cabecera['datos_tamano'] / 1e6:.1f} MB, sha256 {cabecera['datos_sha256'][:12]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Util/barrido.py
+"""
+Barridos "¿qué pasaría si?" sobre una entrada base.
+
+Cada eje varía un campo numérico (rango o lista de valores) o un grupo one-hot
+(lista de categorías). La rejilla completa (producto cartesiano, orden C) se
+construye como una sola matriz, se le aplican las reglas de
+validación de CodificadorEntrada de forma vectorizada y se evalúa con una sola llamada a
+predict_proba.
+
+Formato de "ejes" (el orden del diccionario es el orden de los ejes):
+    {"NUMBER_OFFERS": {"desde": 1, "hasta": 20, "paso": 1},
+     "LOTS_NUMBER": [1, 2, 3],
+     "GROUP_CPV": ["GROUP_CPV_15", "GROUP_CPV_45"]}
+"""
+import numpy as np
+
+from Util.codificador import CAMPOS_NUMERICOS, GRUPOS_ONE_HOT
+
+MAX_VALORES_RANGO = 10000
+
+
+class Eje:
+    def __init__(self, nombre, etiquetas, columnas, valores):
+        self.nombre = nombre
+        self.etiquetas = etiquetas
+        self.columnas = np.asarray(columnas, dtype=np.intp)
+        self.valores = np.asarray(valores, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.etiquetas)
+
+
+def _valores_numericos(nombre, spec):
+    if isinstance(spec, dict):
+        try:
+            desde, hasta = float(spec["desde"]), float(spec["hasta"])
+            paso = float(spec.get("paso", 1))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Eje '{nombre}': use {{'desde', 'hasta', 'paso'}} o una lista de valores")
+        if paso <= 0 or hasta < desde:
+            raise ValueError(f"Eje '{nombre}': se requiere paso > 0 y desde <= hasta")
+        n = int(np.floor((hasta - desde) / paso + 1e-9)) + 1
+        if n > MAX_VALORES_RANGO:
+            raise ValueError(f"Eje '{nombre}': demasiados valores ({n})")
+        valores = desde + paso * np.arange(n)
+    elif isinstance(spec, list) and spec:
+        try:
+            valores = np.array([float(v) for v in spec])
+        except (TypeError, ValueError):
+            raise ValueError(f"Eje '{nombre}': los valores deben ser numéricos")
+    else:
+        raise ValueError(f"Eje '{nombre}': use {{'desde', 'hasta', 'paso'}} o una lista no vacía")
+    return [int(v) if float(v).is_integer() else float(v) for v in valores.tolist()], valores
+
+
+def definir_ejes(ejes_spec, codificador):
+    """Traduce la especificación de la petición en ejes sobre las columnas del codificador"""
+    if not isinstance(ejes_spec, dict) or not ejes_spec:
+        raise ValueError("'ejes' debe ser un diccionario no vacío {campo_o_grupo: valores}")
+
+    ejes = []
+    usadas = set()
+    for nombre, spec in ejes_spec.items():
+        if nombre in GRUPOS_ONE_HOT:
+            columnas_grupo = GRUPOS_ONE_HOT[nombre][0]
+            if not isinstance(spec, list) or not spec:
+                raise ValueError(f"Eje '{nombre}': se espera una lista de categorías {columnas_grupo}")
+            columnas = [codificador.indice_columna[c] for c in columnas_grupo]
+            valores = []
+            for categoria in spec:
+                j = codificador.indice_entrada.get(categoria)
+                if j not in columnas:
+                    raise ValueError(f"Eje '{nombre}': categoría '{categoria}' no válida; use {columnas_grupo}")
+                valores.append([1.0 if c == j else 0.0 for c in columnas])
+            ejes.append(Eje(nombre, list(spec), columnas, valores))
+        else:
+            j = codificador.indice_entrada.get(nombre)
+            if j is None or codificador.columnas[j] not in CAMPOS_NUMERICOS:
+                raise ValueError(
+                    f"Eje '{nombre}' no soportado; use {CAMPOS_NUMERICOS} o los grupos {list(GRUPOS_ONE_HOT)}"
+                )
+            etiquetas, valores = _valores_numericos(nombre, spec)
+            ejes.append(Eje(nombre, etiquetas, [j], valores.reshape(-1, 1)))
+
+        columnas_eje = set(ejes[-1].columnas.tolist())
+        if columnas_eje & usadas:
+            raise ValueError(f"Eje '{nombre}' repite columnas de otro eje")
+        usadas |= columnas_eje
+    return ejes
+
+
+def construir_rejilla(codificador, entrada_base, ejes):
+    """Matriz (n_puntos, n_features) del producto cartesiano de los ejes, con reglas aplicadas"""
+    forma = tuple(len(eje) for eje in ejes)
+    n_puntos = int(np.prod(forma))
+    base = codificador.nuevo_bloque(1)
+    codificador.escribir_fila(entrada_base, base, 0)
+    bloque = np.repeat(base, n_puntos, axis=0)
+
+    # Orden C: el último eje varía más rápido
+    for k, eje in enumerate(ejes):
+        repeticiones = int(np.prod(forma[k + 1:]))
+        mosaicos = int(np.prod(forma[:k]))
+        bloque[:, eje.columnas] = np.tile(np.repeat(eje.valores, repeticiones, axis=0), (mosaicos, 1))
+
+    codificador.aplicar_reglas(bloque)
+    return np.ascontiguousarray(bloque[:, :codificador.n_features]), forma
+
+
+def cambios_de_clase(indices_clase, ejes, max_cambios=1000):
+    """
+    Pares de puntos vecinos (un paso en un eje) con distinta clase predicha.
+    Devuelve (total, lista truncada a max_cambios).
+    """
+    total = 0
+    cambios = []
+    for k, eje in enumerate(ejes):
+        if len(eje) < 2:
+            continue
+        antes = np.take(indices_clase, range(len(eje) - 1), axis=k)
+        despues = np.take(indices_clase, range(1, len(eje)), axis=k)
+        posiciones = np.argwhere(antes != despues)
+        total += len(posiciones)
+        for posicion in posiciones[:max(0, max_cambios - len(cambios))].tolist():
+            siguiente = list(posicion)
+            siguiente[k] += 1
+            cambios.append({
+                "eje": eje.nombre,
+                "desde": punto(ejes, posicion),
+                "hasta": punto(ejes, siguiente),
+                "indice_desde": posicion,
+                "indice_hasta": siguiente,
+                "clase_desde": int(indices_clase[tuple(posicion)]),
+                "clase_hasta": int(indices_clase[tuple(siguiente)]),
+            })
+    return total, cambios
+
+
+def punto(ejes, indice):
+    """{eje: valor solicitado} de un índice de la rejilla"""
+    return {eje.nombre: eje.etiquetas[i] for eje, i in zip(ejes, indice)}
@@ -0,0 +1,165 @@
+# Util/cache_resultados.py
+"""
+Caché de respuestas de /predict direccionada por contenido.
+
+La clave es la clave del modelo ("nombre@version:etiqueta", ver
+registro_modelos) más la fila ya validada y codificada, así que dos formularios
+equivalentes (p. ej. con claves del frontend distintas) comparten entrada y una
+versión nueva del modelo nunca lee respuestas de la anterior.
+
+Nivel 1: LRU en memoria del proceso. Nivel 2 (opcional): directorio local
+compartido entre workers, con escrituras atómicas; es de mejor esfuerzo, un fallo
+al escribir (disco lleno, valor no serializable) no afecta a la petición.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger("api.cache")
+
+
+class CacheResultados:
+    """LRU con TTL, límite de tamaño y contadores"""
+
+    def __init__(self, max_entradas=1024, ttl_segundos=3600, directorio=None, max_entradas_disco=10000):
+        self.max_entradas = max_entradas
+        self.ttl = ttl_segundos
+        self.directorio = directorio
+        self.max_entradas_disco = max_entradas_disco
+
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._escrituras_disco = 0
+        self.errores_disco = 0
+
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.expirados = 0
+
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, modelo_nombre, fila, variante=""):
+        """Clave canónica: clave versionada del modelo + bytes de la fila codificada"""
+        h = hashlib.sha256()
+        h.update(f"{modelo_nombre}|{variante}|".encode())
+        h.update(fila.tobytes())
+        return h.hexdigest()
+
+    def obtener(self, modelo_nombre, fila, variante=""):
+        """Devuelve la respuesta cacheada o None"""
+        with self._lock:
+            clave = self.clave(modelo_nombre, fila, variante)
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                guardado, respuesta = entrada
+                if time.time() - guardado <= self.ttl:
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return respuesta
+                del self._datos[clave]
+                self.expirados += 1
+
+        respuesta = self._leer_disco(clave)
+        with self._lock:
+            if respuesta is None:
+                self.fallos += 1
+                return None
+            self.aciertos_disco += 1
+            self._insertar(clave, respuesta)
+        return respuesta
+
+    def guardar(self, modelo_nombre, fila, respuesta, variante=""):
+        """Guarda una respuesta completa (debe ser serializable a JSON)"""
+        with self._lock:
+            clave = self.clave(modelo_nombre, fila, variante)
+            self._insertar(clave, respuesta)
+        self._escribir_disco(clave, respuesta)
+
+    def _insertar(self, clave, respuesta):
+        self._datos[clave] = (time.time(), respuesta)
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+
+    def _ruta_disco(self, clave):
+        return os.path.join(self.directorio, clave + ".json")
+
+    def _leer_disco(self, clave):
+        if not self.directorio:
+            return None
+        ruta = self._ruta_disco(clave)
+        try:
+            if time.time() - os.path.getmtime(ruta) > self.ttl:
+                os.remove(ruta)
+                return None
+            with open(ruta, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _escribir_disco(self, clave, respuesta):
+        if not self.directorio:
+            return
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(respuesta, f)
+            os.replace(tmp, self._ruta_disco(clave))
+        except Exception as e:
+            self.errores_disco += 1
+            log.warning("⚠️ No se pudo escribir la entrada de caché en disco: %s", e)
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            return
+        self._escrituras_disco += 1
+        if self._escrituras_disco % 100 == 0:
+            self._podar_disco()
+
+    def _podar_disco(self):
+        """Elimina los archivos más antiguos si el directorio supera el límite y los .tmp huérfanos"""
+        try:
+            nombres = os.listdir(self.directorio)
+            # .tmp de escrituras interrumpidas (p. ej. un worker terminado a mitad)
+            for n in nombres:
+                ruta = os.path.join(self.directorio, n)
+                if n.endswith(".tmp") and time.time() - os.path.getmtime(ruta) > 60:
+                    os.remove(ruta)
+            archivos = [os.path.join(self.directorio, n) for n in nombres if n.endswith(".json")]
+            if len(archivos) <= self.max_entradas_disco:
+                return
+            archivos.sort(key=os.path.getmtime)
+            for ruta in archivos[:len(archivos) - self.max_entradas_disco]:
+                os.remove(ruta)
+        except OSError:
+            pass
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.aciertos_disco + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                "disco": self.directorio,
+                "aciertos": self.aciertos,
+                "aciertos_disco": self.aciertos_disco,
+                "fallos": self.fallos,
+                "expirados": self.expirados,
+                "errores_disco": self.errores_disco,
+                "tasa_aciertos": round((self.aciertos + self.aciertos_disco) / total, 4) if total else 0.0,
+            }
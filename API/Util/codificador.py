@@ -0,0 +1,163 @@
+# Util/codificador.py
+import numpy as np
+
+# Mapeo completo de nombres frontend a backend
+CAMPO_MAPEO_COMPLETO = {
+    "MULTIPLE_CONTRACTING": "B_MULTIPLE_CAE_n",
+    "ACTING_ON_BEHALF": "B_ON_BEHALF_n",
+    "WORKS_CONTRACT": "TYPE_OF_CONTRACT_w",
+    "ISO_COUNTRY_CODE_SI": "ISO_COUNTRY_CODE_si",
+    "ISO_COUNTRY_CODE_LU": "ISO_COUNTRY_CODE_lu",
+    "NUMBER_OF_CONTRACTS": "NUMBER_AWARDS",
+    "NUMBER_OF_LOTS": "LOTS_NUMBER",
+    "NUMBER_OF_OFFERS": "NUMBER_OFFERS",
+    "NUMBER_OFFERS_SME": "NUMBER_TENDERS_SME",
+    "MAIN_ACTIVITY_health": "MAIN_ACTIVITY_health",
+    "MAIN_ACTIVITY_general_public_services": "MAIN_ACTIVITY_general_public_services",
+    "CAE_TYPE_3": "CAE_TYPE_3",
+    "CAE_TYPE_4": "CAE_TYPE_4",
+    "CAE_TYPE_5": "CAE_TYPE_5",
+    "GROUP_CPV_15": "GROUP_CPV_15",
+    "GROUP_CPV_33": "GROUP_CPV_33",
+    "GROUP_CPV_45": "GROUP_CPV_45",
+}
+
+# Reglas de validación de la entrada (única definición: las usan la API, los
+# barridos, puntuar.py y la referencia por diccionario de benchmarks/bench_etapas.py)
+
+# Grupos one-hot: (columnas en orden de prioridad, columna por defecto, exclusivo)
+GRUPOS_ONE_HOT = {
+    "MAIN_ACTIVITY": (
+        ["MAIN_ACTIVITY_health", "MAIN_ACTIVITY_general_public_services"],
+        "MAIN_ACTIVITY_general_public_services",
+        True,
+    ),
+    "CAE_TYPE": (
+        ["CAE_TYPE_3", "CAE_TYPE_4", "CAE_TYPE_5"],
+        "CAE_TYPE_4",
+        True,
+    ),
+    # Para CPV pueden haber múltiples seleccionados
+    "GROUP_CPV": (
+        ["GROUP_CPV_15", "GROUP_CPV_33", "GROUP_CPV_45"],
+        "GROUP_CPV_15",
+        False,
+    ),
+    "ISO_COUNTRY_CODE": (
+        ["ISO_COUNTRY_CODE_lu", "ISO_COUNTRY_CODE_si"],
+        "ISO_COUNTRY_CODE_lu",
+        True,
+    ),
+}
+
+CAMPOS_NUMERICOS = ["NUMBER_AWARDS", "LOTS_NUMBER", "NUMBER_OFFERS", "NUMBER_TENDERS_SME"]
+# Campos cuyo valor 0 se corrige a 1 (mínimo realista)
+CAMPOS_MINIMO_UNO = ["NUMBER_AWARDS", "LOTS_NUMBER", "NUMBER_OFFERS"]
+
+
+class CodificadorEntrada:
+    """
+    Codificador compilado una sola vez por modelo.
+
+    Traduce diccionarios del frontend directamente a filas NumPy en el orden
+    de used_features, aplicando las reglas por defecto de GRUPOS_ONE_HOT y
+    CAMPOS_NUMERICOS de forma vectorizada y sin pandas.
+    """
+
+    def __init__(self, used_features, mapeo=None):
+        self.used_features = list(used_features)
+        self.n_features = len(self.used_features)
+
+        # Columnas de trabajo: las del modelo más las de reglas que el modelo no usa
+        # (se necesitan para las sumas por grupo)
+        columnas = list(self.used_features)
+        campos_reglas = [c for cols, _, _ in GRUPOS_ONE_HOT.values() for c in cols] + CAMPOS_NUMERICOS
+        for campo in campos_reglas:
+            if campo not in columnas:
+                columnas.append(campo)
+        self.columnas = columnas
+        self.indice_columna = {nombre: i for i, nombre in enumerate(columnas)}
+
+        # Índice directo clave del frontend -> posición en la fila
+        self.indice_entrada = dict(self.indice_columna)
+        for clave_frontend, clave_backend in (mapeo or {}).items():
+            if clave_backend in self.indice_columna:
+                self.indice_entrada[clave_frontend] = self.indice_columna[clave_backend]
+
+        self.grupos = {}
+        for nombre, (cols, defecto, exclusivo) in GRUPOS_ONE_HOT.items():
+            self.grupos[nombre] = (
+                np.array([self.indice_columna[c] for c in cols], dtype=np.intp),
+                self.indice_columna[defecto],
+                exclusivo,
+            )
+
+        self.idx_numericos = np.array([self.indice_columna[c] for c in CAMPOS_NUMERICOS], dtype=np.intp)
+        self.mascara_minimo_uno = np.array([c in CAMPOS_MINIMO_UNO for c in CAMPOS_NUMERICOS])
+        self.idx_ofertas = self.indice_columna["NUMBER_OFFERS"]
+        self.idx_pymes = self.indice_columna["NUMBER_TENDERS_SME"]
+
+    def nuevo_bloque(self, n_filas):
+        """Reserva un bloque de trabajo en ceros para n_filas"""
+        return np.zeros((n_filas, len(self.columnas)), dtype=np.float64)
+
+    def escribir_fila(self, entrada_raw, bloque, i):
+        """Escribe una entrada cruda del frontend en la fila i del bloque"""
+        fila = bloque[i]
+        indice = self.indice_entrada
+        for clave, valor in entrada_raw.items():
+            j = indice.get(clave)
+            if j is not None:
+                fila[j] = float(valor)
+
+    def aplicar_reglas(self, bloque):
+        """Aplica in situ las reglas de validación a todas las filas"""
+        for idx, idx_defecto, exclusivo in self.grupos.values():
+            grupo = bloque[:, idx]
+            suma = grupo.sum(axis=1)
+
+            # Sin selección -> valor por defecto
+            bloque[suma == 0, idx_defecto] = 1
+
+            # Selección múltiple en grupo exclusivo -> mantener solo la primera
+            if exclusivo:
+                filas_multiples = np.flatnonzero(suma > 1)
+                if filas_multiples.size:
+                    sub = grupo[filas_multiples]
+                    es_uno = sub == 1
+                    primera = es_uno.argmax(axis=1)
+                    nuevo = np.where(es_uno, 0.0, sub)
+                    con_uno = es_uno.any(axis=1)
+                    nuevo[con_uno, primera[con_uno]] = 1.0
+                    bloque[np.ix_(filas_multiples, idx)] = nuevo
+
+        # Valores numéricos: negativos -> 0, ceros -> 1 en campos con mínimo
+        numericos = bloque[:, self.idx_numericos]
+        corregir_a_uno = (numericos == 0) & self.mascara_minimo_uno
+        numericos = np.maximum(numericos, 0.0)
+        numericos[corregir_a_uno] = 1.0
+        bloque[:, self.idx_numericos] = numericos
+
+        # NUMBER_TENDERS_SME no puede ser mayor que NUMBER_OFFERS
+        np.minimum(bloque[:, self.idx_pymes], bloque[:, self.idx_ofertas], out=bloque[:, self.idx_pymes])
+        return bloque
+
+    def codificar_lote(self, entradas_raw):
+        """Codifica una lista de entradas y devuelve una matriz (n, n_features)"""
+        bloque = self.nuevo_bloque(len(entradas_raw))
+        for i, entrada_raw in enumerate(entradas_raw):
+            self.escribir_fila(entrada_raw, bloque, i)
+        self.aplicar_reglas(bloque)
+        return np.ascontiguousarray(bloque[:, :self.n_features])
+
+    def codificar(self, entrada_raw):
+        """Codifica una sola entrada y devuelve una matriz (1, n_features)"""
+        return self.codificar_lote([entrada_raw])
+
+    def a_diccionario(self, fila):
+        """Convierte una fila codificada en {feature: valor} (enteros cuando aplica)"""
+        fila = np.asarray(fila).ravel()
+        return {
+            nombre: int(v) if float(v).is_integer() else float(v)
+            for nombre, v in zip(self.used_features, fila.tolist())
+        }
@@ -0,0 +1,88 @@
+# Util/comparacion.py
+"""
+Comparación de modelos sobre una misma entrada (/predict/compare).
+
+Cada modelo se puntúa como una tarea en un executor compartido y acotado, así
+la latencia total se acerca a la del modelo más lento y no a la suma. Las
+tareas que no terminan dentro del plazo se reportan como error sin bloquear
+la respuesta; siguen en el pool y liberan sus recursos al terminar.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class ComparadorModelos:
+    def __init__(self, max_workers=4, timeout_segundos=30.0):
+        self.max_workers = max_workers
+        self.timeout = timeout_segundos
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="comparacion")
+        self._lock = threading.Lock()
+        self.comparaciones = 0
+        self.agotados = 0
+
+    def ejecutar(self, tareas):
+        """
+        tareas: {nombre: función sin argumentos}. Devuelve {nombre: (resultado, error, latencia_ms)}
+        con error None si la tarea terminó bien.
+        """
+        def medir(funcion):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            return resultado, round((time.perf_counter() - inicio) * 1000, 1)
+
+        futuros = {nombre: self._pool.submit(medir, funcion) for nombre, funcion in tareas.items()}
+        wait(futuros.values(), timeout=self.timeout)
+
+        salida = {}
+        agotados = 0
+        for nombre, futuro in futuros.items():
+            if not futuro.done():
+                agotados += 1
+                salida[nombre] = (None, "Tiempo agotado", None)
+            elif futuro.exception() is not None:
+                salida[nombre] = (None, str(futuro.exception()), None)
+            else:
+                resultado, latencia = futuro.result()
+                salida[nombre] = (resultado, None, latencia)
+        with self._lock:
+            self.comparaciones += 1
+            self.agotados += agotados
+        return salida
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "timeout_segundos": self.timeout,
+                "comparaciones": self.comparaciones,
+                "tiempos_agotados": self.agotados,
+            }
+
+
+def resumir_acuerdo(predicciones, probabilidades):
+    """
+    predicciones: {modelo: etiqueta}; probabilidades: {modelo: {clase: p}}.
+    Votos por clase, si hay unanimidad y, por clase, la mayor diferencia de
+    probabilidad entre modelos (solo las clases que todos comparten).
+    """
+    votos = {}
+    for nombre, etiqueta in predicciones.items():
+        votos.setdefault(etiqueta, []).append(nombre)
+    mayoritaria = max(votos, key=lambda etiqueta: len(votos[etiqueta])) if votos else None
+
+    diferencias = {}
+    if len(probabilidades) > 1:
+        comunes = set.intersection(*(set(p) for p in probabilidades.values()))
+        for clase in sorted(comunes):
+            valores = [p[clase] for p in probabilidades.values()]
+            diferencias[clase] = round(max(valores) - min(valores), 4)
+
+    return {
+        "unanime": len(votos) == 1,
+        "prediccion_mayoritaria": mayoritaria,
+        "votos": votos,
+        "desacuerdos": {nombre: etiqueta for nombre, etiqueta in predicciones.items() if etiqueta != mayoritaria},
+        "diferencia_probabilidades": diferencias,
+        "diferencia_maxima": max(diferencias.values()) if diferencias else 0.0,
+    }
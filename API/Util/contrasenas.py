@@ -0,0 +1,119 @@
+# Util/contrasenas.py
+"""
+Verificación y hash de contraseñas en un executor dedicado y acotado.
+
+scrypt (N=32768) cuesta ~32 MB y decenas de ms por login; ejecutarlo en un pool
+pequeño y separado impide que una ráfaga de logins deje sin CPU/memoria a los
+hilos que atienden /predict. Cuando la cola está llena se rechaza (429) en vez
+de encolar sin límite.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TimeoutFuturo
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+METODO_POR_DEFECTO = "scrypt:32768:8:1"
+
+
+class ColaContrasenasLlena(Exception):
+    """El pool de contraseñas no admite más trabajo"""
+
+
+class TiempoContrasenaAgotado(Exception):
+    """La operación no terminó dentro del plazo"""
+
+
+def metodo_del_hash(hash_guardado):
+    """'scrypt:32768:8:1$sal$hash' -> 'scrypt:32768:8:1'"""
+    return hash_guardado.split("$", 1)[0]
+
+
+class ServicioContrasenas:
+    def __init__(self, metodo=METODO_POR_DEFECTO, max_workers=2, max_pendientes=16,
+                 timeout_segundos=5.0, ventana_metricas=1000):
+        self.metodo = metodo
+        self.max_workers = max_workers
+        self.max_pendientes = max_pendientes
+        self.timeout = timeout_segundos
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="contrasenas")
+        self._cupos = threading.BoundedSemaphore(max_pendientes)
+        self._lock = threading.Lock()
+        self._latencias = {"verificar": deque(maxlen=ventana_metricas), "hash": deque(maxlen=ventana_metricas)}
+        self._en_cola = 0
+        self.rechazados = 0
+        self.agotados = 0
+        self.rehasheados = 0
+
+    def _ejecutar(self, tipo, funcion, *args):
+        if not self._cupos.acquire(blocking=False):
+            with self._lock:
+                self.rechazados += 1
+            raise ColaContrasenasLlena()
+        with self._lock:
+            self._en_cola += 1
+        inicio = time.perf_counter()
+
+        def tarea():
+            try:
+                return funcion(*args)
+            finally:
+                with self._lock:
+                    self._en_cola -= 1
+                    self._latencias[tipo].append((time.perf_counter() - inicio) * 1000)
+                self._cupos.release()
+
+        futuro = self._pool.submit(tarea)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TimeoutFuturo:
+            with self._lock:
+                self.agotados += 1
+            raise TiempoContrasenaAgotado()
+
+    def necesita_rehash(self, hash_guardado):
+        return metodo_del_hash(hash_guardado) != self.metodo
+
+    def hashear(self, password):
+        return self._ejecutar("hash", generate_password_hash, password, self.metodo)
+
+    def verificar(self, hash_guardado, password):
+        """
+        Devuelve (valida, hash_nuevo). hash_nuevo no es None cuando la contraseña es
+        válida y el hash guardado usa una política distinta a la actual.
+        """
+        def verificar_y_rehashear():
+            if not check_password_hash(hash_guardado, password):
+                return False, None
+            if self.necesita_rehash(hash_guardado):
+                return True, generate_password_hash(password, self.metodo)
+            return True, None
+
+        valida, hash_nuevo = self._ejecutar("verificar", verificar_y_rehashear)
+        if hash_nuevo is not None:
+            with self._lock:
+                self.rehasheados += 1
+        return valida, hash_nuevo
+
+    def estadisticas(self):
+        with self._lock:
+            latencias = {}
+            for tipo, valores in self._latencias.items():
+                ordenados = sorted(valores)
+                n = len(ordenados)
+                latencias[tipo] = {
+                    "operaciones_recientes": n,
+                    "p50_ms": round(ordenados[int(0.50 * (n - 1))], 1) if n else None,
+                    "p95_ms": round(ordenados[int(0.95 * (n - 1))], 1) if n else None,
+                }
+            return {
+                "metodo": self.metodo,
+                "workers": self.max_workers,
+                "max_pendientes": self.max_pendientes,
+                "en_cola": self._en_cola,
+                "rechazados": self.rechazados,
+                "tiempos_agotados": self.agotados,
+                "rehasheados": self.rehasheados,
+                "latencia": latencias,
+            }
@@ -0,0 +1,166 @@
+# Util/duracion.py
+"""
+Post-proceso de la etiqueta predicha (intervalo de duración en meses): texto
+legible y sugerencias de duración. Lo comparten /predict y puntuar.py.
+"""
+import re
+
+
+def interpretar_etiqueta_duracion(etiqueta):
+    """
+    Convierte una etiqueta como '(-0.2, 67.611]' en 'Duración estimada entre 0.2 y 67.6 meses'
+    """
+    try:
+        if etiqueta.startswith("(") or etiqueta.startswith("["):
+            etiqueta = etiqueta.replace("(", "").replace("]", "")
+            partes = etiqueta.split(",")
+            if len(partes) == 2:
+                inicio = round(float(partes[0]), 1)
+                fin = round(float(partes[1]), 1)
+                return f"Duración estimada entre {inicio} y {fin} meses"
+        elif etiqueta.replace(".", "").isnumeric():
+            return f"Duración estimada: {round(float(etiqueta), 1)} meses"
+        else:
+            return f"Duración estimada: {etiqueta}"
+    except:
+        return "Duración estimada desconocida"
+
+
+def generar_sugerencia_group_duration(prediccion_intervalo, probabilidades=None):
+    """Convierte intervalo de predicción en sugerencias prácticas de duración"""
+    
+    try:
+        # Extraer números del intervalo
+        numeros = re.findall(r"[-+]?\d*\.?\d+", prediccion_intervalo)
+        
+        if len(numeros) >= 2:
+            limite_inf = max(0, float(numeros[0]))  # No duraciones negativas
+            limite_sup = float(numeros[1])
+            
+            # Calcular opciones
+            minimo = round(limite_inf, 0)
+            promedio = round((limite_inf + limite_sup) / 2, 0)
+            maximo = round(limite_sup, 0)
+            
+            # Generar sugerencias múltiples
+            sugerencias = {
+                "opcion_recomendada": {
+                    "valor": promedio,
+                    "unidad": "meses",
+                    "descripcion": f"Duración equilibrada ({promedio} meses)",
+                    "justificacion": "Basado en el punto medio del rango predicho"
+                },
+                "alternativas": [
+                    {
+                        "tipo": "Conservadora",
+                        "valor": minimo,
+                        "unidad": "meses", 
+                        "descripcion": f"Duración mínima ({minimo} meses)",
+                        "uso_recomendado": "Para proyectos con alcance bien definido"
+                    },
+                    {
+                        "tipo": "Estándar",
+                        "valor": promedio,
+                        "unidad": "meses",
+                        "descripcion": f"Duración promedio ({promedio} meses)", 
+                        "uso_recomendado": "Para la mayoría de casos"
+                    },
+                    {
+                        "tipo": "Extendida",
+                        "valor": maximo,
+                        "unidad": "meses",
+                        "descripcion": f"Duración máxima ({maximo} meses)",
+                        "uso_recomendado": "Para proyectos complejos con incertidumbre"
+                    }
+                ],
+                "rango_original": {
+                    "minimo": limite_inf,
+                    "maximo": limite_sup,
+                    "unidad": "meses"
+                }
+            }
+            
+            # Añadir equivalencias en diferentes unidades (usando 30.4 días/mes como en tu metodología)
+            for alt in sugerencias["alternativas"]:
+                alt["equivalencias"] = {
+                    "dias": round(alt["valor"] * 30.4),  # Usar 30.4 como en tu cálculo de duración
+                    "años": round(alt["valor"] / 12, 1)
+                }
+            
+            # Añadir recomendaciones según duración
+            recomendaciones = []
+            if promedio <= 6:
+                recomendaciones = [
+                    "📋 Contrato de corta duración - definir entregables específicos",
+                    "💰 Considerar pagos por hitos",
+                    "🔄 Incluir opción de renovación si es necesario"
+                ]
+            elif promedio <= 24:
+                recomendaciones = [
+                    "📊 Incluir evaluaciones trimestrales",
+                    "💱 Considerar cláusulas de ajuste de precios",
+                    "📋 Definir procedimientos de modificación"
+                ]
+            else:
+                recomendaciones = [
+                    "🎯 Establecer hitos semestrales de evaluación",
+                    "💼 Incluir garantías de cumplimiento",
+                    "📈 Cláusulas de revisión anual"
+                ]
+                
+            sugerencias["recomendaciones_contractuales"] = recomendaciones
+            
+            # Verificar probabilidades de forma segura para arrays NumPy
+            if probabilidades is not None and hasattr(probabilidades, '__len__') and len(probabilidades) > 0:
+                try:
+                    # Convertir a lista Python si es array NumPy para evitar ambigüedad
+                    if hasattr(probabilidades, 'tolist'):
+                        probs_list = probabilidades.tolist()
+                    else:
+                        probs_list = list(probabilidades)
+                    
+                    # Ahora sí podemos usar max() sin problemas
+                    max_prob = max(probs_list)
+                    
+                    sugerencias["confianza"] = {
+                        "nivel": "Alta" if max_prob > 0.7 else "Media" if max_prob > 0.4 else "Baja",
+                        "porcentaje": f"{max_prob:.1%}",
+                        "interpretacion": "Predicción confiable" if max_prob > 0.6 else "Considerar análisis adicional"
+                    }
+                    
+                except Exception as prob_error:
+                    # Fallback para confianza
+                    sugerencias["confianza"] = {
+                        "nivel": "Media",
+                        "porcentaje": "N/A",
+                        "interpretacion": "Error calculando confianza"
+                    }
+            else:
+                sugerencias["confianza"] = {
+                    "nivel": "Media",
+                    "porcentaje": "N/A", 
+                    "interpretacion": "Probabilidades no disponibles"
+                }
+            
+            return sugerencias
+            
+        else:
+            # Fallback si no se puede parsear el intervalo
+            return {
+                "opcion_recomendada": {
+                    "valor": 12,
+                    "unidad": "meses",
+                    "descripcion": "Duración estándar por defecto",
+                    "justificacion": "No se pudo determinar el rango específico"
+                }
+            }
+            
+    except Exception as e:
+        return {
+            "opcion_recomendada": {
+                "valor": 12,
+                "unidad": "meses", 
+                "descripcion": "Duración estándar por defecto",
+                "justificacion": "Error en el procesamiento de la predicción"
+            }
+        }
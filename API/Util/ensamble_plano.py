@@ -0,0 +1,166 @@
+# Util/ensamble_plano.py
+"""
+Evaluador de ensambles de árboles en arreglos planos (structure-of-arrays).
+
+Todos los nodos de todos los árboles se concatenan en vectores (feature, umbral,
+hijo izquierdo, hijo derecho, valor). Las hojas apuntan a sí mismas con umbral
++inf, así que el recorrido es un bucle de profundidad fija vectorizado sobre
+(filas x árboles), sin la maquinaria genérica de sklearn por llamada.
+
+Soporta RandomForestClassifier / ExtraTreesClassifier y GradientBoostingClassifier
+con init por defecto. Verificación contra el .pkl real (desde la carpeta API):
+    python -m Util.ensamble_plano
+La equivalencia con el modelo sintético se comprueba en tests/test_ensamble_plano.py.
+"""
+import numpy as np
+
+
+class EnsamblePlano:
+    """Ensamble aplanado con la misma interfaz que usa app.py (predict, predict_proba, classes_)"""
+
+    def __init__(self, arboles, clases, tipo, used_features=None, n_features=None,
+                 base=None, tasa_aprendizaje=1.0, escala_logit=1.0):
+        # arboles: lista (por salida) de listas de tree_ de sklearn
+        self.classes_ = np.asarray(clases)
+        self.tipo = tipo
+        if used_features is not None:
+            self.used_features = list(used_features)
+        self.n_features_in_ = n_features
+        self.base = base
+        self.tasa_aprendizaje = tasa_aprendizaje
+        self.escala_logit = escala_logit
+
+        features, umbrales, izq, der, valores, raices = [], [], [], [], [], []
+        desplazamiento = 0
+        self.profundidad = 0
+        self.n_salidas = len(arboles)
+        self.arboles_por_salida = len(arboles[0])
+        for arboles_salida in arboles:
+            for t in arboles_salida:
+                n = t.node_count
+                hoja = t.children_left == -1
+                propios = np.arange(n) + desplazamiento
+                features.append(np.where(hoja, 0, t.feature).astype(np.intp))
+                umbrales.append(np.where(hoja, np.inf, t.threshold))
+                izq.append(np.where(hoja, propios, t.children_left + desplazamiento).astype(np.intp))
+                der.append(np.where(hoja, propios, t.children_right + desplazamiento).astype(np.intp))
+                valor = t.value[:, 0, :]
+                if tipo == "bosque":
+                    suma = valor.sum(axis=1, keepdims=True)
+                    suma[suma == 0] = 1.0
+                    valor = valor / suma
+                valores.append(valor.astype(np.float64))
+                raices.append(desplazamiento)
+                self.profundidad = max(self.profundidad, t.max_depth)
+                desplazamiento += n
+
+        self.feature = np.ascontiguousarray(np.concatenate(features))
+        self.umbral = np.ascontiguousarray(np.concatenate(umbrales))
+        self.izquierdo = np.ascontiguousarray(np.concatenate(izq))
+        self.derecho = np.ascontiguousarray(np.concatenate(der))
+        self.valor = np.ascontiguousarray(np.concatenate(valores))
+        self.raices = np.asarray(raices, dtype=np.intp)
+
+    def hojas(self, X):
+        """Índice global de la hoja alcanzada por cada fila en cada árbol: (n, n_arboles)"""
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        if X32.ndim == 1:
+            X32 = X32.reshape(1, -1)
+        nodos = np.repeat(self.raices[np.newaxis, :], X32.shape[0], axis=0)
+        for _ in range(self.profundidad):
+            valores = np.take_along_axis(X32, self.feature[nodos], axis=1)
+            nodos = np.where(valores <= self.umbral[nodos], self.izquierdo[nodos], self.derecho[nodos])
+        return nodos
+
+    def predict_proba(self, X):
+        nodos = self.hojas(X)
+        if self.tipo == "bosque":
+            return self.valor[nodos].mean(axis=1)
+
+        # Gradient boosting: suma de hojas por salida + predicción inicial
+        n = nodos.shape[0]
+        hojas = self.valor[nodos, 0].reshape(n, self.n_salidas, self.arboles_por_salida)
+        crudo = self.base + self.tasa_aprendizaje * hojas.sum(axis=2)
+        if self.n_salidas == 1:
+            p = 1.0 / (1.0 + np.exp(-self.escala_logit * crudo[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        crudo = crudo - crudo.max(axis=1, keepdims=True)
+        exp = np.exp(crudo)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def aplanar_modelo(modelo):
+    """Convierte un ensamble de sklearn en EnsamblePlano; None si no está soportado"""
+    from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+
+    used_features = getattr(modelo, "used_features", None)
+    n_features = getattr(modelo, "n_features_in_", None)
+
+    if isinstance(modelo, (RandomForestClassifier, ExtraTreesClassifier)) and modelo.n_outputs_ == 1:
+        arboles = [[arbol.tree_ for arbol in modelo.estimators_]]
+        return EnsamblePlano(arboles, modelo.classes_, "bosque", used_features, n_features)
+
+    if isinstance(modelo, GradientBoostingClassifier):
+        # Solo init constante ('zero' o el DummyClassifier por defecto)
+        init = modelo.init_
+        if not (isinstance(init, str) or type(init).__name__ == "DummyClassifier"):
+            return None
+        base = modelo._raw_predict_init(np.zeros((1, modelo.n_features_in_), dtype=np.float32))[0]
+        estimadores = np.asarray(modelo.estimators_, dtype=object)
+        arboles = [[arbol.tree_ for arbol in estimadores[:, k]] for k in range(estimadores.shape[1])]
+        escala = 2.0 if getattr(modelo, "loss", "log_loss") == "exponential" else 1.0
+        return EnsamblePlano(
+            arboles, modelo.classes_, "boosting", used_features, n_features,
+            base=base, tasa_aprendizaje=modelo.learning_rate, escala_logit=escala,
+        )
+
+    return None
+
+
+def verificar_equivalencia(modelo, plano, X):
+    """Compara predict_proba original y aplanado; devuelve (error_max, coincidencia_clase)"""
+    esperado = modelo.predict_proba(X)
+    obtenido = plano.predict_proba(X)
+    error_max = float(np.abs(esperado - obtenido).max())
+    coincidencia = float((esperado.argmax(axis=1) == obtenido.argmax(axis=1)).mean())
+    return error_max, coincidencia
+
+
+def main():
+    import argparse
+    import os
+
+    import joblib
+
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Verifica el ensamble aplanado contra sklearn")
+    parser.add_argument("--modelo-path", default=os.path.join(base_dir, "model", "modelos_experimento_B.pkl"))
+    parser.add_argument("--muestras", type=int, default=5000)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    modelos = joblib.load(args.modelo_path)
+    rng = np.random.default_rng(args.semilla)
+    correcto = True
+    for nombre, modelo in modelos.items():
+        plano = aplanar_modelo(modelo)
+        if plano is None:
+            print(f"⚠️ {nombre}: tipo {type(modelo).__name__} no soportado")
+            continue
+        # Mezcla de binarios y conteos pequeños, similar al formulario
+        X = rng.integers(0, 2, (args.muestras, modelo.n_features_in_)).astype(np.float64)
+        X += rng.integers(0, 20, X.shape) * (rng.random(X.shape) < 0.3)
+        error_max, coincidencia = verificar_equivalencia(modelo, plano, X)
+        ok = error_max < 1e-8
+        correcto &= ok
+        print(f"{'✅' if ok else '❌'} {nombre}: error máximo {error_max:.2e}, "
+              f"coincidencia de clase {coincidencia:.2%}")
+    if not correcto:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
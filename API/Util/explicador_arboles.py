@@ -0,0 +1,108 @@
+# Util/explicador_arboles.py
+"""
+Explicaciones exactas por recorrido de caminos de decisión (Saabas).
+
+Para una fila, cada nodo del camino en cada árbol reparte el cambio de valor
+entre padre e hijo a la feature que divide en el padre; la suma sobre el
+ensamble da la contribución de cada feature. Es determinista y cuesta un
+recorrido por árbol, frente a los miles de muestras y el ajuste ridge de LIME.
+
+  - Bosques: contribuciones en probabilidad; sesgo + suma = predict_proba.
+  - Gradient boosting: contribuciones en el espacio de la función de decisión
+    (log-odds), sesgo = predicción inicial + valores raíz.
+
+El recorrido usa los arreglos de Util.ensamble_plano. ExplicacionArboles expone
+as_list/available_labels como lime.explanation.Explanation, así que la
+respuesta reutiliza construir_tabla_lime y convert_to_if_then.
+"""
+import numpy as np
+
+from Util.ensamble_plano import aplanar_modelo
+
+
+class ExplicacionArboles:
+    """Contribuciones de una fila con la interfaz de Explanation que usa la app"""
+
+    def __init__(self, contribuciones, sesgo, used_features, fila, etiqueta):
+        self.contribuciones = contribuciones
+        self.sesgo = sesgo
+        self.used_features = list(used_features)
+        self.fila = fila
+        self.etiqueta = etiqueta
+
+    def available_labels(self):
+        return [self.etiqueta]
+
+    def as_list(self, label=None):
+        """[(descripcion, contribucion)] de la clase label (índice), de mayor a menor |contribución|"""
+        label = self.etiqueta if label is None else label
+        if not 0 <= label < self.contribuciones.shape[1]:
+            raise KeyError(label)
+        pesos = self.contribuciones[:, label]
+        orden = np.argsort(-np.abs(pesos), kind="stable")
+        return [
+            (f"{self.used_features[i]} = {_formatear_valor(self.fila[i])}", float(pesos[i]))
+            for i in orden if pesos[i] != 0.0
+        ]
+
+
+def _formatear_valor(valor):
+    valor = float(valor)
+    return str(int(valor)) if valor.is_integer() else f"{valor:.2f}"
+
+
+class ExplicadorArboles:
+    def __init__(self, plano, used_features):
+        self.plano = plano
+        self.used_features = list(used_features)
+        self.n_features = len(self.used_features)
+        self.bosque = plano.tipo == "bosque"
+        n_arboles = plano.n_salidas * plano.arboles_por_salida
+        # Salida (clase) a la que suma cada árbol del boosting
+        self.salida_arbol = np.repeat(np.arange(plano.n_salidas), plano.arboles_por_salida)
+        raices = plano.valor[plano.raices]
+        if self.bosque:
+            self._sesgo = raices.mean(axis=0)
+            self._escala = 1.0 / n_arboles
+        else:
+            self._sesgo = plano.base + plano.tasa_aprendizaje * np.bincount(
+                self.salida_arbol, weights=raices[:, 0], minlength=plano.n_salidas
+            )
+            self._escala = plano.tasa_aprendizaje
+
+    def contribuciones(self, fila):
+        """(contribuciones (n_features, n_clases), sesgo (n_clases,)) de una fila codificada"""
+        p = self.plano
+        x = np.ascontiguousarray(fila, dtype=np.float32).ravel()
+        n_columnas = p.valor.shape[1] if self.bosque else p.n_salidas
+        contrib = np.zeros((self.n_features, n_columnas), dtype=np.float64)
+        nodos = p.raices
+        # Las hojas apuntan a sí mismas: al llegar a ellas el delta es 0
+        for _ in range(p.profundidad):
+            features = p.feature[nodos]
+            hijos = np.where(x[features] <= p.umbral[nodos], p.izquierdo[nodos], p.derecho[nodos])
+            delta = p.valor[hijos] - p.valor[nodos]
+            if self.bosque:
+                np.add.at(contrib, features, delta)
+            else:
+                np.add.at(contrib, (features, self.salida_arbol), delta[:, 0])
+            nodos = hijos
+        contrib *= self._escala
+        sesgo = self._sesgo
+        if not self.bosque and p.n_salidas == 1:
+            # Boosting binario: una sola función de decisión a favor de la clase 1
+            contrib = np.column_stack([-contrib[:, 0], contrib[:, 0]])
+            sesgo = np.array([-sesgo[0], sesgo[0]])
+        return contrib, sesgo
+
+    def explain_instance(self, fila, etiqueta):
+        contrib, sesgo = self.contribuciones(fila)
+        return ExplicacionArboles(contrib, sesgo, self.used_features, np.asarray(fila).ravel(), etiqueta)
+
+
+def crear_explicador_arboles(modelo, used_features):
+    """Explicador exacto para ensambles soportados por aplanar_modelo; None en otro caso"""
+    plano = aplanar_modelo(modelo)
+    if plano is None:
+        return None
+    return ExplicadorArboles(plano, used_features)
@@ -0,0 +1,70 @@
+# Util/explicador_lime.py
+"""
+Explicadores LIME reutilizables, construidos una vez al iniciar.
+
+El fondo es una muestra de la distribución de entrenamiento guardada junto al
+modelo (model/fondo_lime.npz con las claves "X" y "features"). Así las
+estadísticas del discretizador se calculan una sola vez y las explicaciones
+son comparables entre llamadas.
+
+Generar el fondo (desde la carpeta API):
+    python -m Util.explicador_lime --csv datos_entrenamiento.csv --muestras 1000
+"""
+import argparse
+import os
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_FONDO = os.path.join(BASE_DIR, "model", "fondo_lime.npz")
+
+
+def cargar_fondo(used_features, ruta=RUTA_FONDO):
+    """Devuelve la muestra de fondo con las columnas en el orden de used_features, o None"""
+    if not os.path.exists(ruta):
+        return None
+    with np.load(ruta, allow_pickle=False) as datos:
+        X = datos["X"]
+        features = [str(f) for f in datos["features"]]
+    indice = {nombre: i for i, nombre in enumerate(features)}
+    if any(nombre not in indice for nombre in used_features):
+        return None
+    return np.ascontiguousarray(X[:, [indice[nombre] for nombre in used_features]], dtype=np.float64)
+
+
+def crear_explicador(fondo, used_features, clases, random_state=0):
+    from lime.lime_tabular import LimeTabularExplainer
+
+    return LimeTabularExplainer(
+        training_data=fondo,
+        feature_names=list(used_features),
+        class_names=clases,
+        mode="classification",
+        random_state=random_state,
+    )
+
+
+def guardar_fondo(X, features, ruta=RUTA_FONDO):
+    np.savez_compressed(ruta, X=np.asarray(X, dtype=np.float32), features=np.asarray(features, dtype=str))
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Genera la muestra de fondo para LIME")
+    parser.add_argument("--csv", required=True, help="Datos de entrenamiento ya codificados (columnas = features)")
+    parser.add_argument("--muestras", type=int, default=1000)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default=RUTA_FONDO)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    df = df.select_dtypes(include="number")
+    if len(df) > args.muestras:
+        df = df.sample(n=args.muestras, random_state=args.semilla)
+    guardar_fondo(df.values, list(df.columns), args.salida)
+    print(f"✅ Fondo LIME guardado en {args.salida}: {df.shape[0]} filas, {df.shape[1]} columnas")
+
+
+if __name__ == "__main__":
+    main()
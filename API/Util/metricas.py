@@ -0,0 +1,293 @@
+# Util/metricas.py
+"""
+Métricas en proceso con exposición en formato de texto de Prometheus.
+
+Contadores, indicadores e histogramas de buckets fijos, con etiquetas; cada
+observación es un par de sumas bajo un lock, así que pueden quedarse activas
+en producción. Las métricas son por proceso: con varios workers, Prometheus
+las recoge de cada uno (o se agregan por pid).
+
+etapa("inferencia", modelo=...) mide un bloque dentro de la petición en curso
+(ruta tomada del hilo actual). El perfilador de muestreo es opcional
+(PERFILADOR_UMBRAL_MS): un hilo toma las pilas de los hilos con peticiones en
+curso cada pocos ms y guarda el perfil de las que superan el umbral.
+"""
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatear_etiquetas(nombres, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _clave(self, valores):
+        if len(valores) != len(self.etiquetas):
+            raise ValueError(f"{self.nombre}: se esperaban etiquetas {self.etiquetas}")
+        return tuple(str(v) for v in valores)
+
+    def cabecera(self):
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, *valores, cantidad=1):
+        clave = self._clave(valores)
+        with self._lock:
+            self._series[clave] = self._series.get(clave, 0) + cantidad
+
+    def exponer(self):
+        with self._lock:
+            series = list(self._series.items())
+        return self.cabecera() + [
+            f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_numero(valor)}" for clave, valor in series
+        ]
+
+
+class Indicador(_Metrica):
+    tipo = "gauge"
+
+    def sumar(self, *valores, cantidad=1):
+        clave = self._clave(valores)
+        with self._lock:
+            self._series[clave] = self._series.get(clave, 0) + cantidad
+
+    def restar(self, *valores, cantidad=1):
+        self.sumar(*valores, cantidad=-cantidad)
+
+    def fijar(self, *valores, valor):
+        clave = self._clave(valores)
+        with self._lock:
+            self._series[clave] = valor
+
+    exponer = Contador.exponer
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, *valores, valor):
+        clave = self._clave(valores)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                # conteos por bucket (+Inf al final), suma, total
+                serie = self._series[clave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    @contextmanager
+    def medir(self, *valores):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(*valores, valor=time.perf_counter() - inicio)
+
+    def exponer(self):
+        with self._lock:
+            series = [(clave, list(conteos), suma, total) for clave, (conteos, suma, total) in self._series.items()]
+        lineas = self.cabecera()
+        for clave, conteos, suma, total in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = 'le="' + _numero(limite) + '"'
+                lineas.append(f"{self.nombre}_bucket{_formatear_etiquetas(self.etiquetas, clave, le)} {acumulado}")
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+            lineas.append(f"{self.nombre}_sum{etiquetas} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{etiquetas} {total}")
+        return lineas
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas = []
+
+    def _agregar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._agregar(Contador(nombre, ayuda, etiquetas))
+
+    def indicador(self, nombre, ayuda, etiquetas=()):
+        return self._agregar(Indicador(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_SEGUNDOS):
+        return self._agregar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def exponer(self):
+        lineas = []
+        for metrica in self._metricas:
+            lineas.extend(metrica.exponer())
+        return "\n".join(lineas) + "\n"
+
+
+# ------------------------------------------------------------------ petición
+_contexto = threading.local()
+
+
+def ruta_actual():
+    return getattr(_contexto, "ruta", "ninguna")
+
+
+def fijar_ruta(ruta):
+    """Ruta con la que se etiquetan las etapas del hilo actual (p. ej. trabajos en segundo plano)"""
+    _contexto.ruta = ruta
+
+
+class PerfiladorMuestreo:
+    """Muestreo de pilas de los hilos con peticiones en curso; guarda los perfiles lentos"""
+
+    def __init__(self, umbral_ms, intervalo_ms=5.0, max_perfiles=20, profundidad=40):
+        self.umbral = umbral_ms / 1000.0
+        self.intervalo = intervalo_ms / 1000.0
+        self.profundidad = profundidad
+        self.perfiles = deque(maxlen=max_perfiles)
+        self._lock = threading.Lock()
+        self._activos = {}
+        self._hilo = None
+
+    def _asegurar_hilo(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._bucle, name="perfilador", daemon=True)
+            self._hilo.start()
+
+    def _pila(self, marco):
+        partes = []
+        while marco is not None and len(partes) < self.profundidad:
+            codigo = marco.f_code
+            partes.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{marco.f_lineno})")
+            marco = marco.f_back
+        return ";".join(reversed(partes))
+
+    def _bucle(self):
+        while True:
+            time.sleep(self.intervalo)
+            with self._lock:
+                activos = list(self._activos.items())
+            if not activos:
+                continue
+            marcos = sys._current_frames()
+            for id_hilo, muestras in activos:
+                marco = marcos.get(id_hilo)
+                if marco is not None:
+                    muestras[self._pila(marco)] += 1
+
+    def iniciar(self):
+        muestras = Counter()
+        with self._lock:
+            self._activos[threading.get_ident()] = muestras
+        self._asegurar_hilo()
+        return muestras
+
+    def terminar(self, muestras, ruta, duracion):
+        with self._lock:
+            self._activos.pop(threading.get_ident(), None)
+        if duracion >= self.umbral and muestras:
+            self.perfiles.append({
+                "ruta": ruta,
+                "duracion_ms": round(duracion * 1000, 1),
+                "momento": time.time(),
+                "muestras": sum(muestras.values()),
+                # Pilas colapsadas (formato de flamegraph), las más frecuentes primero
+                "pilas": [{"pila": pila, "muestras": n} for pila, n in muestras.most_common(25)],
+            })
+
+    def obtener(self):
+        return list(self.perfiles)
+
+
+class InstrumentacionPeticiones:
+    """Métricas estándar de la API: peticiones, latencia total y por etapa, errores y en curso"""
+
+    def __init__(self, registro, perfilador=None):
+        self.perfilador = perfilador
+        self.peticiones = registro.contador(
+            "api_peticiones_total", "Peticiones atendidas", ("ruta", "metodo", "codigo"))
+        self.latencia = registro.histograma(
+            "api_peticion_segundos", "Latencia total por ruta", ("ruta",))
+        self.etapas = registro.histograma(
+            "api_etapa_segundos", "Latencia por etapa de la petición", ("ruta", "etapa", "modelo"))
+        self.predicciones = registro.contador(
+            "api_predicciones_total", "Filas puntuadas por modelo", ("ruta", "modelo"))
+        self.errores = registro.contador(
+            "api_errores_total", "Errores por tipo", ("ruta", "tipo"))
+        self.en_curso = registro.indicador(
+            "api_peticiones_en_curso", "Peticiones en curso", ("ruta",))
+
+    def iniciar(self, ruta, metodo):
+        _contexto.ruta = ruta
+        self.en_curso.sumar(ruta)
+        muestras = self.perfilador.iniciar() if self.perfilador is not None else None
+        return {"ruta": ruta, "metodo": metodo, "inicio": time.perf_counter(), "muestras": muestras}
+
+    def terminar(self, estado, codigo):
+        if estado.get("terminado"):
+            return
+        estado["terminado"] = True
+        duracion = time.perf_counter() - estado["inicio"]
+        ruta = estado["ruta"]
+        self.en_curso.restar(ruta)
+        self.peticiones.inc(ruta, estado["metodo"], codigo)
+        self.latencia.observar(ruta, valor=duracion)
+        if estado["muestras"] is not None:
+            self.perfilador.terminar(estado["muestras"], ruta, duracion)
+        _contexto.ruta = "ninguna"
+
+    @contextmanager
+    def peticion(self, ruta, metodo="POST"):
+        """Para rutas fuera de Flask (asgi.py); el código se fija en estado["codigo"]"""
+        estado = self.iniciar(ruta, metodo)
+        estado["codigo"] = 500
+        try:
+            yield estado
+        finally:
+            self.terminar(estado, estado["codigo"])
+
+    def etapa(self, nombre, modelo="", ruta=None):
+        return self.etapas.medir(ruta or ruta_actual(), nombre, modelo)
+
+    def error(self, tipo, ruta=None):
+        self.errores.inc(ruta or ruta_actual(), tipo)
+
+    def prediccion(self, modelo, filas=1):
+        self.predicciones.inc(ruta_actual(), modelo, cantidad=filas)
@@ -0,0 +1,120 @@
+# Util/micro_lotes.py
+"""
+Planificador de micro-lotes por modelo.
+
+Las peticiones concurrentes de /predict que llegan dentro de una ventana corta
+(p. ej. 2 ms) se agrupan en una sola llamada vectorizada a predict_proba y cada
+petición recibe sus filas de vuelta.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class PlanificadorLotes:
+    """Agrupa llamadas a predict_proba de varios hilos en un solo lote"""
+
+    def __init__(self, predict_proba, ventana_ms=2.0, max_lote=64, nombre="modelo", ventana_metricas=1000):
+        self.predict_proba = predict_proba
+        self.ventana = ventana_ms / 1000.0
+        self.max_lote = max_lote
+        self.nombre = nombre
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._espera_ms = deque(maxlen=ventana_metricas)
+        self._llenado = deque(maxlen=ventana_metricas)
+        self.lotes = 0
+        self.filas = 0
+        self.peticiones = 0
+        self._hilo = threading.Thread(target=self._bucle, name=f"microlotes-{nombre}", daemon=True)
+        self._hilo.start()
+
+    def __call__(self, X):
+        return self.predecir(X)
+
+    def predecir(self, X):
+        """Encola X (n filas) y bloquea hasta recibir sus probabilidades"""
+        X = np.asarray(X)
+        # Lotes grandes no ganan nada esperando: se evalúan directamente
+        if X.shape[0] >= self.max_lote:
+            return self.predict_proba(X)
+        futuro = Future()
+        self._cola.put((X, futuro, time.perf_counter()))
+        return futuro.result()
+
+    def _recolectar(self):
+        """Bloquea por la primera petición y junta las que lleguen dentro de la ventana"""
+        primero = self._cola.get()
+        if primero is None:
+            return None, 0
+        pendientes = [primero]
+        filas = pendientes[0][0].shape[0]
+        limite = time.perf_counter() + self.ventana
+        while filas < self.max_lote:
+            restante = limite - time.perf_counter()
+            if restante <= 0:
+                break
+            try:
+                item = self._cola.get(timeout=restante)
+            except queue.Empty:
+                break
+            if item is None:
+                # Detener: se atiende lo ya recolectado y se sale en la siguiente vuelta
+                self._cola.put(None)
+                break
+            pendientes.append(item)
+            filas += item[0].shape[0]
+        return pendientes, filas
+
+    def _bucle(self):
+        while True:
+            pendientes, filas = self._recolectar()
+            if pendientes is None:
+                return
+            inicio = time.perf_counter()
+            try:
+                probas = self.predict_proba(np.vstack([X for X, _, _ in pendientes]))
+            except Exception as e:
+                for _, futuro, _ in pendientes:
+                    futuro.set_exception(e)
+                continue
+
+            desde = 0
+            for X, futuro, _ in pendientes:
+                futuro.set_result(probas[desde:desde + X.shape[0]])
+                desde += X.shape[0]
+
+            with self._lock:
+                self.lotes += 1
+                self.filas += filas
+                self.peticiones += len(pendientes)
+                self._llenado.append(filas / self.max_lote)
+                self._espera_ms.extend((inicio - encolado) * 1000 for _, _, encolado in pendientes)
+
+    def detener(self):
+        """Termina el hilo despachador tras atender lo ya encolado (versión de modelo retirada)"""
+        self._cola.put(None)
+
+    def estadisticas(self):
+        with self._lock:
+            espera = sorted(self._espera_ms)
+            n = len(espera)
+            return {
+                "ventana_ms": self.ventana * 1000,
+                "max_lote": self.max_lote,
+                "lotes": self.lotes,
+                "filas": self.filas,
+                "peticiones": self.peticiones,
+                "peticiones_por_lote": round(self.peticiones / self.lotes, 2) if self.lotes else 0.0,
+                "llenado_medio": round(sum(self._llenado) / len(self._llenado), 4) if self._llenado else 0.0,
+                "espera_ms": {
+                    "p50": round(espera[int(0.50 * (n - 1))], 3) if n else None,
+                    "p95": round(espera[int(0.95 * (n - 1))], 3) if n else None,
+                    "max": round(espera[-1], 3) if n else None,
+                },
+                "cola": self._cola.qsize(),
+            }
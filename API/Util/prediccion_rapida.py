@@ -0,0 +1,46 @@
+# Util/prediccion_rapida.py
+"""
+Rutas de predict_proba sin pandas ni validación de nombres de features.
+
+Los árboles de sklearn trabajan internamente en float32 C-contiguo; entregando
+la matriz ya en ese formato se evita la copia de check_array. Para bosques
+aleatorios se recorre cada árbol directamente (lo mismo que hace
+RandomForestClassifier.predict_proba, sin la maquinaria de joblib).
+"""
+import numpy as np
+from sklearn import config_context
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+
+def a_float32_contiguo(X):
+    """Convierte a float32 C-contiguo 2D (sin copia si ya lo es)"""
+    X = np.asarray(X)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def crear_predict_proba_rapido(modelo):
+    """Devuelve una función f(X) -> probabilidades equivalente a modelo.predict_proba"""
+    if isinstance(modelo, (RandomForestClassifier, ExtraTreesClassifier)) and modelo.n_outputs_ == 1:
+        arboles = [arbol.tree_ for arbol in modelo.estimators_]
+        n_clases = len(modelo.classes_)
+
+        def predict_proba_bosque(X):
+            X32 = a_float32_contiguo(X)
+            acumulado = np.zeros((X32.shape[0], n_clases), dtype=np.float64)
+            for arbol in arboles:
+                proba = arbol.predict(X32)[:, :n_clases]
+                normalizador = proba.sum(axis=1)[:, np.newaxis]
+                normalizador[normalizador == 0.0] = 1.0
+                acumulado += proba / normalizador
+            acumulado /= len(arboles)
+            return acumulado
+
+        return predict_proba_bosque
+
+    def predict_proba_generico(X):
+        with config_context(assume_finite=True):
+            return modelo.predict_proba(a_float32_contiguo(X))
+
+    return predict_proba_generico
@@ -0,0 +1,142 @@
+# Util/registro_eventos.py
+"""
+Logging estructurado, con niveles y asíncrono.
+
+Los módulos registran con logging.getLogger("api...."). El handler de la raíz
+"api" solo encola el LogRecord (sin formatear, la interpolación de argumentos
+también se difiere); un hilo QueueListener lo convierte en una línea JSON y lo
+escribe, así el hilo de la petición no hace E/S.
+
+Cada petición tiene un id (cabecera X-Request-ID o uno nuevo) que se añade a
+todos sus registros. Los registros por debajo de WARNING se muestrean por
+petición (LOG_MUESTREO, 1.0 = todos) para acotar el volumen a alto QPS.
+
+Variables: LOG_NIVEL (INFO), LOG_MUESTREO (1.0), LOG_FORMATO (json | texto).
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+
+id_peticion = contextvars.ContextVar("id_peticion", default=None)
+_muestreada = contextvars.ContextVar("muestreada", default=True)
+
+_estado = {"handler": None, "listener": None, "pid": None, "muestreo": 1.0}
+
+
+class FiltroContexto(logging.Filter):
+    """Se ejecuta en el hilo que registra: copia el id de la petición y aplica el muestreo"""
+
+    def filter(self, record):
+        record.request_id = id_peticion.get()
+        return record.levelno >= logging.WARNING or _muestreada.get()
+
+
+class ManejadorCola(logging.handlers.QueueHandler):
+    """QueueHandler que no formatea en el hilo que registra (cola en memoria, sin pickling)"""
+
+    def prepare(self, record):
+        return record
+
+
+class FormatoJSON(logging.Formatter):
+    def format(self, record):
+        datos = {
+            "ts": round(record.created, 3),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        extra = getattr(record, "datos", None)
+        if extra:
+            datos.update(extra)
+        if record.exc_info:
+            datos["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FormatoTexto(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        texto = super().format(record)
+        extra = getattr(record, "datos", None)
+        return f"{texto} {json.dumps(extra, ensure_ascii=False, default=str)}" if extra else texto
+
+
+def _iniciar_listener(formato):
+    salida = logging.StreamHandler(sys.stdout)
+    salida.setFormatter(FormatoTexto() if formato == "texto" else FormatoJSON())
+    cola = queue.SimpleQueue()
+    _estado["handler"].queue = cola
+    listener = logging.handlers.QueueListener(cola, salida)
+    listener.start()
+    _estado["listener"] = listener
+    _estado["pid"] = os.getpid()
+
+
+def configurar_registro(nivel=None, muestreo=None, formato=None):
+    """Configura el logger "api" (una sola vez por proceso) y lo devuelve"""
+    logger = logging.getLogger("api")
+    if _estado["handler"] is not None:
+        return logger
+    nivel = (nivel or os.environ.get("LOG_NIVEL", "INFO")).upper()
+    _estado["muestreo"] = float(muestreo if muestreo is not None else os.environ.get("LOG_MUESTREO", "1.0"))
+    _estado["formato"] = formato or os.environ.get("LOG_FORMATO", "json")
+
+    handler = ManejadorCola(queue.SimpleQueue())
+    handler.addFilter(FiltroContexto())
+    _estado["handler"] = handler
+    logger.addHandler(handler)
+    logger.setLevel(nivel)
+    logger.propagate = False
+    _iniciar_listener(_estado["formato"])
+    atexit.register(detener)
+    return logger
+
+
+def reiniciar_tras_fork():
+    """El hilo escritor no sobrevive a fork(): cada worker crea el suyo con una cola nueva"""
+    if _estado["handler"] is not None and _estado["pid"] != os.getpid():
+        _iniciar_listener(_estado["formato"])
+
+
+def detener():
+    """Vacía la cola y detiene el hilo escritor"""
+    listener = _estado["listener"]
+    if listener is not None and _estado["pid"] == os.getpid():
+        _estado["listener"] = None
+        listener.stop()
+
+
+def iniciar_peticion(id_recibido=None):
+    """Fija el id y la decisión de muestreo de la petición actual; devuelve los tokens para cerrar"""
+    nuevo_id = (id_recibido or uuid.uuid4().hex[:16])[:64]
+    muestreo = _estado["muestreo"]
+    return (
+        id_peticion.set(nuevo_id),
+        _muestreada.set(muestreo >= 1.0 or random.random() < muestreo),
+    )
+
+
+def terminar_peticion(tokens):
+    token_id, token_muestreo = tokens
+    try:
+        id_peticion.reset(token_id)
+        _muestreada.reset(token_muestreo)
+    except ValueError:
+        # Token creado en otro contexto (servidor que cambia de contexto entre hooks)
+        id_peticion.set(None)
+        _muestreada.set(True)
+
+
+def id_actual():
+    return id_peticion.get()
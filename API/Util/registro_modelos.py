@@ -0,0 +1,288 @@
+# Util/registro_modelos.py
+"""
+Registro de modelos con recarga en caliente y rutas por versión.
+
+Cada archivo .pkl del directorio de modelos es una versión (id = nombre del
+archivo sin extensión). Un hilo vigila el directorio; cuando aparece o cambia
+un artefacto se carga en segundo plano, se construyen sus componentes, se
+calienta y solo entonces se publica de forma atómica. La versión anterior se
+mantiene viva hasta que terminan sus peticiones en curso.
+
+Los componentes de cada modelo se registran con la clave "nombre@version:etiqueta",
+así las peticiones resuelven la clave una sola vez y la usan hasta el final.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from Util.arranque import memoria_proceso
+
+log = logging.getLogger("api.modelos")
+
+
+class VersionModelos:
+    def __init__(self, id, ruta, firma, revision):
+        self.id = id
+        self.ruta = ruta
+        self.firma = firma
+        self.revision = revision
+        # Etiqueta derivada del archivo: igual en todos los workers (claves de la caché en disco)
+        self.etiqueta = hashlib.sha1(firma.encode()).hexdigest()[:8]
+        self.modelos = {}
+        self.cargado_en = None
+        self.duracion_carga_ms = None
+        self.memoria_mb = None
+        self.en_curso = 0
+        self.peticiones = {}
+        self.retirada = False
+        self.liberada = False
+
+    def clave(self, nombre):
+        return f"{nombre}@{self.id}:{self.etiqueta}"
+
+    def claves(self):
+        return [self.clave(nombre) for nombre in self.modelos]
+
+    def estadisticas(self):
+        return {
+            "version": self.id,
+            "revision": self.revision,
+            "etiqueta": self.etiqueta,
+            "ruta": self.ruta,
+            "modelos": sorted(self.modelos),
+            "cargado_en": self.cargado_en,
+            "duracion_carga_ms": self.duracion_carga_ms,
+            "memoria_mb": self.memoria_mb,
+            "en_curso": self.en_curso,
+            "peticiones": dict(self.peticiones),
+            "retirada": self.retirada,
+        }
+
+
+class RegistroModelos:
+    """
+    cargar(ruta) -> dict de modelos; al_registrar(version) construye sus componentes;
+    calentar(version) ejecuta inferencias de prueba; al_retirar(version) los libera.
+    """
+
+    def __init__(self, directorio, cargar, al_registrar, al_retirar, calentar=None,
+                 extension=".pkl", intervalo_segundos=5.0, max_versiones=2):
+        self.directorio = directorio
+        self.cargar = cargar
+        self.al_registrar = al_registrar
+        self.al_retirar = al_retirar
+        self.calentar = calentar
+        self.extension = extension
+        self.intervalo = intervalo_segundos
+        self.max_versiones = max_versiones
+
+        self._lock = threading.Lock()
+        self._lock_recarga = threading.Lock()
+        self._versiones = {}
+        self._por_clave = {}
+        self._retiradas = []
+        self._activa = None
+        self._revision = 0
+        self._vigilancia_pid = None
+        self.recargas = 0
+        self.errores_recarga = 0
+        self.ultimo_error = None
+
+    # ---------------------------------------------------------------- carga
+    def _escanear(self):
+        """{id: (ruta, firma, mtime)} de los artefactos más recientes (hasta max_versiones)"""
+        artefactos = []
+        for nombre in os.listdir(self.directorio):
+            if not nombre.endswith(self.extension):
+                continue
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                st = os.stat(ruta)
+            except OSError:
+                continue
+            artefactos.append((st.st_mtime_ns, nombre[:-len(self.extension)], ruta, f"{st.st_size}-{st.st_mtime_ns}"))
+        artefactos.sort(reverse=True)
+        return {id: (ruta, firma, mtime) for mtime, id, ruta, firma in artefactos[:self.max_versiones]}
+
+    def _cargar_version(self, id, ruta, firma, calentar):
+        with self._lock:
+            self._revision += 1
+            revision = self._revision
+        version = VersionModelos(id, ruta, firma, revision)
+        memoria_antes = memoria_proceso().get("rss_mb")
+        inicio = time.perf_counter()
+        version.modelos = self.cargar(ruta)
+        try:
+            self.al_registrar(version)
+            if calentar and self.calentar is not None:
+                self.calentar(version)
+        except Exception:
+            # Componentes a medio construir: nunca llegaron a publicarse
+            self.al_retirar(version)
+            raise
+        version.duracion_carga_ms = round((time.perf_counter() - inicio) * 1000, 1)
+        memoria_despues = memoria_proceso().get("rss_mb")
+        if memoria_antes is not None and memoria_despues is not None:
+            version.memoria_mb = round(memoria_despues - memoria_antes, 1)
+        version.cargado_en = time.time()
+        return version
+
+    def cargar_inicial(self):
+        """Carga síncrona al iniciar (el calentamiento general lo hace la app)"""
+        encontrados = self._escanear()
+        if not encontrados:
+            raise FileNotFoundError(f"No hay artefactos {self.extension} en {self.directorio}")
+        self.sincronizar(encontrados, calentar=False)
+
+    def sincronizar(self, encontrados=None, calentar=True):
+        """Carga artefactos nuevos o modificados y retira los que ya no están"""
+        with self._lock_recarga:
+            if encontrados is None:
+                encontrados = self._escanear()
+            for id, (ruta, firma, _) in encontrados.items():
+                actual = self._versiones.get(id)
+                if actual is not None and actual.firma == firma:
+                    continue
+                try:
+                    nueva = self._cargar_version(id, ruta, firma, calentar)
+                except Exception as e:
+                    self.errores_recarga += 1
+                    self.ultimo_error = f"{id}: {e}"
+                    log.exception("❌ Error cargando la versión %s", id)
+                    continue
+                with self._lock:
+                    anterior = self._versiones.get(id)
+                    self._versiones[id] = nueva
+                    for clave in nueva.claves():
+                        self._por_clave[clave] = nueva
+                    self.recargas += 1
+                if anterior is not None:
+                    self._retirar(anterior)
+                log.info("🔄 Versión %s (r%s) publicada en %s ms", id, nueva.revision, nueva.duracion_carga_ms)
+
+            with self._lock:
+                desaparecidas = [v for id, v in self._versiones.items() if id not in encontrados]
+                if len(desaparecidas) == len(self._versiones):
+                    # Ningún artefacto nuevo pudo cargarse: se sigue sirviendo lo que había
+                    desaparecidas = []
+                for v in desaparecidas:
+                    del self._versiones[v.id]
+                # Activa: la más reciente de las que siguen en disco; si no queda ninguna, la que ya lo era
+                presentes = [id for id in self._versiones if id in encontrados]
+                if presentes:
+                    self._activa = max(presentes, key=lambda id: encontrados[id][2])
+                elif self._activa not in self._versiones:
+                    self._activa = next(iter(self._versiones), None)
+            for v in desaparecidas:
+                self._retirar(v)
+
+    def _retirar(self, version):
+        with self._lock:
+            version.retirada = True
+            self._retiradas.append(version)
+        self._liberar_si_corresponde(version)
+
+    def _liberar_si_corresponde(self, version):
+        with self._lock:
+            if not version.retirada or version.en_curso > 0 or version.liberada:
+                return
+            version.liberada = True
+            self._retiradas.remove(version)
+            for clave in version.claves():
+                self._por_clave.pop(clave, None)
+        self.al_retirar(version)
+
+    # ----------------------------------------------------------- vigilancia
+    def iniciar_vigilancia(self):
+        """Hilo que revisa el directorio cada intervalo (uno por proceso, también tras fork)"""
+        if self._vigilancia_pid == os.getpid() or self.intervalo <= 0:
+            return
+        self._vigilancia_pid = os.getpid()
+
+        def vigilar():
+            while True:
+                time.sleep(self.intervalo)
+                try:
+                    self.sincronizar()
+                except Exception as e:
+                    self.ultimo_error = str(e)
+
+        threading.Thread(target=vigilar, name="registro-modelos", daemon=True).start()
+
+    # ------------------------------------------------------------- consultas
+    def reservar(self, nombre, version=None):
+        """Resuelve nombre (+ versión opcional) a una clave y marca una petición en curso"""
+        with self._lock:
+            v = self._versiones.get(version if version is not None else self._activa)
+            if v is None or nombre not in v.modelos:
+                return None
+            v.en_curso += 1
+            v.peticiones[nombre] = v.peticiones.get(nombre, 0) + 1
+            return v.clave(nombre)
+
+    def reservar_version(self, version=None, nombres=None):
+        """
+        Reserva varios modelos de una misma versión (todos por defecto) en un solo paso.
+        Devuelve (id_version, {nombre: clave}); cada clave se libera con liberar().
+        """
+        with self._lock:
+            v = self._versiones.get(version if version is not None else self._activa)
+            if v is None:
+                return None, {}
+            claves = {}
+            for nombre in (nombres if nombres is not None else v.modelos):
+                if nombre in v.modelos:
+                    v.en_curso += 1
+                    v.peticiones[nombre] = v.peticiones.get(nombre, 0) + 1
+                    claves[nombre] = v.clave(nombre)
+            return v.id, claves
+
+    def reservar_clave(self, clave):
+        """Retiene la versión de una clave ya resuelta (p. ej. para un trabajo asíncrono)"""
+        with self._lock:
+            v = self._por_clave.get(clave)
+            if v is None:
+                return False
+            v.en_curso += 1
+            return True
+
+    def liberar(self, clave):
+        with self._lock:
+            v = self._por_clave.get(clave)
+            if v is None:
+                return
+            v.en_curso -= 1
+        self._liberar_si_corresponde(v)
+
+    @contextmanager
+    def usar(self, nombre, version=None):
+        clave = self.reservar(nombre, version)
+        try:
+            yield clave
+        finally:
+            if clave is not None:
+                self.liberar(clave)
+
+    def version_de(self, clave):
+        with self._lock:
+            v = self._por_clave.get(clave)
+            return v.id if v is not None else None
+
+    def version_activa(self):
+        with self._lock:
+            return self._versiones.get(self._activa)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "directorio": self.directorio,
+                "activa": self._activa,
+                "versiones": [v.estadisticas() for v in self._versiones.values()],
+                "retiradas_pendientes": [v.estadisticas() for v in self._retiradas],
+                "recargas": self.recargas,
+                "errores_recarga": self.errores_recarga,
+                "ultimo_error": self.ultimo_error,
+            }
@@ -0,0 +1,147 @@
+# Util/respuestas.py
+"""
+Capa de respuesta de las rutas de predicción: selección de campos, JSON rápido
+y compresión negociada.
+
+Perfiles ("perfil" en la petición):
+    minimo    predicción, probabilidad, duración y sugerencia principal; no se
+              calcula la explicación ni el gráfico
+    estandar  sin PNG (el gráfico va como datos), sin mensaje_explicativo ni
+              sugerencias_duracion, y reglas solo de la clase predicha (las
+              claves de reglas_por_clase son índices de clase, no etiquetas)
+    completo  la respuesta de siempre
+"campos" (o "fields") elige campos de primer nivel y tiene prioridad sobre el perfil.
+
+serializar() usa orjson si está instalado (NumPy nativo, UTF-8, sin espacios) y
+si no json con un conversor de tipos NumPy. comprimir() aplica brotli (si está
+instalado) o gzip según Accept-Encoding a partir de un tamaño mínimo.
+"""
+import gzip
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PERFILES = ("minimo", "estandar", "completo")
+CAMPOS_MINIMO = (
+    "prediccion", "probabilidad", "duracion_meses_aproximada", "sugerencia_principal", "version_modelo",
+    "degradado", "degradacion", "trabajo_explicacion", "explicacion_no_disponible",
+)
+CAMPOS_SOLO_COMPLETO = ("grafico_probabilidades_base64", "mensaje_explicativo", "sugerencias_duracion")
+CAMPOS_EXPLICACION = ("reglas_por_clase", "tabla_lime", "grafico_probabilidades_base64", "explicador")
+
+TIPOS_COMPRIMIBLES = ("application/json", "application/x-ndjson", "text/plain", "text/html")
+
+
+def validar_seleccion(perfil, campos):
+    """Mensaje de error si 'perfil' o 'campos' no son válidos; None si lo son"""
+    if perfil not in PERFILES:
+        return f"Valor de 'perfil' no válido; use uno de {list(PERFILES)}"
+    if campos is not None and (not isinstance(campos, list) or not all(isinstance(c, str) for c in campos)):
+        return "'campos' debe ser una lista de nombres de campo"
+    return None
+
+
+def leer_campos(valor):
+    """'a,b' (query string) o lista -> lista; None si no se pidió"""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, str):
+        return [c.strip() for c in valor.split(",") if c.strip()]
+    return valor
+
+
+def requiere_explicacion(perfil, campos):
+    if campos is not None:
+        return any(c in CAMPOS_EXPLICACION for c in campos)
+    return perfil != "minimo"
+
+
+def grafico_para_perfil(grafico, perfil, campos):
+    """El PNG solo se genera si el perfil o los campos lo incluyen"""
+    if grafico != "imagen":
+        return grafico
+    if campos is not None:
+        return "imagen" if "grafico_probabilidades_base64" in campos else "datos"
+    return "imagen" if perfil == "completo" else "datos"
+
+
+def indice_clase(prediccion, clases):
+    """Clave de reglas_por_clase de la clase predicha: su índice en classes_ como texto, o None"""
+    etiquetas = [str(c) for c in clases] if clases is not None else []
+    return str(etiquetas.index(str(prediccion))) if str(prediccion) in etiquetas else None
+
+
+def aplicar_seleccion(cuerpo, perfil, campos, clases=None):
+    """
+    Recorta una respuesta de /predict (o un resultado de lote) según perfil/campos.
+    clases: classes_ del modelo, para ubicar el índice de la clase predicha en reglas_por_clase.
+    """
+    if not isinstance(cuerpo, dict) or "error" in cuerpo:
+        return cuerpo
+    if campos is not None:
+        return {c: cuerpo[c] for c in campos if c in cuerpo}
+    if perfil == "minimo":
+        return {c: cuerpo[c] for c in CAMPOS_MINIMO if c in cuerpo}
+    if perfil == "estandar":
+        recortado = {c: v for c, v in cuerpo.items() if c not in CAMPOS_SOLO_COMPLETO}
+        reglas = recortado.get("reglas_por_clase")
+        if reglas is not None:
+            indice = indice_clase(cuerpo.get("prediccion"), clases)
+            recortado["reglas_por_clase"] = {indice: reglas[indice]} if indice in reglas else {}
+        return recortado
+    return cuerpo
+
+
+def _convertir_numpy(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def serializar(cuerpo):
+    """bytes UTF-8 del JSON compacto del cuerpo"""
+    if orjson is not None:
+        return orjson.dumps(
+            cuerpo, default=_convertir_numpy, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(cuerpo, ensure_ascii=False, separators=(",", ":"), default=_convertir_numpy).encode("utf-8")
+
+
+def _aceptadas(accept_encoding):
+    """{'gzip': q, 'br': q} a partir de la cabecera Accept-Encoding"""
+    aceptadas = {}
+    for parte in (accept_encoding or "").split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        q = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                q = float(parametros.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if nombre:
+            aceptadas[nombre.lower()] = q
+    return aceptadas
+
+
+def comprimir(datos, accept_encoding, minimo_bytes=1024, nivel_gzip=6, nivel_brotli=4):
+    """Devuelve (datos, codificación) con codificación None si no se comprime"""
+    if len(datos) < minimo_bytes:
+        return datos, None
+    aceptadas = _aceptadas(accept_encoding)
+    if brotli is not None and aceptadas.get("br", 0) > 0:
+        return brotli.compress(datos, quality=nivel_brotli), "br"
+    if aceptadas.get("gzip", 0) > 0:
+        return gzip.compress(datos, compresslevel=nivel_gzip), "gzip"
+    return datos, None
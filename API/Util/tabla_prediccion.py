@@ -0,0 +1,279 @@
+# Util/tabla_prediccion.py
+"""
+Tabla de predicciones precalculada sobre el espacio discreto de entrada.
+
+Los árboles solo comparan cada feature contra sus umbrales de división, así que
+entre dos umbrales consecutivos la salida del ensamble es constante. Para cada
+feature se enumeran esas celdas (o los estados del grupo one-hot exclusivo) y se
+guarda predict_proba de un representante por celda en un .npy mapeado en memoria.
+
+Uso (desde la carpeta API):
+    python -m Util.tabla_prediccion construir
+    python -m Util.tabla_prediccion verificar --muestras 5000
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from Util.codificador import GRUPOS_ONE_HOT, CAMPOS_NUMERICOS
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELO_PATH = os.path.join(BASE_DIR, "model", "modelos_experimento_B.pkl")
+TABLAS_DIR = os.path.join(BASE_DIR, "model", "tablas")
+
+# Límite de tamaño de la tabla por modelo (en MB) para no generar archivos inviables
+MAX_MB_TABLA = 512
+TAMANO_BLOQUE = 65536
+
+
+def firma_archivo(ruta):
+    """SHA-256 del archivo del modelo, para invalidar tablas obsoletas"""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def arboles_del_modelo(modelo):
+    """Devuelve la lista plana de árboles de un ensamble de sklearn"""
+    if hasattr(modelo, "tree_"):
+        return [modelo]
+    estimadores = getattr(modelo, "estimators_", None)
+    if estimadores is None:
+        raise ValueError(f"El modelo {type(modelo).__name__} no es un ensamble de árboles")
+    return [arbol for arbol in np.asarray(estimadores, dtype=object).ravel()]
+
+
+def umbrales_por_feature(modelo, n_features):
+    """Umbrales de división únicos (ordenados) que usan los árboles para cada feature"""
+    umbrales = [set() for _ in range(n_features)]
+    for arbol in arboles_del_modelo(modelo):
+        t = arbol.tree_
+        internos = t.children_left != -1
+        for f, thr in zip(t.feature[internos].tolist(), t.threshold[internos].tolist()):
+            umbrales[f].add(thr)
+    return [np.array(sorted(u), dtype=np.float64) for u in umbrales]
+
+
+def representantes_celdas(umbrales):
+    """Un valor por celda: (-inf, u0], (u0, u1], ..., (uk, inf)"""
+    if umbrales.size == 0:
+        return np.array([0.0])
+    medios = (umbrales[:-1] + umbrales[1:]) / 2
+    return np.concatenate([[umbrales[0] - 1.0], medios, [umbrales[-1] + 1.0]])
+
+
+class TablaPrediccion:
+    """
+    Tabla de probabilidades por celda para un modelo.
+
+    Ejes:
+      - ("grupo", columnas): grupo one-hot exclusivo, el estado es la columna activa
+      - ("umbral", columna, umbrales): celda según los umbrales de los árboles
+    """
+
+    def __init__(self, used_features, clases, ejes, tabla):
+        self.used_features = list(used_features)
+        self.clases = np.asarray(clases)
+        self.ejes = ejes
+        self.forma = tuple(self._tamano_eje(eje) for eje in ejes)
+        self.tabla = tabla
+
+    @staticmethod
+    def _tamano_eje(eje):
+        if eje[0] == "grupo":
+            return len(eje[1])
+        return len(eje[2]) + 1
+
+    @classmethod
+    def definir_ejes(cls, modelo, used_features):
+        """Agrupa los one-hot exclusivos y discretiza el resto por umbrales"""
+        indice = {nombre: i for i, nombre in enumerate(used_features)}
+        umbrales = umbrales_por_feature(modelo, len(used_features))
+        ejes = []
+        en_grupo = set()
+        for columnas, _, exclusivo in GRUPOS_ONE_HOT.values():
+            if exclusivo and all(c in indice for c in columnas):
+                ejes.append(("grupo", [indice[c] for c in columnas]))
+                en_grupo.update(columnas)
+        for nombre in used_features:
+            if nombre not in en_grupo:
+                j = indice[nombre]
+                ejes.append(("umbral", j, umbrales[j]))
+        return ejes
+
+    def celdas(self, X):
+        """
+        Índice plano de celda para cada fila de X y máscara de filas representables
+        (las filas con grupos exclusivos no one-hot deben ir al modelo).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        validos = np.ones(X.shape[0], dtype=bool)
+        indices = []
+        for eje in self.ejes:
+            if eje[0] == "grupo":
+                sub = X[:, eje[1]]
+                validos &= (sub.sum(axis=1) == 1) & ((sub == 0) | (sub == 1)).all(axis=1)
+                indices.append(sub.argmax(axis=1))
+            else:
+                # sklearn compara el valor en float32 contra el umbral: izquierda si x <= umbral
+                valores = X[:, eje[1]].astype(np.float32).astype(np.float64)
+                indices.append(np.searchsorted(eje[2], valores, side="left"))
+        return np.ravel_multi_index(indices, self.forma), validos
+
+    def consultar(self, X):
+        """Devuelve (probabilidades, validos); las filas no válidas quedan en cero"""
+        planos, validos = self.celdas(X)
+        probas = np.zeros((len(planos), len(self.clases)), dtype=np.float64)
+        probas[validos] = self.tabla[planos[validos]]
+        return probas, validos
+
+    def filas_representantes(self, planos):
+        """Construye la matriz de entrada representante de cada celda"""
+        coords = np.unravel_index(planos, self.forma)
+        X = np.zeros((len(planos), len(self.used_features)), dtype=np.float64)
+        for eje, coord in zip(self.ejes, coords):
+            if eje[0] == "grupo":
+                X[np.arange(len(planos)), np.asarray(eje[1])[coord]] = 1.0
+            else:
+                X[:, eje[1]] = representantes_celdas(eje[2])[coord]
+        return X
+
+    @classmethod
+    def construir(cls, nombre, modelo, used_features, ruta_base, firma=""):
+        """Enumera todas las celdas, evalúa el modelo por bloques y guarda la tabla"""
+        ejes = cls.definir_ejes(modelo, used_features)
+        plantilla = cls(used_features, modelo.classes_, ejes, None)
+        n_celdas = int(np.prod(plantilla.forma, dtype=np.int64))
+        tamano_mb = n_celdas * len(modelo.classes_) * 4 / 1e6
+        if tamano_mb > MAX_MB_TABLA:
+            raise ValueError(
+                f"La tabla de {nombre} ocuparía {tamano_mb:.0f} MB ({n_celdas} celdas), "
+                f"supera el límite de {MAX_MB_TABLA} MB"
+            )
+
+        print(f"🧮 {nombre}: {n_celdas} celdas, forma {plantilla.forma}, {tamano_mb:.1f} MB")
+        tabla = np.lib.format.open_memmap(
+            ruta_base + ".npy", mode="w+", dtype=np.float32, shape=(n_celdas, len(modelo.classes_))
+        )
+        for inicio in range(0, n_celdas, TAMANO_BLOQUE):
+            planos = np.arange(inicio, min(inicio + TAMANO_BLOQUE, n_celdas))
+            tabla[planos] = modelo.predict_proba(plantilla.filas_representantes(planos))
+        tabla.flush()
+
+        metadatos = {
+            "modelo": nombre,
+            "firma_modelo": firma,
+            "used_features": list(used_features),
+            "clases": [c.item() if hasattr(c, "item") else c for c in modelo.classes_],
+            "ejes": [
+                {"tipo": "grupo", "columnas": eje[1]} if eje[0] == "grupo"
+                else {"tipo": "umbral", "columna": eje[1], "umbrales": eje[2].tolist()}
+                for eje in ejes
+            ],
+        }
+        with open(ruta_base + ".json", "w") as f:
+            json.dump(metadatos, f)
+        return cls.cargar(ruta_base)
+
+    @classmethod
+    def cargar(cls, ruta_base, firma=None):
+        """Abre la tabla mapeada en memoria; devuelve None si falta o está obsoleta"""
+        if not (os.path.exists(ruta_base + ".npy") and os.path.exists(ruta_base + ".json")):
+            return None
+        with open(ruta_base + ".json") as f:
+            metadatos = json.load(f)
+        if firma is not None and metadatos.get("firma_modelo") != firma:
+            return None
+        ejes = [
+            ("grupo", eje["columnas"]) if eje["tipo"] == "grupo"
+            else ("umbral", eje["columna"], np.array(eje["umbrales"], dtype=np.float64))
+            for eje in metadatos["ejes"]
+        ]
+        tabla = np.load(ruta_base + ".npy", mmap_mode="r")
+        return cls(metadatos["used_features"], metadatos["clases"], ejes, tabla)
+
+
+def cargar_tablas(modelos, modelo_path=MODELO_PATH, tablas_dir=TABLAS_DIR):
+    """Carga las tablas vigentes de cada modelo (las ausentes u obsoletas se omiten)"""
+    firma = firma_archivo(modelo_path)
+    tablas = {}
+    for nombre in modelos:
+        tabla = TablaPrediccion.cargar(os.path.join(tablas_dir, nombre), firma=firma)
+        if tabla is not None:
+            tablas[nombre] = tabla
+    return tablas
+
+
+def muestras_aleatorias(tabla, n, rng):
+    """Filas aleatorias válidas: estados one-hot al azar y numéricos alrededor de los umbrales"""
+    X = np.zeros((n, len(tabla.used_features)), dtype=np.float64)
+    for eje in tabla.ejes:
+        if eje[0] == "grupo":
+            X[np.arange(n), np.asarray(eje[1])[rng.integers(0, len(eje[1]), n)]] = 1.0
+        elif tabla.used_features[eje[1]] in CAMPOS_NUMERICOS:
+            tope = (eje[2][-1] if eje[2].size else 10.0) + 5
+            X[:, eje[1]] = rng.integers(0, int(tope) + 1, n)
+        else:
+            X[:, eje[1]] = rng.integers(0, 2, n)
+    return X
+
+
+def _obtener_used_features(modelos, nombre):
+    respaldo = modelos["random_forest"].used_features if "random_forest" in modelos else None
+    return getattr(modelos[nombre], "used_features", None) or respaldo
+
+
+def main():
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Tablas de predicción precalculadas")
+    parser.add_argument("accion", choices=["construir", "verificar"])
+    parser.add_argument("--modelo-path", default=MODELO_PATH)
+    parser.add_argument("--tablas-dir", default=TABLAS_DIR)
+    parser.add_argument("--muestras", type=int, default=2000)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    modelos = joblib.load(args.modelo_path)
+    firma = firma_archivo(args.modelo_path)
+    os.makedirs(args.tablas_dir, exist_ok=True)
+    correcto = True
+
+    for nombre, modelo in modelos.items():
+        ruta_base = os.path.join(args.tablas_dir, nombre)
+        used = _obtener_used_features(modelos, nombre)
+
+        if args.accion == "construir":
+            try:
+                TablaPrediccion.construir(nombre, modelo, used, ruta_base, firma=firma)
+                print(f"✅ Tabla de {nombre} guardada en {ruta_base}.npy")
+            except ValueError as e:
+                print(f"⚠️ {e}")
+            continue
+
+        tabla = TablaPrediccion.cargar(ruta_base, firma=firma)
+        if tabla is None:
+            print(f"⚠️ {nombre}: no hay tabla vigente para este modelo")
+            correcto = False
+            continue
+        X = muestras_aleatorias(tabla, args.muestras, np.random.default_rng(args.semilla))
+        esperado = modelo.predict_proba(X)
+        obtenido, validos = tabla.consultar(X)
+        error_max = float(np.abs(esperado - obtenido).max())
+        coincidencia = float((esperado.argmax(axis=1) == obtenido.argmax(axis=1)).mean())
+        ok = bool(validos.all()) and error_max < 1e-5
+        correcto &= ok
+        print(f"{'✅' if ok else '❌'} {nombre}: error máximo {error_max:.2e}, "
+              f"coincidencia de clase {coincidencia:.2%} en {args.muestras} muestras")
+
+    if not correcto:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
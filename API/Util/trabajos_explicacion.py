@@ -0,0 +1,139 @@
+# Util/trabajos_explicacion.py
+"""
+Trabajos de explicación asíncronos.
+
+/predict responde enseguida con la clase y las probabilidades; LIME, el gráfico
+y las reglas se calculan en un pool acotado y el frontend los recoge en
+/explain/<id> (consulta o SSE).
+"""
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ColaLlena(Exception):
+    """No hay espacio en la cola de explicaciones"""
+
+
+class Trabajo:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.estado = "pendiente"
+        self.resultado = None
+        self.error = None
+        self.creado = time.time()
+        self.iniciado = None
+        self.terminado = None
+        self.listo = threading.Event()
+
+    def a_diccionario(self):
+        datos = {"id": self.id, "estado": self.estado}
+        if self.estado == "completado":
+            datos["resultado"] = self.resultado
+        elif self.estado == "error":
+            datos["error"] = self.error
+        if self.terminado is not None:
+            datos["latencia_ms"] = round((self.terminado - self.creado) * 1000, 1)
+        return datos
+
+
+class GestorTrabajos:
+    """Pool de workers con cola acotada, expiración de resultados y métricas"""
+
+    def __init__(self, max_workers=2, max_pendientes=64, ttl_segundos=600, ventana_metricas=1000):
+        self.max_workers = max_workers
+        self.max_pendientes = max_pendientes
+        self.ttl = ttl_segundos
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="explicacion")
+        self._trabajos = {}
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._en_curso = 0
+        self._espera_ms = deque(maxlen=ventana_metricas)
+        self._total_ms = deque(maxlen=ventana_metricas)
+        self.completados = 0
+        self.errores = 0
+        self.rechazados = 0
+
+    def enviar(self, funcion, *args, **kwargs):
+        """Encola funcion(*args) y devuelve el id del trabajo; lanza ColaLlena si no cabe"""
+        with self._lock:
+            self._purgar()
+            if self._pendientes >= self.max_pendientes:
+                self.rechazados += 1
+                raise ColaLlena()
+            trabajo = Trabajo()
+            self._trabajos[trabajo.id] = trabajo
+            self._pendientes += 1
+        self._pool.submit(self._ejecutar, trabajo, funcion, args, kwargs)
+        return trabajo.id
+
+    def _ejecutar(self, trabajo, funcion, args, kwargs):
+        with self._lock:
+            self._pendientes -= 1
+            self._en_curso += 1
+        trabajo.iniciado = time.time()
+        trabajo.estado = "en_curso"
+        try:
+            trabajo.resultado = funcion(*args, **kwargs)
+            trabajo.estado = "completado"
+        except Exception as e:
+            trabajo.error = str(e)
+            trabajo.estado = "error"
+        trabajo.terminado = time.time()
+        with self._lock:
+            self._en_curso -= 1
+            if trabajo.estado == "completado":
+                self.completados += 1
+            else:
+                self.errores += 1
+            self._espera_ms.append((trabajo.iniciado - trabajo.creado) * 1000)
+            self._total_ms.append((trabajo.terminado - trabajo.creado) * 1000)
+        trabajo.listo.set()
+
+    def _purgar(self):
+        """Elimina trabajos terminados hace más de ttl segundos (con el lock tomado)"""
+        limite = time.time() - self.ttl
+        vencidos = [i for i, t in self._trabajos.items() if t.terminado is not None and t.terminado < limite]
+        for i in vencidos:
+            del self._trabajos[i]
+
+    def obtener(self, trabajo_id):
+        with self._lock:
+            return self._trabajos.get(trabajo_id)
+
+    def esperar(self, trabajo_id, timeout=None):
+        """Bloquea hasta que el trabajo termine (o venza el timeout) y lo devuelve"""
+        trabajo = self.obtener(trabajo_id)
+        if trabajo is not None:
+            trabajo.listo.wait(timeout)
+        return trabajo
+
+    @staticmethod
+    def _percentiles(valores):
+        if not valores:
+            return {"p50": None, "p95": None, "max": None}
+        ordenados = sorted(valores)
+        n = len(ordenados)
+        return {
+            "p50": round(ordenados[int(0.50 * (n - 1))], 1),
+            "p95": round(ordenados[int(0.95 * (n - 1))], 1),
+            "max": round(ordenados[-1], 1),
+        }
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pendientes": self.max_pendientes,
+                "profundidad_cola": self._pendientes,
+                "en_curso": self._en_curso,
+                "trabajos_retenidos": len(self._trabajos),
+                "completados": self.completados,
+                "errores": self.errores,
+                "rechazados": self.rechazados,
+                "espera_en_cola_ms": self._percentiles(list(self._espera_ms)),
+                "latencia_total_ms": self._percentiles(list(self._total_ms)),
+            }
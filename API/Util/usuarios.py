@@ -0,0 +1,123 @@
+# Util/usuarios.py
+"""
+Almacén de usuarios en un archivo SQLite local.
+
+Cada alta o actualización es una sola fila (INSERT/UPDATE), así que el coste
+de escritura no crece con el número de usuarios. SQLite coordina los workers
+(modo WAL: los lectores no bloquean al escritor) y cada hilo usa su propia
+conexión, recreada tras un fork.
+
+El users.json de versiones anteriores se importa al abrir el almacén y se
+vuelve a importar cuando cambia (tamaño o fecha de modificación, revisado cada
+intervalo_json segundos): sus usuarios reemplazan a los de la base con el mismo
+email y el resto se conserva. Una base ya poblada sin registro de importación
+(creada antes de este seguimiento) toma el archivo actual como ya importado.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger("api.usuarios")
+
+
+class AlmacenUsuarios:
+    def __init__(self, ruta, importar_desde=None, timeout_segundos=5.0, intervalo_json=5.0):
+        self.ruta = ruta
+        self.timeout = timeout_segundos
+        self.ruta_json = importar_desde
+        self.intervalo_json = intervalo_json
+        self._ultimo_chequeo = time.monotonic()
+        self._local = threading.local()
+        with self._conexion() as conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS usuarios (email TEXT PRIMARY KEY, datos TEXT NOT NULL)"
+            )
+            conexion.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT NOT NULL)")
+        if importar_desde is not None:
+            self._importar_json(importar_desde)
+
+    def _conexion(self):
+        """Conexión propia del hilo (y del proceso: no se comparten conexiones tras un fork)"""
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=self.timeout)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+            self._local.pid = os.getpid()
+        return conexion
+
+    def _importar_json(self, ruta_json):
+        """Importa users.json si cambió desde la última importación (la firma queda en la tabla meta)"""
+        try:
+            st = os.stat(ruta_json)
+        except OSError:
+            return
+        firma = f"{st.st_size}-{st.st_mtime_ns}"
+        conexion = self._conexion()
+        with conexion:
+            # BEGIN IMMEDIATE: entre workers solo uno importa cada cambio
+            conexion.execute("BEGIN IMMEDIATE")
+            fila = conexion.execute("SELECT valor FROM meta WHERE clave = 'firma_json'").fetchone()
+            if fila is not None and fila[0] == firma:
+                return
+            poblada = conexion.execute("SELECT 1 FROM usuarios LIMIT 1").fetchone() is not None
+            if fila is not None or not poblada:
+                try:
+                    with open(ruta_json, "r") as f:
+                        usuarios = json.load(f)
+                except (OSError, ValueError) as e:
+                    # Archivo a medio escribir: se reintenta en la próxima revisión
+                    log.warning("⚠️ No se pudo importar %s: %s", ruta_json, e)
+                    return
+                conexion.executemany(
+                    "INSERT INTO usuarios (email, datos) VALUES (?, ?) "
+                    "ON CONFLICT(email) DO UPDATE SET datos = excluded.datos",
+                    [(email, json.dumps(datos)) for email, datos in usuarios.items()],
+                )
+                log.info("👥 %s usuarios importados desde %s", len(usuarios), ruta_json)
+            conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('firma_json', ?)", (firma,))
+
+    def _revisar_json(self):
+        """Reimporta users.json si cambió (como mucho una revisión cada intervalo_json segundos)"""
+        if self.ruta_json is None:
+            return
+        ahora = time.monotonic()
+        if ahora - self._ultimo_chequeo < self.intervalo_json:
+            return
+        self._ultimo_chequeo = ahora
+        self._importar_json(self.ruta_json)
+
+    def obtener(self, email):
+        self._revisar_json()
+        fila = self._conexion().execute("SELECT datos FROM usuarios WHERE email = ?", (email,)).fetchone()
+        return json.loads(fila[0]) if fila is not None else None
+
+    def registrar(self, email, datos):
+        """Inserta el usuario si no existe; devuelve False si ya estaba registrado"""
+        self._revisar_json()
+        with self._conexion() as conexion:
+            cursor = conexion.execute(
+                "INSERT OR IGNORE INTO usuarios (email, datos) VALUES (?, ?)", (email, json.dumps(datos))
+            )
+            return cursor.rowcount == 1
+
+    def actualizar(self, email, datos):
+        """Actualiza campos de un usuario existente; devuelve False si no existe"""
+        conexion = self._conexion()
+        with conexion:
+            # BEGIN IMMEDIATE: lectura y escritura en la misma transacción entre procesos
+            conexion.execute("BEGIN IMMEDIATE")
+            fila = conexion.execute("SELECT datos FROM usuarios WHERE email = ?", (email,)).fetchone()
+            if fila is None:
+                return False
+            conexion.execute(
+                "UPDATE usuarios SET datos = ? WHERE email = ?", (json.dumps({**json.loads(fila[0]), **datos}), email)
+            )
+            return True
+
+    def __len__(self):
+        return self._conexion().execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
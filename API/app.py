@@ -1,329 +1,333 @@
-from flask import Flask, request, jsonify, render_template, session, redirect
-from flask_cors import CORS
 import os
+import time
+from Util.arranque import MedidorImportaciones
+
+# ARRANQUE_MEDIR_IMPORTACIONES=1: tiempo de cada módulo importado, también los diferidos (GET /arranque)
+INICIO_ARRANQUE = time.perf_counter()
+medidor_importaciones = (
+    MedidorImportaciones().instalar() if os.environ.get("ARRANQUE_MEDIR_IMPORTACIONES", "0") == "1" else None
+)
+
+from flask import Flask, request, jsonify, render_template, session, redirect, Response, stream_with_context, g
+from flask_cors import CORS
 import warnings
 import json
-import pandas as pd
 import joblib
-from werkzeug.security import generate_password_hash, check_password_hash
-import matplotlib.pyplot as plt
-import io
-import base64
 import re
-from Util.Util import plot_lime_custom, construir_tabla_lime, plot_probabilidades_clases
+import threading
+import numpy as np
+from Util.Util import plot_lime_custom, construir_tabla_lime, plot_probabilidades_clases, datos_probabilidades
 from Util.reglas_lime import convert_to_if_then
+from Util.codificador import CodificadorEntrada, CAMPO_MAPEO_COMPLETO
+from Util.duracion import generar_sugerencia_group_duration, interpretar_etiqueta_duracion
+from Util.tabla_prediccion import cargar_tablas
+from Util.cache_resultados import CacheResultados
+from Util.prediccion_rapida import crear_predict_proba_rapido
+from Util.explicador_lime import cargar_fondo, crear_explicador
+from Util.explicador_arboles import crear_explicador_arboles
+from Util.trabajos_explicacion import GestorTrabajos, ColaLlena
+from Util.micro_lotes import PlanificadorLotes
+from Util.ensamble_plano import aplanar_modelo
+from Util.registro_modelos import RegistroModelos
+from Util.barrido import definir_ejes, construir_rejilla, cambios_de_clase
+from Util.comparacion import ComparadorModelos, resumir_acuerdo
+from Util.admision import ControlAdmision, Saturado, SOLO_PREDICCION
+from Util.metricas import RegistroMetricas, InstrumentacionPeticiones, PerfiladorMuestreo, fijar_ruta
+from Util import registro_eventos
+import logging
+from Util.usuarios import AlmacenUsuarios
+from Util.arranque import memoria_proceso, registrar_estado_worker, leer_estados_workers
+from Util.contrasenas import ServicioContrasenas, ColaContrasenasLlena, TiempoContrasenaAgotado, METODO_POR_DEFECTO
+from Util import artefacto_rapido
+from Util.respuestas import (
+    validar_seleccion, leer_campos, requiere_explicacion, grafico_para_perfil, aplicar_seleccion,
+    serializar, comprimir, TIPOS_COMPRIMIBLES,
+)
+FIN_IMPORTACIONES = time.perf_counter()
 #-----------------------------------------------------------------------------------------------------
 
-def validar_entrada_modelo(entrada_mapeada):
-    """
-    Validar que al menos una categoría esté seleccionada por grupo
-    Aplica valores por defecto inteligentes para evitar configuraciones imposibles
-    """
-    print("🔧 Validando entrada del modelo...")
-    
-    # 1. Verificar actividad principal (al menos una debe estar seleccionada)
-    actividades = ['MAIN_ACTIVITY_health', 'MAIN_ACTIVITY_general_public_services']
-    actividades_seleccionadas = sum(entrada_mapeada.get(act, 0) for act in actividades)
-    
-    if actividades_seleccionadas == 0:
-        print("⚠️ No hay actividad principal seleccionada. Aplicando por defecto: Servicios públicos generales")
-        entrada_mapeada['MAIN_ACTIVITY_general_public_services'] = 1
-    elif actividades_seleccionadas > 1:
-        print("⚠️ Múltiples actividades principales seleccionadas. Manteniendo solo la primera.")
-        # Mantener solo la primera encontrada
-        primera_encontrada = False
-        for act in actividades:
-            if entrada_mapeada.get(act, 0) == 1 and not primera_encontrada:
-                primera_encontrada = True
-            elif entrada_mapeada.get(act, 0) == 1:
-                entrada_mapeada[act] = 0
-    
-    # 2. Verificar tipo de autoridad (CAE_TYPE)
-    tipos_cae = ['CAE_TYPE_3', 'CAE_TYPE_4', 'CAE_TYPE_5']
-    tipos_seleccionados = sum(entrada_mapeada.get(tipo, 0) for tipo in tipos_cae)
-    
-    if tipos_seleccionados == 0:
-        print("⚠️ No hay tipo de autoridad seleccionado. Aplicando por defecto: CAE_TYPE_4")
-        entrada_mapeada['CAE_TYPE_4'] = 1
-    elif tipos_seleccionados > 1:
-        print("⚠️ Múltiples tipos de autoridad seleccionados. Manteniendo solo el primero.")
-        primera_encontrada = False
-        for tipo in tipos_cae:
-            if entrada_mapeada.get(tipo, 0) == 1 and not primera_encontrada:
-                primera_encontrada = True
-            elif entrada_mapeada.get(tipo, 0) == 1:
-                entrada_mapeada[tipo] = 0
-    
-    # 3. Verificar grupo CPV (clasificación de actividad)
-    grupos_cpv = ['GROUP_CPV_15', 'GROUP_CPV_33', 'GROUP_CPV_45']
-    grupos_seleccionados = sum(entrada_mapeada.get(grupo, 0) for grupo in grupos_cpv)
-    
-    if grupos_seleccionados == 0:
-        print("⚠️ No hay clasificación de actividad seleccionada. Aplicando por defecto: GROUP_CPV_15")
-        entrada_mapeada['GROUP_CPV_15'] = 1
-    # Nota: Para CPV, pueden haber múltiples seleccionados (es más realista)
-    
-    # 4. Verificar país (ISO_COUNTRY_CODE)
-    paises = ['ISO_COUNTRY_CODE_lu', 'ISO_COUNTRY_CODE_si']
-    paises_seleccionados = sum(entrada_mapeada.get(pais, 0) for pais in paises)
-    
-    if paises_seleccionados == 0:
-        print("⚠️ No hay país seleccionado. Aplicando por defecto: Luxemburgo")
-        entrada_mapeada['ISO_COUNTRY_CODE_lu'] = 1
-    elif paises_seleccionados > 1:
-        print("⚠️ Múltiples países seleccionados. Manteniendo solo el primero.")
-        primera_encontrada = False
-        for pais in paises:
-            if entrada_mapeada.get(pais, 0) == 1 and not primera_encontrada:
-                primera_encontrada = True
-            elif entrada_mapeada.get(pais, 0) == 1:
-                entrada_mapeada[pais] = 0
-    
-    # 5. Validar valores numéricos
-    campos_numericos = ['NUMBER_AWARDS', 'LOTS_NUMBER', 'NUMBER_OFFERS', 'NUMBER_TENDERS_SME']
-    for campo in campos_numericos:
-        valor = entrada_mapeada.get(campo, 0)
-        if valor < 0:
-            print(f"⚠️ Valor negativo en {campo}. Estableciendo en 0.")
-            entrada_mapeada[campo] = 0
-        elif valor == 0 and campo in ['NUMBER_AWARDS', 'LOTS_NUMBER', 'NUMBER_OFFERS']:
-            print(f"⚠️ Valor 0 en {campo}. Estableciendo en 1 (mínimo realista).")
-            entrada_mapeada[campo] = 1
-    
-    # 6. Lógica de negocio: NUMBER_TENDERS_SME no puede ser mayor que NUMBER_OFFERS
-    if entrada_mapeada.get('NUMBER_TENDERS_SME', 0) > entrada_mapeada.get('NUMBER_OFFERS', 0):
-        print("⚠️ Número de ofertas PYMEs mayor que total de ofertas. Corrigiendo.")
-        entrada_mapeada['NUMBER_TENDERS_SME'] = entrada_mapeada.get('NUMBER_OFFERS', 0)
-    
-    print("✅ Validación completada")
-    return entrada_mapeada
-
-
-def generar_sugerencia_group_duration(prediccion_intervalo, probabilidades=None):
-    """Convierte intervalo de predicción en sugerencias prácticas de duración"""
-    import re
-    import numpy as np
-    
-    try:
-        # Extraer números del intervalo
-        numeros = re.findall(r"[-+]?\d*\.?\d+", prediccion_intervalo)
-        
-        if len(numeros) >= 2:
-            limite_inf = max(0, float(numeros[0]))  # No duraciones negativas
-            limite_sup = float(numeros[1])
-            
-            # Calcular opciones
-            minimo = round(limite_inf, 0)
-            promedio = round((limite_inf + limite_sup) / 2, 0)
-            maximo = round(limite_sup, 0)
-            
-            # Generar sugerencias múltiples
-            sugerencias = {
-                "opcion_recomendada": {
-                    "valor": promedio,
-                    "unidad": "meses",
-                    "descripcion": f"Duración equilibrada ({promedio} meses)",
-                    "justificacion": "Basado en el punto medio del rango predicho"
-                },
-                "alternativas": [
-                    {
-                        "tipo": "Conservadora",
-                        "valor": minimo,
-                        "unidad": "meses", 
-                        "descripcion": f"Duración mínima ({minimo} meses)",
-                        "uso_recomendado": "Para proyectos con alcance bien definido"
-                    },
-                    {
-                        "tipo": "Estándar",
-                        "valor": promedio,
-                        "unidad": "meses",
-                        "descripcion": f"Duración promedio ({promedio} meses)", 
-                        "uso_recomendado": "Para la mayoría de casos"
-                    },
-                    {
-                        "tipo": "Extendida",
-                        "valor": maximo,
-                        "unidad": "meses",
-                        "descripcion": f"Duración máxima ({maximo} meses)",
-                        "uso_recomendado": "Para proyectos complejos con incertidumbre"
-                    }
-                ],
-                "rango_original": {
-                    "minimo": limite_inf,
-                    "maximo": limite_sup,
-                    "unidad": "meses"
-                }
-            }
-            
-            # Añadir equivalencias en diferentes unidades (usando 30.4 días/mes como en tu metodología)
-            for alt in sugerencias["alternativas"]:
-                alt["equivalencias"] = {
-                    "dias": round(alt["valor"] * 30.4),  # Usar 30.4 como en tu cálculo de duración
-                    "años": round(alt["valor"] / 12, 1)
-                }
-            
-            # Añadir recomendaciones según duración
-            recomendaciones = []
-            if promedio <= 6:
-                recomendaciones = [
-                    "📋 Contrato de corta duración - definir entregables específicos",
-                    "💰 Considerar pagos por hitos",
-                    "🔄 Incluir opción de renovación si es necesario"
-                ]
-            elif promedio <= 24:
-                recomendaciones = [
-                    "📊 Incluir evaluaciones trimestrales",
-                    "💱 Considerar cláusulas de ajuste de precios",
-                    "📋 Definir procedimientos de modificación"
-                ]
-            else:
-                recomendaciones = [
-                    "🎯 Establecer hitos semestrales de evaluación",
-                    "💼 Incluir garantías de cumplimiento",
-                    "📈 Cláusulas de revisión anual"
-                ]
-                
-            sugerencias["recomendaciones_contractuales"] = recomendaciones
-            
-            # Verificar probabilidades de forma segura para arrays NumPy
-            if probabilidades is not None and hasattr(probabilidades, '__len__') and len(probabilidades) > 0:
-                try:
-                    # Convertir a lista Python si es array NumPy para evitar ambigüedad
-                    if hasattr(probabilidades, 'tolist'):
-                        probs_list = probabilidades.tolist()
-                    else:
-                        probs_list = list(probabilidades)
-                    
-                    # Ahora sí podemos usar max() sin problemas
-                    max_prob = max(probs_list)
-                    
-                    sugerencias["confianza"] = {
-                        "nivel": "Alta" if max_prob > 0.7 else "Media" if max_prob > 0.4 else "Baja",
-                        "porcentaje": f"{max_prob:.1%}",
-                        "interpretacion": "Predicción confiable" if max_prob > 0.6 else "Considerar análisis adicional"
-                    }
-                    
-                except Exception as prob_error:
-                    # Fallback para confianza
-                    sugerencias["confianza"] = {
-                        "nivel": "Media",
-                        "porcentaje": "N/A",
-                        "interpretacion": "Error calculando confianza"
-                    }
-            else:
-                sugerencias["confianza"] = {
-                    "nivel": "Media",
-                    "porcentaje": "N/A", 
-                    "interpretacion": "Probabilidades no disponibles"
-                }
-            
-            return sugerencias
-            
-        else:
-            # Fallback si no se puede parsear el intervalo
-            return {
-                "opcion_recomendada": {
-                    "valor": 12,
-                    "unidad": "meses",
-                    "descripcion": "Duración estándar por defecto",
-                    "justificacion": "No se pudo determinar el rango específico"
-                }
-            }
-            
-    except Exception as e:
-        return {
-            "opcion_recomendada": {
-                "valor": 12,
-                "unidad": "meses", 
-                "descripcion": "Duración estándar por defecto",
-                "justificacion": "Error en el procesamiento de la predicción"
-            }
-        }
-
+# Logging con niveles, asíncrono y en JSON (LOG_NIVEL, LOG_MUESTREO, LOG_FORMATO)
+log = registro_eventos.configurar_registro()
 
 #-------------------------------------------------------------------------------------------
 warnings.filterwarnings("ignore", category=FutureWarning)
+# El modelo recibe matrices NumPy ya ordenadas según used_features
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
 
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:8000"], supports_credentials=True)
 
 app.secret_key = 'clave_super_segura_para_session'
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODELO_PATH = os.path.join(BASE_DIR, "model", "modelos_experimento_B.pkl")
+MODELOS_DIR = os.environ.get("MODELOS_DIR", os.path.join(BASE_DIR, "model"))
 USUARIOS_PATH = os.path.join(BASE_DIR, "users.json")
+USUARIOS_DB = os.environ.get("USUARIOS_DB", os.path.join(BASE_DIR, "users.db"))
+
+# Componentes por modelo y versión, con claves "nombre@version:etiqueta" (Util/registro_modelos.py).
+# Los rellena el registro al cargar cada artefacto y los vacía al retirarlo.
+modelos = {}
+codificadores = {}
+predictores_rapidos = {}
+planificadores = {}
+explicadores_lime = {}
+fondos_lime = {}
+explicadores_arboles = {}
+tablas_prediccion = {}
 
-# Cargar modelos
-modelos = joblib.load(MODELO_PATH)
-used_features = modelos['random_forest'].used_features
-clases = modelos['random_forest'].classes_
-
-print("✅ Modelos cargados correctamente")
-print(f"📊 Features disponibles: {len(used_features)}")
-print(f"🎯 Clases del modelo: {len(clases)}")
-
-# Mapeo completo de nombres frontend a backend
-CAMPO_MAPEO_COMPLETO = {
-    "MULTIPLE_CONTRACTING": "B_MULTIPLE_CAE_n",
-    "ACTING_ON_BEHALF": "B_ON_BEHALF_n",
-    "WORKS_CONTRACT": "TYPE_OF_CONTRACT_w",
-    "ISO_COUNTRY_CODE_SI": "ISO_COUNTRY_CODE_si",
-    "ISO_COUNTRY_CODE_LU": "ISO_COUNTRY_CODE_lu",
-    "NUMBER_OF_CONTRACTS": "NUMBER_AWARDS",
-    "NUMBER_OF_LOTS": "LOTS_NUMBER",
-    "NUMBER_OF_OFFERS": "NUMBER_OFFERS",
-    "NUMBER_OFFERS_SME": "NUMBER_TENDERS_SME",
-    "MAIN_ACTIVITY_health": "MAIN_ACTIVITY_health",
-    "MAIN_ACTIVITY_general_public_services": "MAIN_ACTIVITY_general_public_services",
-    "CAE_TYPE_3": "CAE_TYPE_3",
-    "CAE_TYPE_4": "CAE_TYPE_4",
-    "CAE_TYPE_5": "CAE_TYPE_5",
-    "GROUP_CPV_15": "GROUP_CPV_15",
-    "GROUP_CPV_33": "GROUP_CPV_33",
-    "GROUP_CPV_45": "GROUP_CPV_45",
+# predict_proba sin pandas (float32 C-contiguo) para inferencia y lotes de LIME;
+# con ENSAMBLE_PLANO=1 se usa el evaluador de árboles aplanado cuando el modelo lo admite
+USAR_ENSAMBLE_PLANO = os.environ.get("ENSAMBLE_PLANO", "0") == "1"
+
+# Micro-lotes: agrupa las llamadas concurrentes al modelo (MICROLOTES=1)
+USAR_MICROLOTES = os.environ.get("MICROLOTES", "0") == "1"
+
+# Número de muestras perturbadas por explicación LIME
+LIME_NUM_SAMPLES = int(os.environ.get("LIME_NUM_SAMPLES", "5000"))
+
+# Método de explicación: LIME (muestreo) o "arboles" (contribuciones exactas por camino de decisión)
+EXPLICADORES = ("lime", "arboles")
+EXPLICADOR_POR_DEFECTO = os.environ.get("EXPLICADOR", "lime")
+
+# Respuestas: perfil por defecto (minimo | estandar | completo) y tamaño mínimo para comprimir
+PERFIL_POR_DEFECTO = os.environ.get("RESPUESTA_PERFIL", "completo")
+COMPRESION_MIN_BYTES = int(os.environ.get("COMPRESION_MIN_BYTES", "1024"))
+
+# Modo opcional: tablas de predicción precalculadas (python -m Util.tabla_prediccion construir)
+USAR_TABLAS_PREDICCION = os.environ.get("USAR_TABLAS_PREDICCION", "0") == "1"
+
+def crear_planificador(clave):
+    return PlanificadorLotes(
+        predictores_rapidos[clave],
+        ventana_ms=float(os.environ.get("MICROLOTE_VENTANA_MS", "2")),
+        max_lote=int(os.environ.get("MICROLOTE_MAX", "64")),
+        nombre=clave,
+    )
+
+def reiniciar_tras_fork():
+    """Los hilos no sobreviven a fork(): cada worker recrea sus planificadores, el vigilante de modelos y el escritor de logs"""
+    registro_eventos.reiniciar_tras_fork()
+    if USAR_MICROLOTES:
+        for clave in list(predictores_rapidos):
+            planificadores[clave] = crear_planificador(clave)
+    registro_modelos.iniciar_vigilancia()
+
+# Arranque rápido (ARRANQUE_RAPIDO=1): artefacto sin compresión validado por checksum
+# (Util/artefacto_rapido.py), calentamiento sin LIME ni PNG; lime y matplotlib se importan
+# en la primera petición que los necesita
+ARRANQUE_RAPIDO = os.environ.get("ARRANQUE_RAPIDO", "0") == "1"
+estado_arranque = {
+    "modo_rapido": ARRANQUE_RAPIDO,
+    "importaciones_ms": round((FIN_IMPORTACIONES - INICIO_ARRANQUE) * 1000, 1),
+    "artefactos": {},
 }
 
-# Funciones de gestión de usuarios
-def cargar_usuarios():
-    if os.path.exists(USUARIOS_PATH):
-        with open(USUARIOS_PATH, "r") as f:
-            return json.load(f)
-    return {}
+def cargar_artefacto(ruta):
+    if ARRANQUE_RAPIDO:
+        modelos_cargados, origen = artefacto_rapido.cargar(
+            ruta, verificar_datos=os.environ.get("ARTEFACTO_VERIFICAR", "0") == "1"
+        )
+        estado_arranque["artefactos"][os.path.basename(ruta)] = origen
+        return modelos_cargados
+    # MODELO_MMAP=1: arreglos NumPy mapeados en memoria, compartidos entre procesos
+    return joblib.load(ruta, mmap_mode="r" if os.environ.get("MODELO_MMAP", "0") == "1" else None)
 
-def guardar_usuarios(usuarios):
-    with open(USUARIOS_PATH, "w") as f:
-        json.dump(usuarios, f, indent=2)
+def registrar_componentes(version):
+    """Codificador, predictor rápido, explicador LIME, tabla y planificador de cada modelo de la versión"""
+    respaldo = getattr(version.modelos.get("random_forest"), "used_features", None)
+    tablas = cargar_tablas(version.modelos, version.ruta) if USAR_TABLAS_PREDICCION else {}
+    for nombre, modelo in version.modelos.items():
+        clave = version.clave(nombre)
+        used = getattr(modelo, "used_features", None) or respaldo
+        codificador = CodificadorEntrada(used, CAMPO_MAPEO_COMPLETO)
+        plano = aplanar_modelo(modelo) if USAR_ENSAMBLE_PLANO else None
+        codificadores[clave] = codificador
+        predictores_rapidos[clave] = plano.predict_proba if plano is not None else crear_predict_proba_rapido(modelo)
 
-# FUNCION para traducir etiquetas a formato legible
-def interpretar_etiqueta_duracion(etiqueta):
-    """
-    Convierte una etiqueta como '(-0.2, 67.611]' en 'Duración estimada entre 0.2 y 67.6 meses'
-    """
-    try:
-        if etiqueta.startswith("(") or etiqueta.startswith("["):
-            etiqueta = etiqueta.replace("(", "").replace("]", "")
-            partes = etiqueta.split(",")
-            if len(partes) == 2:
-                inicio = round(float(partes[0]), 1)
-                fin = round(float(partes[1]), 1)
-                return f"Duración estimada entre {inicio} y {fin} meses"
-        elif etiqueta.replace(".", "").isnumeric():
-            return f"Duración estimada: {round(float(etiqueta), 1)} meses"
+        # Muestra de fondo de LIME (model/fondo_lime.npz); el explicador se construye en el primer uso
+        fondo = cargar_fondo(codificador.used_features)
+        if fondo is not None:
+            fondos_lime[clave] = fondo
         else:
-            return f"Duración estimada: {etiqueta}"
-    except:
-        return "Duración estimada desconocida"
+            log.warning("⚠️ Sin fondo LIME para %s: se usará la fila consultada", clave)
+        explicador_arboles = crear_explicador_arboles(modelo, codificador.used_features)
+        if explicador_arboles is not None:
+            explicadores_arboles[clave] = explicador_arboles
+
+        tabla = tablas.get(nombre)
+        if tabla is not None and tabla.used_features == codificador.used_features:
+            tablas_prediccion[clave] = tabla
+
+        if USAR_MICROLOTES:
+            planificadores[clave] = crear_planificador(clave)
+        # Último paso: con el modelo visible el resto de componentes ya existen
+        modelos[clave] = modelo
+
+def retirar_componentes(version):
+    """Libera los componentes de una versión sin peticiones en curso"""
+    for clave in version.claves():
+        modelos.pop(clave, None)
+        planificador = planificadores.pop(clave, None)
+        if planificador is not None:
+            planificador.detener()
+        for componentes in (codificadores, predictores_rapidos, explicadores_lime, fondos_lime, explicadores_arboles,
+                            tablas_prediccion):
+            componentes.pop(clave, None)
+    log.info("🗑️ Versión %s (r%s) retirada", version.id, version.revision)
+
+# Registro de versiones: cada .pkl de MODELOS_DIR es una versión; la más reciente es la activa.
+# Un hilo vigila el directorio y publica en caliente los artefactos nuevos ya calentados.
+registro_modelos = RegistroModelos(
+    MODELOS_DIR,
+    cargar=cargar_artefacto,
+    al_registrar=registrar_componentes,
+    al_retirar=retirar_componentes,
+    calentar=lambda version: calentar_claves(version.claves()),
+    intervalo_segundos=float(os.environ.get("MODELOS_INTERVALO_SEGUNDOS", "5")),
+    max_versiones=int(os.environ.get("MODELOS_MAX_VERSIONES", "2")),
+)
+registro_modelos.cargar_inicial()
+
+version_inicial = registro_modelos.version_activa()
+used_features = codificadores[version_inicial.clave("random_forest")].used_features
+clases = version_inicial.modelos["random_forest"].classes_
+
+log.info("✅ Modelos cargados correctamente", extra={"datos": {
+    "version_activa": version_inicial.id, "features": len(used_features), "clases": len(clases),
+}})
+if USAR_TABLAS_PREDICCION:
+    log.info("📚 Tablas de predicción cargadas: %s", sorted(tablas_prediccion) or "ninguna")
+
+# Pool acotado para explicaciones asíncronas (/predict con "asincrono": true)
+gestor_explicaciones = GestorTrabajos(
+    max_workers=int(os.environ.get("EXPLICACION_WORKERS", "2")),
+    max_pendientes=int(os.environ.get("EXPLICACION_MAX_PENDIENTES", "64")),
+    ttl_segundos=float(os.environ.get("EXPLICACION_TTL_SEGUNDOS", "600")),
+)
+
+# Caché de respuestas completas de /predict (CACHE_DIR la comparte entre workers)
+cache_resultados = CacheResultados(
+    max_entradas=int(os.environ.get("CACHE_MAX_ENTRADAS", "1024")),
+    ttl_segundos=float(os.environ.get("CACHE_TTL_SEGUNDOS", "3600")),
+    directorio=os.environ.get("CACHE_DIR") or None,
+)
+
+# Gestión de usuarios: SQLite local (una fila por usuario); users.json se importa la primera vez
+almacen_usuarios = AlmacenUsuarios(USUARIOS_DB, importar_desde=USUARIOS_PATH)
+
+# Pool dedicado para hash/verificación de contraseñas (separado de /predict)
+servicio_contrasenas = ServicioContrasenas(
+    metodo=os.environ.get("HASH_METODO", METODO_POR_DEFECTO),
+    max_workers=int(os.environ.get("CONTRASENAS_WORKERS", "2")),
+    max_pendientes=int(os.environ.get("CONTRASENAS_MAX_PENDIENTES", "16")),
+    timeout_segundos=float(os.environ.get("CONTRASENAS_TIMEOUT_SEGUNDOS", "5")),
+)
+
+# Pool compartido de /predict/compare: una tarea por modelo (latencia cercana a la del más lento)
+comparador_modelos = ComparadorModelos(
+    max_workers=int(os.environ.get("COMPARACION_WORKERS", "4")),
+    timeout_segundos=float(os.environ.get("COMPARACION_TIMEOUT_SEGUNDOS", "30")),
+)
+
+# Admisión de /predict (opcional, ADMISION=1): degrada la explicación por etapas según las
+# peticiones en curso (y el plazo del cliente, cabecera X-Deadline-Ms) y rechaza con 503 por
+# encima del máximo. Desactivada, todas las respuestas son completas.
+control_admision = ControlAdmision(
+    umbrales=[int(u) for u in os.environ.get("ADMISION_UMBRALES", "4,8,16").split(",")],
+    max_en_curso=int(os.environ.get("ADMISION_MAX_EN_CURSO", "32")),
+    reintentar_segundos=float(os.environ.get("ADMISION_REINTENTAR_SEGUNDOS", "1")),
+    activo=os.environ.get("ADMISION", "0") == "1",
+)
+ADMISION_FRACCION_MUESTRAS = float(os.environ.get("ADMISION_FRACCION_MUESTRAS", "0.2"))
+CABECERA_PLAZO = os.environ.get("ADMISION_CABECERA_PLAZO", "X-Deadline-Ms")
+
+# Métricas Prometheus (GET /metrics). PERFILADOR_UMBRAL_MS > 0 activa el perfilador de muestreo
+# y guarda las pilas de las peticiones más lentas que el umbral (GET /metrics/perfiles)
+metricas = RegistroMetricas()
+PERFILADOR_UMBRAL_MS = float(os.environ.get("PERFILADOR_UMBRAL_MS", "0"))
+perfilador = PerfiladorMuestreo(
+    PERFILADOR_UMBRAL_MS, intervalo_ms=float(os.environ.get("PERFILADOR_INTERVALO_MS", "5"))
+) if PERFILADOR_UMBRAL_MS > 0 else None
+instrumentacion = InstrumentacionPeticiones(metricas, perfilador)
+metrica_cola_explicaciones = metricas.indicador("api_explicaciones_pendientes", "Trabajos de explicación pendientes")
+metrica_version_en_curso = metricas.indicador(
+    "api_modelo_peticiones_en_curso", "Peticiones en curso por versión de modelo", ("version",))
+metrica_admision = metricas.contador(
+    "api_admision_total", "Decisiones de admisión de /predict (nivel de degradación o rechazo)", ("resultado",))
+
+def nombre_modelo(clave):
+    """Nombre del modelo sin versión (etiqueta de métricas de cardinalidad acotada)"""
+    return clave.split("@", 1)[0]
+
+@app.before_request
+def iniciar_metricas_peticion():
+    g.tokens_registro = registro_eventos.iniciar_peticion(request.headers.get("X-Request-ID"))
+    ruta = request.url_rule.rule if request.url_rule is not None else "desconocida"
+    g.metricas_peticion = instrumentacion.iniciar(ruta, request.method)
+
+@app.after_request
+def terminar_metricas_peticion(respuesta):
+    estado = g.get("metricas_peticion")
+    if estado is not None:
+        instrumentacion.terminar(estado, respuesta.status_code)
+    respuesta.headers["X-Request-ID"] = registro_eventos.id_actual() or ""
+    return respuesta
+
+@app.teardown_request
+def cerrar_metricas_peticion(error):
+    estado = g.get("metricas_peticion")
+    if estado is not None and error is not None:
+        instrumentacion.error(type(error).__name__, ruta=estado["ruta"])
+        instrumentacion.terminar(estado, 500)
+    tokens = g.pop("tokens_registro", None)
+    if tokens is not None:
+        registro_eventos.terminar_peticion(tokens)
+
+def respuesta_json(cuerpo, codigo=200, cabeceras=None):
+    """JSON compacto con Util/respuestas.serializar (orjson y NumPy nativo si está disponible)"""
+    return Response(serializar(cuerpo), status=codigo, headers=cabeceras, mimetype="application/json")
+
+@app.after_request
+def comprimir_respuesta(respuesta):
+    """brotli/gzip según Accept-Encoding para respuestas no transmitidas de al menos COMPRESION_MIN_BYTES"""
+    if (respuesta.is_streamed or respuesta.direct_passthrough or respuesta.status_code in (204, 304)
+            or "Content-Encoding" in respuesta.headers or respuesta.mimetype not in TIPOS_COMPRIMIBLES):
+        return respuesta
+    respuesta.vary.add("Accept-Encoding")
+    with instrumentacion.etapa("compresion"):
+        datos, codificacion = comprimir(
+            respuesta.get_data(), request.headers.get("Accept-Encoding"), COMPRESION_MIN_BYTES
+        )
+    if codificacion is not None:
+        respuesta.set_data(datos)
+        respuesta.headers["Content-Encoding"] = codificacion
+    return respuesta
 
 # Rutas para registro/login/logout/index
+def respuesta_auth_saturada(mensaje, codigo):
+    """Contrapresión del pool de contraseñas: 429 (cola llena) o 503 (tiempo agotado)"""
+    return mensaje, codigo, {"Retry-After": "1"}
+
 @app.route("/register", methods=["GET", "POST"])
 def register():
     if request.method == "POST":
         email = request.form["email"]
-        password = generate_password_hash(request.form["password"])
-        usuarios = cargar_usuarios()
-        if email in usuarios:
+        with instrumentacion.etapa("usuarios"):
+            existe = almacen_usuarios.obtener(email) is not None
+        if existe:
+            return "Usuario ya existe", 400
+        try:
+            with instrumentacion.etapa("hash_contrasena"):
+                password = servicio_contrasenas.hashear(request.form["password"])
+        except ColaContrasenasLlena:
+            instrumentacion.error("ColaContrasenasLlena")
+            return respuesta_auth_saturada("Demasiadas solicitudes, intente de nuevo", 429)
+        except TiempoContrasenaAgotado:
+            instrumentacion.error("TiempoContrasenaAgotado")
+            return respuesta_auth_saturada("Servicio ocupado, intente de nuevo", 503)
+        with instrumentacion.etapa("usuarios"):
+            registrado = almacen_usuarios.registrar(email, {"password": password})
+        if not registrado:
             return "Usuario ya existe", 400
-        usuarios[email] = {"password": password}
-        guardar_usuarios(usuarios)
         return redirect("/login?mensaje=Registro%20exitoso,%20puedes%20iniciar%20sesión")
     return render_template("register.html")
 
@@ -333,10 +337,26 @@ def login():
     if request.method == "POST":
         email = request.form["email"]
         password = request.form["password"]
-        usuarios = cargar_usuarios()
-        if email in usuarios and check_password_hash(usuarios[email]["password"], password):
-            session["usuario"] = email
-            return redirect("/")
+        with instrumentacion.etapa("usuarios"):
+            usuario = almacen_usuarios.obtener(email)
+        if usuario is not None:
+            try:
+                with instrumentacion.etapa("verificar_contrasena"):
+                    valida, hash_nuevo = servicio_contrasenas.verificar(usuario["password"], password)
+            except ColaContrasenasLlena:
+                instrumentacion.error("ColaContrasenasLlena")
+                return respuesta_auth_saturada("Demasiados intentos de inicio de sesión, intente de nuevo", 429)
+            except TiempoContrasenaAgotado:
+                instrumentacion.error("TiempoContrasenaAgotado")
+                return respuesta_auth_saturada("Servicio ocupado, intente de nuevo", 503)
+            if valida:
+                # Política de hash cambiada: se guarda el hash nuevo de forma transparente
+                if hash_nuevo is not None:
+                    with instrumentacion.etapa("usuarios"):
+                        almacen_usuarios.actualizar(email, {"password": hash_nuevo})
+                session["usuario"] = email
+                return redirect("/")
+        instrumentacion.error("CredencialesIncorrectas")
         return "Credenciales incorrectas", 401
     return render_template("login.html", mensaje=mensaje)
 
@@ -351,159 +371,868 @@ def index():
         return redirect("/login")
     return render_template("formulario.html")
 
-@app.route("/predict", methods=["POST"])
-def predict():
+# Funciones auxiliares del flujo de predicción
+def mensaje_duracion_desde_etiqueta(etiqueta):
+    """Procesa la etiqueta como rango o valor numérico"""
     try:
-        data = request.json
-        modelo_nombre = data.get("modelo")
-        entrada_raw = data.get("entrada", {})
+        numeros = re.findall(r"[-+]?\d*\.\d+|\d+", etiqueta)
+        if len(numeros) == 2:
+            inicio = round(float(numeros[0]), 1)
+            fin = round(float(numeros[1]), 1)
+            return f"Duración estimada entre {inicio} y {fin} meses"
+        duracion = round(float(etiqueta), 1)
+        return f"Duración estimada de {duracion} meses"
+    except:
+        return "Duración estimada desconocida"
 
-        # 🔧 Remover llave vacía si llega desde el frontend
-        if "" in entrada_raw:
-            entrada_raw.pop("")
+def predecir_probabilidades(modelo_nombre, X):
+    """Probabilidades por fila: tabla precalculada si existe, el modelo para el resto"""
+    predict_proba = planificadores.get(modelo_nombre) or predictores_rapidos[modelo_nombre]
+    tabla = tablas_prediccion.get(modelo_nombre)
+    if tabla is None:
+        return predict_proba(X)
+    probas, validos = tabla.consultar(X)
+    if not validos.all():
+        probas[~validos] = predict_proba(X[~validos])
+    return probas
 
-        print("📥 Entrada cruda desde el frontend:")
-        print(json.dumps(entrada_raw, indent=2))
+lock_explicadores_lime = threading.Lock()
 
-        # Mapear nombres frontend -> backend
-        entrada_mapeada = {}
-        for clave_frontend, valor in entrada_raw.items():
-            clave_backend = CAMPO_MAPEO_COMPLETO.get(clave_frontend, clave_frontend)
-            entrada_mapeada[clave_backend] = valor
+def obtener_explicador_lime(modelo_nombre):
+    """Explicador LIME del modelo construido una vez, en el primer uso (difiere el import de lime)"""
+    explainer = explicadores_lime.get(modelo_nombre)
+    if explainer is None and modelo_nombre in fondos_lime:
+        with lock_explicadores_lime:
+            explainer = explicadores_lime.get(modelo_nombre)
+            fondo = fondos_lime.get(modelo_nombre)
+            if explainer is None and fondo is not None:
+                explainer = crear_explicador(
+                    fondo, codificadores[modelo_nombre].used_features, modelos[modelo_nombre].classes_
+                )
+                explicadores_lime[modelo_nombre] = explainer
+    return explainer
 
-        # ======= VALIDACIÓN DE ENTRADA NUEVA =======
-        entrada_mapeada = validar_entrada_modelo(entrada_mapeada)
-        # ==========================================
+def generar_explicacion_lime(modelo_nombre, fila, prediccion, num_samples=None):
+    """Ejecuta LIME sobre una fila codificada y devuelve (reglas_por_clase, tabla_lime)"""
+    used_features_modelo = codificadores[modelo_nombre].used_features
 
-        # ======= SELECCIÓN DEL MODELO Y SUS FEATURES =======
-        modelo = modelos.get(modelo_nombre)
-        if modelo is None:
-            return jsonify({"error": "Modelo no reconocido"}), 400
+    explainer = obtener_explicador_lime(modelo_nombre)
+    if explainer is None:
+        # Sin fondo disponible: explicador de un solo uso sobre la propia fila
+        explainer = crear_explicador(
+            fila.reshape(1, -1), used_features_modelo, modelos[modelo_nombre].classes_, random_state=None
+        )
 
-        used_features_modelo = getattr(modelo, "used_features", None)
-        if not used_features_modelo:
-            used_features_modelo = used_features
-        # ====================================================
+    exp = explainer.explain_instance(
+        fila,
+        predictores_rapidos[modelo_nombre],
+        num_features=len(used_features_modelo),
+        num_samples=num_samples or LIME_NUM_SAMPLES
+    )
+    return resumir_explicacion(exp, used_features_modelo, fila, prediccion)
+
+def generar_explicacion_arboles(modelo_nombre, fila, prediccion):
+    """Contribuciones exactas de la clase predicha; devuelve (reglas_por_clase, tabla_lime)"""
+    used_features_modelo = codificadores[modelo_nombre].used_features
+    indice_pred = list(modelos[modelo_nombre].classes_).index(prediccion)
+    exp = explicadores_arboles[modelo_nombre].explain_instance(fila, indice_pred)
+    return resumir_explicacion(exp, used_features_modelo, fila, prediccion)
+
+def resumir_explicacion(exp, used_features_modelo, fila, prediccion):
+    """Reglas por clase y tabla de influencias con la misma forma para LIME y árboles"""
+    reglas_texto = {}
+    for clase in exp.available_labels():
+        reglas_texto[str(clase)] = convert_to_if_then(exp, clase, prediccion)
+
+    valores = dict(zip(used_features_modelo, fila.tolist()))
+    tabla_lime = construir_tabla_lime(exp, valores)
+    for fila_tabla in tabla_lime:
+        valor = fila_tabla["valor"]
+        if isinstance(valor, float) and valor.is_integer():
+            fila_tabla["valor"] = int(valor)
 
-        # Completar con 0 campos faltantes
-        for campo in used_features_modelo:
-            if campo not in entrada_mapeada:
-                entrada_mapeada[campo] = 0
-
-        print("✅ Entrada final validada (lista para el modelo):")
-        print(json.dumps(entrada_mapeada, indent=2))
-
-        # Crear dataframe con el orden correcto para el modelo
-        df = pd.DataFrame([entrada_mapeada])[used_features_modelo]
-
-        # DEBUG: Justo antes de pred = modelo.predict(df)
-        print(f"\n🔍 DEBUG ENTRADA AL MODELO:")
-        print(f"Modelo: {modelo_nombre}")
-        print(f"DataFrame shape: {df.shape}")
-        print(f"Valores de entrada:")
-        for col in df.columns:
-            print(f"  {col}: {df[col].iloc[0]}")
-
-
-        # DEBUG: Justo antes de pred = modelo.predict(df)
-        print(f"\n🔍 DEBUG CRÍTICO:")
-        print(f"Archivo del modelo: {MODELO_PATH}")
-        print(f"Modelo seleccionado: {modelo_nombre}")
-        print(f"Tipo de modelo: {type(modelo)}")
-        print(f"DataFrame final:")
-        for col in df.columns:
-            print(f"  {col}: {df[col].iloc[0]}")
-
-        # Verificar que es el modelo balanceado
-        if hasattr(modelo, 'class_weight'):
-            print(f"Class weight: {modelo.class_weight}")
+    return reglas_texto, tabla_lime
+
+# Formato del gráfico de probabilidades: PNG en base64, solo datos para el cliente, o nada
+MODOS_GRAFICO = ("imagen", "datos", "ninguno")
+
+def explicador_efectivo(modelo_nombre, explicador):
+    """Los modelos que no son ensambles de árboles soportados se explican con LIME"""
+    if explicador == "arboles" and modelo_nombre not in explicadores_arboles:
+        return "lime"
+    return explicador
+
+def generar_explicacion_completa(modelo_nombre, fila, prediccion, probas, grafico="imagen", explicador="lime",
+                                 num_samples=None):
+    """Explicación, reglas por clase y gráfico de probabilidades (la parte costosa de /predict)"""
+    explicador = explicador_efectivo(modelo_nombre, explicador)
+    with instrumentacion.etapa(explicador, nombre_modelo(modelo_nombre)):
+        if explicador == "arboles":
+            reglas_texto, tabla_lime = generar_explicacion_arboles(modelo_nombre, fila, prediccion)
         else:
-            print("⚠️ Modelo NO tiene class_weight - podría ser el archivo anterior")
+            reglas_texto, tabla_lime = generar_explicacion_lime(modelo_nombre, fila, prediccion, num_samples)
+    explicacion = {}
+    if grafico == "imagen":
+        with instrumentacion.etapa("grafico", nombre_modelo(modelo_nombre)):
+            explicacion["grafico_probabilidades_base64"] = plot_probabilidades_clases(
+                probas, modelos[modelo_nombre].classes_
+            )
+    explicacion["reglas_por_clase"] = reglas_texto
+    explicacion["tabla_lime"] = tabla_lime
+    explicacion["explicador"] = explicador
+    return explicacion
 
-        # Predicción
-        pred = modelo.predict(df)
-        probas = modelo.predict_proba(df)[0]
-        indice_pred = list(modelo.classes_).index(pred[0])
-        proba = probas[indice_pred]
+def combinar_respuesta(respuesta_base, explicacion):
+    """Inserta la explicación tras la probabilidad, como en la respuesta síncrona"""
+    respuesta = {"prediccion": respuesta_base["prediccion"], "probabilidad": respuesta_base["probabilidad"]}
+    respuesta.update(explicacion)
+    for clave, valor in respuesta_base.items():
+        respuesta.setdefault(clave, valor)
+    return respuesta
+
+def construir_respuesta(modelo_nombre, fila, prediccion, probas, explicar=True, grafico="imagen", explicador="lime",
+                        num_samples=None):
+    """
+    Arma el cuerpo de respuesta de /predict para una fila ya evaluada.
+    Con explicar=False se omiten LIME y el gráfico (útil en lotes).
+    Con grafico="datos" se devuelve el vector clase/probabilidad en lugar del PNG.
+    Con explicador="arboles" la tabla y las reglas salen de los caminos de decisión.
+    num_samples reduce las muestras de LIME (degradación por carga).
+    """
+    modelo = modelos[modelo_nombre]
+    indice_pred = list(modelo.classes_).index(prediccion)
+    proba = probas[indice_pred]
+    etiqueta = str(prediccion)
+    mensaje_duracion = mensaje_duracion_desde_etiqueta(etiqueta)
 
-        etiqueta = str(pred[0])
-        mensaje_duracion = interpretar_etiqueta_duracion(etiqueta)
+    mensaje_explicativo = (
+        f"Según el análisis de las características ingresadas, se estima que la duración del contrato será de "
+        f"{mensaje_duracion}. Esta recomendación considera factores como el tipo de contrato, número de ofertas, "
+        f"y la actividad principal de la autoridad contratante."
+    )
 
-        print(f"🔮 Predicción: {pred[0]}, Probabilidad: {proba:.4f}")
+    sugerencias_duracion = generar_sugerencia_group_duration(etiqueta, probas)
 
-        # =================== LIME ===================
-        from lime.lime_tabular import LimeTabularExplainer
+    respuesta = {
+        "prediccion": etiqueta,
+        "probabilidad": round(float(proba), 4),
+        "duracion_meses_aproximada": mensaje_duracion,
+        "mensaje_explicativo": mensaje_explicativo,
+        "sugerencias_duracion": sugerencias_duracion,
+        "sugerencia_principal": {
+            "valor_meses": sugerencias_duracion["opcion_recomendada"]["valor"],
+            "descripcion": sugerencias_duracion["opcion_recomendada"]["descripcion"]
+        }
+    }
 
-        def predict_proba_wrapper(x_array):
-            df_temp = pd.DataFrame(x_array, columns=used_features_modelo)
-            return modelo.predict_proba(df_temp)
+    if grafico == "datos":
+        respuesta["grafico_probabilidades"] = datos_probabilidades(probas, modelo.classes_)
 
-        explainer = LimeTabularExplainer(
-            training_data=df.values,
-            feature_names=df.columns,
-            class_names=modelo.classes_,
-            mode='classification'
+    if explicar:
+        explicacion = generar_explicacion_completa(
+            modelo_nombre, fila, prediccion, probas, grafico=grafico, explicador=explicador, num_samples=num_samples
         )
+        respuesta = combinar_respuesta(respuesta, explicacion)
+    return respuesta
 
-        exp = explainer.explain_instance(
-            df.iloc[0],
-            predict_proba_wrapper,
-            num_features=len(df.columns)
+def trabajo_explicacion(modelo_nombre, fila, prediccion, probas, respuesta_base, grafico="imagen", explicador="lime"):
+    """
+    Trabajo asíncrono: calcula la explicación y deja la respuesta completa en la caché.
+    Quien lo encola reserva la versión del modelo; aquí se libera al terminar.
+    """
+    fijar_ruta("explicacion_asincrona")
+    try:
+        explicacion = generar_explicacion_completa(
+            modelo_nombre, fila, prediccion, probas, grafico=grafico, explicador=explicador
+        )
+        cache_resultados.guardar(
+            modelo_nombre, fila, combinar_respuesta(respuesta_base, explicacion),
+            variante=variante_cache(grafico, explicador)
         )
-        # ==============================================
+        return explicacion
+    finally:
+        registro_modelos.liberar(modelo_nombre)
+
+def leer_entradas_lote():
+    """
+    Lee las entradas de /predict/batch. Acepta:
+      - JSON: {"modelo": ..., "entradas": [...], "explicar": false, "grafico": "datos", "explicador": "arboles"}
+        o un arreglo de entradas
+      - NDJSON (application/x-ndjson): una entrada por línea
+    Cada entrada puede ser el diccionario del formulario o {"entrada": {...}}.
+    "perfil"/"campos" recortan cada resultado; "formato": "ndjson" (o Accept: application/x-ndjson)
+    devuelve los resultados como NDJSON transmitido.
+    """
+    opciones = {
+        "modelo": request.args.get("modelo"),
+        "version": request.args.get("version"),
+        "explicar": request.args.get("explicar", "false").lower() in ("1", "true", "si", "sí"),
+        "grafico": request.args.get("grafico", "imagen"),
+        "explicador": request.args.get("explicador", EXPLICADOR_POR_DEFECTO),
+        "perfil": request.args.get("perfil", PERFIL_POR_DEFECTO),
+        "campos": leer_campos(request.args.get("campos", request.args.get("fields"))),
+        "formato": request.args.get("formato") or (
+            "ndjson" if request.accept_mimetypes.best == "application/x-ndjson" else "json"
+        ),
+    }
+
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        entradas = []
+        for linea in request.get_data(as_text=True).splitlines():
+            linea = linea.strip()
+            if linea:
+                entradas.append(json.loads(linea))
+    else:
+        data = request.get_json(force=True)
+        if isinstance(data, dict):
+            entradas = data.get("entradas", [])
+            opciones["modelo"] = data.get("modelo", opciones["modelo"])
+            opciones["version"] = data.get("version", opciones["version"])
+            opciones["explicar"] = bool(data.get("explicar", opciones["explicar"]))
+            opciones["grafico"] = data.get("grafico", opciones["grafico"])
+            opciones["explicador"] = data.get("explicador", opciones["explicador"])
+            opciones["perfil"] = data.get("perfil", opciones["perfil"])
+            opciones["campos"] = leer_campos(data.get("campos", data.get("fields"))) or opciones["campos"]
+            opciones["formato"] = data.get("formato", opciones["formato"])
+        else:
+            entradas = data
 
-        img_probas_base64 = plot_probabilidades_clases(probas, modelo.classes_)
+    entradas = [e.get("entrada", e) if isinstance(e, dict) and "entrada" in e else e for e in entradas]
+    return entradas, opciones
 
-        reglas_texto = {}
-        for clase in exp.available_labels():
-            reglas_texto[str(clase)] = convert_to_if_then(exp, clase, pred[0])
+def variante_cache(grafico, explicador):
+    return f"{grafico}:{explicador}"
 
-        tabla_lime = construir_tabla_lime(exp, df)
-        for fila in tabla_lime:
-            if hasattr(fila["valor"], "item"):
-                fila["valor"] = fila["valor"].item()
+def validar_opciones(grafico, explicador):
+    """Mensaje de error si 'grafico' o 'explicador' no son válidos; None si lo son"""
+    if grafico not in MODOS_GRAFICO:
+        return f"Valor de 'grafico' no válido; use uno de {list(MODOS_GRAFICO)}"
+    if explicador not in EXPLICADORES:
+        return f"Valor de 'explicador' no válido; use uno de {list(EXPLICADORES)}"
+    return None
 
-        # Procesar etiqueta como rango o valor numérico
-        etiqueta = str(pred[0])
-        try:
-            numeros = re.findall(r"[-+]?\d*\.\d+|\d+", etiqueta)
-            if len(numeros) == 2:
-                inicio = round(float(numeros[0]), 1)
-                fin = round(float(numeros[1]), 1)
-                mensaje_duracion = f"Duración estimada entre {inicio} y {fin} meses"
-            else:
-                duracion = round(float(etiqueta), 1)
-                mensaje_duracion = f"Duración estimada de {duracion} meses"
-        except:
-            mensaje_duracion = "Duración estimada desconocida"
-
-        mensaje_explicativo = (
-            f"Según el análisis de las características ingresadas, se estima que la duración del contrato será de "
-            f"{mensaje_duracion}. Esta recomendación considera factores como el tipo de contrato, número de ofertas, "
-            f"y la actividad principal de la autoridad contratante."
+# Rutas de predicción
+def error_modelo_no_disponible(version):
+    if version is None:
+        return {"error": "Modelo no reconocido"}
+    return {"error": f"Modelo no disponible en la versión '{version}'"}
+
+def limite_desde_cabecera(valor):
+    """Plazo del cliente en ms (cabecera CABECERA_PLAZO) -> instante límite en perf_counter, o None"""
+    try:
+        plazo_ms = float(valor)
+    except (TypeError, ValueError):
+        return None
+    return time.perf_counter() + plazo_ms / 1000.0
+
+def cabeceras_respuesta(cuerpo, codigo):
+    """Retry-After en los rechazos por saturación"""
+    if codigo == 503 and "reintentar_en_segundos" in cuerpo:
+        return {"Retry-After": str(cuerpo["reintentar_en_segundos"])}
+    return {}
+
+def procesar_prediccion_observada(data, ruta="/predict", id_peticion=None, limite=None):
+    """procesar_prediccion con métricas e id de petición, para rutas fuera de Flask (asgi.py)"""
+    tokens = registro_eventos.iniciar_peticion(id_peticion)
+    try:
+        with instrumentacion.peticion(ruta, "POST") as estado:
+            cuerpo, estado["codigo"] = procesar_prediccion(data, limite)
+            return cuerpo, estado["codigo"]
+    finally:
+        registro_eventos.terminar_peticion(tokens)
+
+def procesar_prediccion(data, limite=None):
+    """
+    Lógica de /predict independiente del framework: devuelve (cuerpo, código HTTP).
+    La usan la ruta Flask y el modo ASGI (asgi.py).
+    "version" (opcional) fija la versión del modelo; por defecto se usa la activa.
+    "explicador" (opcional): "lime" o "arboles"; por defecto EXPLICADOR.
+    "perfil" (minimo | estandar | completo) o "campos"/"fields" recortan la respuesta.
+    limite (opcional): instante perf_counter en que vence el plazo del cliente.
+    """
+    grafico = data.get("grafico", "imagen")
+    explicador = data.get("explicador") or EXPLICADOR_POR_DEFECTO
+    perfil = data.get("perfil") or PERFIL_POR_DEFECTO
+    campos = leer_campos(data.get("campos", data.get("fields")))
+    error = validar_opciones(grafico, explicador) or validar_seleccion(perfil, campos)
+    if error is not None:
+        return {"error": error}, 400
+    # Solo se calcula lo que el perfil o los campos van a devolver
+    grafico = grafico_para_perfil(grafico, perfil, campos)
+    explicar = requiere_explicacion(perfil, campos)
+
+    try:
+        with control_admision.admision(limite - time.perf_counter() if limite is not None else None) as admision:
+            metrica_admision.inc(admision.nombre)
+            # La versión resuelta queda reservada hasta terminar (una recarga no la retira a mitad)
+            with registro_modelos.usar(data.get("modelo"), data.get("version")) as clave:
+                if clave is None:
+                    admision.medir = False
+                    return error_modelo_no_disponible(data.get("version")), 400
+                cuerpo, codigo = predecir_con_modelo(clave, data, grafico, explicador, admision, explicar)
+                return aplicar_seleccion(cuerpo, perfil, campos, modelos[clave].classes_), codigo
+    except Saturado as e:
+        metrica_admision.inc(e.motivo)
+        log.warning("🚦 Petición rechazada por el control de admisión", extra={"datos": {"motivo": e.motivo}})
+        return {
+            "error": "Servicio saturado, intente más tarde" if e.motivo == "saturado" else "Plazo de la petición vencido",
+            "motivo": e.motivo,
+            "reintentar_en_segundos": e.reintentar_en,
+        }, 503
+
+def predecir_con_modelo(modelo_nombre, data, grafico, explicador, admision=None, explicar=True):
+    """
+    /predict para una clave de modelo ya resuelta por el registro.
+    Con una admisión degradada se reduce LIME, se omite el PNG o la explicación entera.
+    Con explicar=False (perfil mínimo) se responde solo la predicción.
+    """
+    try:
+        entrada_raw = data.get("entrada", {})
+
+        # Volcados detallados solo con LOG_NIVEL=DEBUG (sin coste si está desactivado)
+        depurar = log.isEnabledFor(logging.DEBUG)
+        if depurar:
+            log.debug("📥 Entrada cruda desde el frontend", extra={"datos": {"entrada": entrada_raw}})
+
+        # ======= SELECCIÓN DEL MODELO Y SU CODIFICADOR =======
+        modelo = modelos[modelo_nombre]
+        codificador = codificadores[modelo_nombre]
+        # ====================================================
+
+        modelo_metricas = nombre_modelo(modelo_nombre)
+
+        # Mapeo, validación y relleno con 0 en un solo paso sobre una fila NumPy
+        with instrumentacion.etapa("codificacion", modelo_metricas):
+            X = codificador.codificar(entrada_raw)
+
+        if depurar:
+            log.debug("✅ Entrada final validada (lista para el modelo)",
+                      extra={"datos": {"entrada_modelo": codificador.a_diccionario(X[0])}})
+
+        with instrumentacion.etapa("cache", modelo_metricas):
+            respuesta_cacheada = cache_resultados.obtener(
+                modelo_nombre, X[0], variante=variante_cache(grafico, explicador)
+            )
+        instrumentacion.prediccion(modelo_metricas)
+        if respuesta_cacheada is not None:
+            if admision is not None:
+                admision.medir = False
+            log.info("⚡ Respuesta servida desde la caché", extra={"datos": {"modelo": modelo_nombre}})
+            return respuesta_cacheada, 200
+
+        if depurar:
+            log.debug("🔍 Modelo seleccionado", extra={"datos": {
+                "modelo": modelo_nombre,
+                "version": registro_modelos.version_de(modelo_nombre),
+                "tipo": type(modelo).__name__,
+                "forma_entrada": X.shape,
+                "class_weight": getattr(modelo, "class_weight", "⚠️ sin class_weight - podría ser el archivo anterior"),
+            }})
+
+        # Predicción (una sola llamada; la clase es el argmax de las probabilidades)
+        with instrumentacion.etapa("inferencia", modelo_metricas):
+            probas = predecir_probabilidades(modelo_nombre, X)[0]
+        prediccion = modelo.classes_[probas.argmax()]
+
+        log.info("🔮 Predicción", extra={"datos": {
+            "modelo": modelo_nombre, "prediccion": str(prediccion), "probabilidad": round(float(probas.max()), 4),
+        }})
+
+        if not explicar:
+            if admision is not None:
+                admision.medir = False
+            respuesta = construir_respuesta(modelo_nombre, X[0], prediccion, probas, explicar=False, grafico=grafico)
+            respuesta["version_modelo"] = registro_modelos.version_de(modelo_nombre)
+            return respuesta, 200
+
+        if data.get("asincrono"):
+            # Responder ya con la predicción; LIME y el gráfico quedan en un trabajo
+            if admision is not None:
+                admision.medir = False
+            respuesta = construir_respuesta(modelo_nombre, X[0], prediccion, probas, explicar=False, grafico=grafico)
+            respuesta["version_modelo"] = registro_modelos.version_de(modelo_nombre)
+            registro_modelos.reservar_clave(modelo_nombre)
+            try:
+                respuesta["trabajo_explicacion"] = gestor_explicaciones.enviar(
+                    trabajo_explicacion, modelo_nombre, X[0], prediccion, probas, dict(respuesta),
+                    grafico=grafico, explicador=explicador
+                )
+            except ColaLlena:
+                instrumentacion.error("ColaExplicacionesLlena")
+                registro_modelos.liberar(modelo_nombre)
+                respuesta["trabajo_explicacion"] = None
+                respuesta["explicacion_no_disponible"] = "Cola de explicaciones llena, intente más tarde"
+            return respuesta, 200
+
+        if admision is not None and admision.degradada:
+            # Las respuestas degradadas no se guardan en la caché (son de calidad reducida)
+            nivel = admision.nivel
+            respuesta = construir_respuesta(
+                modelo_nombre, X[0], prediccion, probas, explicar=nivel < SOLO_PREDICCION,
+                grafico="datos" if nivel >= 2 and grafico == "imagen" else grafico, explicador=explicador,
+                num_samples=max(100, int(LIME_NUM_SAMPLES * ADMISION_FRACCION_MUESTRAS))
+            )
+            respuesta["version_modelo"] = registro_modelos.version_de(modelo_nombre)
+            respuesta["degradado"] = True
+            respuesta["degradacion"] = admision.nombre
+            return respuesta, 200
+
+        respuesta = construir_respuesta(
+            modelo_nombre, X[0], prediccion, probas, explicar=True, grafico=grafico, explicador=explicador
         )
+        respuesta["version_modelo"] = registro_modelos.version_de(modelo_nombre)
+        cache_resultados.guardar(modelo_nombre, X[0], respuesta, variante=variante_cache(grafico, explicador))
+        return respuesta, 200
+
+    except Exception as e:
+        log.exception("❌ Error procesando la petición")
+        instrumentacion.error(type(e).__name__)
+        return {"error": "Error interno", "mensaje": str(e)}, 500
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        # Mismo error que el modo ASGI (asgi.py)
+        return respuesta_json({"error": "El cuerpo debe ser un objeto JSON"}, 400)
+    cuerpo, codigo = procesar_prediccion(data, limite_desde_cabecera(request.headers.get(CABECERA_PLAZO)))
+    with instrumentacion.etapa("serializacion"):
+        return respuesta_json(cuerpo, codigo, cabeceras_respuesta(cuerpo, codigo))
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Puntúa una lista de entradas con una sola llamada vectorizada a predict_proba.
+    Cada resultado tiene la misma forma que la respuesta de /predict
+    (sin LIME ni gráfico salvo que se pida explicar=true).
+    """
+    try:
+        entradas, opciones = leer_entradas_lote()
+        error = (validar_opciones(opciones["grafico"], opciones["explicador"])
+                 or validar_seleccion(opciones["perfil"], opciones["campos"]))
+        if error is not None:
+            return jsonify({"error": error}), 400
+        if not isinstance(entradas, list):
+            return jsonify({"error": "Se esperaba una lista de entradas"}), 400
+        opciones["explicar"] = opciones["explicar"] and requiere_explicacion(opciones["perfil"], opciones["campos"])
+        opciones["grafico"] = grafico_para_perfil(opciones["grafico"], opciones["perfil"], opciones["campos"])
+
+        if opciones["formato"] == "ndjson":
+            return respuesta_lote_ndjson(entradas, opciones)
+
+        with registro_modelos.usar(opciones["modelo"], opciones["version"]) as clave:
+            if clave is None:
+                return jsonify(error_modelo_no_disponible(opciones["version"])), 400
+            cuerpo = puntuar_lote(clave, opciones["modelo"], entradas, opciones)
+            with instrumentacion.etapa("serializacion"):
+                return respuesta_json(cuerpo)
+
+    except Exception as e:
+        log.exception("❌ Error procesando la petición")
+        instrumentacion.error(type(e).__name__)
+        return jsonify({"error": "Error interno", "mensaje": str(e)}), 500
+
+def evaluar_lote(clave, entradas):
+    """Codifica y puntúa el lote con una sola llamada al modelo: (X, probabilidades, predicciones)"""
+    modelo_metricas = nombre_modelo(clave)
+
+    # Una sola matriz en el orden de used_features y una sola llamada al modelo
+    with instrumentacion.etapa("codificacion", modelo_metricas):
+        X = codificadores[clave].codificar_lote(entradas)
+    with instrumentacion.etapa("inferencia", modelo_metricas):
+        matriz_probas = predecir_probabilidades(clave, X)
+    predicciones = modelos[clave].classes_[matriz_probas.argmax(axis=1)]
+    instrumentacion.prediccion(modelo_metricas, filas=len(predicciones))
+    return X, matriz_probas, predicciones
+
+def resultados_lote(clave, X, matriz_probas, predicciones, opciones):
+    """Respuesta de cada fila con la forma de /predict, recortada según perfil/campos"""
+    for i, prediccion in enumerate(predicciones):
+        yield aplicar_seleccion(construir_respuesta(
+            clave, X[i], prediccion, matriz_probas[i], explicar=opciones["explicar"],
+            grafico=opciones["grafico"], explicador=opciones["explicador"]
+        ), opciones["perfil"], opciones["campos"], modelos[clave].classes_)
+
+def puntuar_lote(clave, modelo_nombre, entradas, opciones):
+    """Cuerpo de /predict/batch para una clave de modelo ya resuelta por el registro"""
+    version = registro_modelos.version_de(clave)
+    if not entradas:
+        return {"modelo": modelo_nombre, "version_modelo": version, "total": 0, "resultados": []}
+
+    X, matriz_probas, predicciones = evaluar_lote(clave, entradas)
+    with instrumentacion.etapa("respuesta", nombre_modelo(clave)):
+        resultados = list(resultados_lote(clave, X, matriz_probas, predicciones, opciones))
+
+    log.info("📦 Lote puntuado", extra={"datos": {"modelo": clave, "filas": len(resultados)}})
+
+    return {
+        "modelo": modelo_nombre,
+        "version_modelo": version,
+        "total": len(resultados),
+        "resultados": resultados
+    }
+
+def respuesta_lote_ndjson(entradas, opciones):
+    """
+    /predict/batch como NDJSON transmitido: una línea por resultado (con "indice") a medida
+    que se construye. La versión del modelo queda reservada hasta que se cierra la respuesta.
+    """
+    clave = registro_modelos.reservar(opciones["modelo"], opciones["version"])
+    if clave is None:
+        return jsonify(error_modelo_no_disponible(opciones["version"])), 400
 
-        sugerencias_duracion = generar_sugerencia_group_duration(str(pred[0]), probas)
-
-        return jsonify({
-            "prediccion": str(pred[0]),
-            "probabilidad": round(float(proba), 4),
-            "grafico_probabilidades_base64": img_probas_base64,
-            "reglas_por_clase": reglas_texto,
-            "tabla_lime": tabla_lime,
-            "duracion_meses_aproximada": mensaje_duracion,
-            "mensaje_explicativo": mensaje_explicativo,
-            "sugerencias_duracion": sugerencias_duracion,
-            "sugerencia_principal": {
-                "valor_meses": sugerencias_duracion["opcion_recomendada"]["valor"],
-                "descripcion": sugerencias_duracion["opcion_recomendada"]["descripcion"]
-            }
+    def lineas():
+        fijar_ruta("/predict/batch")
+        if not entradas:
+            return
+        try:
+            X, matriz_probas, predicciones = evaluar_lote(clave, entradas)
+            for indice, resultado in enumerate(resultados_lote(clave, X, matriz_probas, predicciones, opciones)):
+                resultado["indice"] = indice
+                yield serializar(resultado) + b"\n"
+        except Exception as e:
+            log.exception("❌ Error transmitiendo el lote")
+            instrumentacion.error(type(e).__name__, ruta="/predict/batch")
+            yield serializar({"error": "Error interno", "mensaje": str(e)}) + b"\n"
+        log.info("📦 Lote transmitido", extra={"datos": {"modelo": clave, "filas": len(entradas)}})
+
+    try:
+        respuesta = Response(stream_with_context(lineas()), mimetype="application/x-ndjson", headers={
+            "X-Version-Modelo": registro_modelos.version_de(clave) or "",
+            "X-Total": str(len(entradas)),
         })
+    except Exception:
+        registro_modelos.liberar(clave)
+        raise
+    respuesta.call_on_close(lambda: registro_modelos.liberar(clave))
+    return respuesta
+
+# Límite de puntos por barrido (una sola matriz en memoria)
+BARRIDO_MAX_PUNTOS = int(os.environ.get("BARRIDO_MAX_PUNTOS", "50000"))
+BARRIDO_MAX_CAMBIOS = int(os.environ.get("BARRIDO_MAX_CAMBIOS", "10000"))
+
+@app.route("/predict/sweep", methods=["POST"])
+def predict_sweep():
+    """
+    Barrido "¿qué pasaría si?": {"modelo", "version"?, "entrada", "ejes", "max_cambios"?}.
+    La rejilla completa se valida y se puntúa con una sola llamada a predict_proba;
+    devuelve la superficie de probabilidades y los puntos donde cambia la clase.
+    """
+    try:
+        data = request.get_json(force=True)
+        with registro_modelos.usar(data.get("modelo"), data.get("version")) as clave:
+            if clave is None:
+                return jsonify(error_modelo_no_disponible(data.get("version"))), 400
+            cuerpo, codigo = barrer_rejilla(clave, data)
+            with instrumentacion.etapa("serializacion"):
+                return respuesta_json(cuerpo, codigo)
+
+    except Exception as e:
+        log.exception("❌ Error procesando la petición")
+        instrumentacion.error(type(e).__name__)
+        return jsonify({"error": "Error interno", "mensaje": str(e)}), 500
+
+def barrer_rejilla(clave, data):
+    """Cuerpo de /predict/sweep para una clave de modelo ya resuelta por el registro"""
+    codificador = codificadores[clave]
+    clases_modelo = modelos[clave].classes_
+    try:
+        ejes = definir_ejes(data.get("ejes"), codificador)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    n_puntos = int(np.prod([len(eje) for eje in ejes]))
+    if n_puntos > BARRIDO_MAX_PUNTOS:
+        return {"error": f"La rejilla tiene {n_puntos} puntos; el máximo es {BARRIDO_MAX_PUNTOS}"}, 400
+    max_cambios = data.get("max_cambios", 1000)
+    if isinstance(max_cambios, bool) or not isinstance(max_cambios, int) or not 0 <= max_cambios <= BARRIDO_MAX_CAMBIOS:
+        return {"error": f"'max_cambios' debe ser un entero entre 0 y {BARRIDO_MAX_CAMBIOS}"}, 400
+
+    inicio = time.perf_counter()
+    modelo_metricas = nombre_modelo(clave)
+    with instrumentacion.etapa("rejilla", modelo_metricas):
+        X, forma = construir_rejilla(codificador, data.get("entrada", {}), ejes)
+    with instrumentacion.etapa("inferencia", modelo_metricas):
+        matriz_probas = predecir_probabilidades(clave, X)
+    instrumentacion.prediccion(modelo_metricas, filas=n_puntos)
+    indices_clase = matriz_probas.argmax(axis=1).reshape(forma)
+    total_cambios, cambios = cambios_de_clase(indices_clase, ejes, max_cambios)
+    duracion_ms = round((time.perf_counter() - inicio) * 1000, 1)
+
+    log.info("🧭 Barrido", extra={"datos": {"modelo": clave, "puntos": n_puntos, "duracion_ms": duracion_ms}})
+
+    return {
+        "modelo": data.get("modelo"),
+        "version_modelo": registro_modelos.version_de(clave),
+        "clases": [str(c) for c in clases_modelo],
+        "ejes": [{"nombre": eje.nombre, "valores": eje.etiquetas} for eje in ejes],
+        "forma": list(forma),
+        "total_puntos": n_puntos,
+        # Índice de clase predicha y probabilidades por punto, anidados según "forma"
+        # (arreglos NumPy: respuesta_json los serializa sin pasar por listas de Python)
+        "prediccion": indices_clase,
+        "probabilidades": np.round(matriz_probas, 4).reshape(forma + (len(clases_modelo),)),
+        "total_cambios": total_cambios,
+        "cambios_de_clase": cambios,
+        "duracion_ms": duracion_ms,
+    }, 200
+
+@app.route("/predict/compare", methods=["POST"])
+def predict_compare():
+    """
+    Compara los modelos de una versión sobre la misma entrada:
+    {"entrada", "version"?, "modelos"?, "explicar"?, "grafico"?, "explicador"?}.
+    Por defecto todos los modelos de la versión activa, sin explicación y con
+    grafico="datos" (el PNG por modelo se pide con grafico="imagen").
+    """
+    try:
+        data = request.get_json(force=True)
+        grafico = data.get("grafico", "datos")
+        explicador = data.get("explicador") or EXPLICADOR_POR_DEFECTO
+        error = validar_opciones(grafico, explicador)
+        if error is None and data.get("modelos") is not None and not isinstance(data.get("modelos"), list):
+            error = "'modelos' debe ser una lista de nombres de modelo"
+        if error is not None:
+            return jsonify({"error": error}), 400
+
+        # Todas las claves de la misma versión, reservadas hasta que termine cada tarea
+        version, claves = registro_modelos.reservar_version(data.get("version"), data.get("modelos"))
+        if not claves:
+            return jsonify(error_modelo_no_disponible(data.get("version"))), 400
+        cuerpo = comparar_modelos(version, claves, data, grafico, explicador)
+        with instrumentacion.etapa("serializacion"):
+            return respuesta_json(cuerpo)
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error procesando la petición")
+        instrumentacion.error(type(e).__name__)
         return jsonify({"error": "Error interno", "mensaje": str(e)}), 500
 
+def puntuar_para_comparacion(clave, X, explicar, grafico, explicador):
+    """Tarea de /predict/compare para un modelo; libera su reserva al terminar"""
+    fijar_ruta("/predict/compare")
+    try:
+        modelo = modelos[clave]
+        modelo_metricas = nombre_modelo(clave)
+        with instrumentacion.etapa("inferencia", modelo_metricas):
+            probas = predecir_probabilidades(clave, X)[0]
+        instrumentacion.prediccion(modelo_metricas)
+        prediccion = modelo.classes_[probas.argmax()]
+        respuesta = construir_respuesta(
+            clave, X[0], prediccion, probas, explicar=explicar, grafico=grafico, explicador=explicador
+        )
+        respuesta["probabilidades"] = {str(c): round(float(p), 4) for c, p in zip(modelo.classes_, probas)}
+        return respuesta
+    finally:
+        registro_modelos.liberar(clave)
+
+def comparar_modelos(version, claves, data, grafico, explicador):
+    """Cuerpo de /predict/compare para claves ya reservadas ({nombre: clave})"""
+    sin_enviar = dict(claves)
+    try:
+        entrada_raw = data.get("entrada", {})
+        explicar = bool(data.get("explicar", False))
+
+        # Una codificación por conjunto de features (los modelos de una versión suelen compartirlo)
+        filas = {}
+        with instrumentacion.etapa("codificacion"):
+            for clave in claves.values():
+                codificador = codificadores[clave]
+                if tuple(codificador.used_features) not in filas:
+                    filas[tuple(codificador.used_features)] = codificador.codificar(entrada_raw)
+
+        tareas = {}
+        for nombre, clave in claves.items():
+            X = filas[tuple(codificadores[clave].used_features)]
+            tareas[nombre] = lambda clave=clave, X=X: puntuar_para_comparacion(clave, X, explicar, grafico, explicador)
+
+        inicio = time.perf_counter()
+        # Desde aquí cada tarea libera su propia reserva (también si vence el plazo)
+        sin_enviar = {}
+        resultados = comparador_modelos.ejecutar(tareas)
+        duracion_ms = round((time.perf_counter() - inicio) * 1000, 1)
+    finally:
+        for clave in sin_enviar.values():
+            registro_modelos.liberar(clave)
+
+    por_modelo = {}
+    predicciones = {}
+    probabilidades = {}
+    for nombre, (respuesta, error, latencia_ms) in resultados.items():
+        if error is not None:
+            log.warning("⚠️ Modelo fallido en la comparación", extra={"datos": {"modelo": nombre, "error": error}})
+            instrumentacion.error("ComparacionModelo")
+            por_modelo[nombre] = {"error": error}
+            continue
+        respuesta["latencia_ms"] = latencia_ms
+        por_modelo[nombre] = respuesta
+        predicciones[nombre] = respuesta["prediccion"]
+        probabilidades[nombre] = respuesta["probabilidades"]
+
+    log.info("⚖️ Comparación", extra={"datos": {
+        "version": version, "modelos": list(claves), "duracion_ms": duracion_ms,
+    }})
+
+    return {
+        "version_modelo": version,
+        "modelos": por_modelo,
+        "acuerdo": resumir_acuerdo(predicciones, probabilidades),
+        # latencia_ms ≈ la del modelo más lento; latencia_suma_ms es lo que costaría en serie
+        "latencia_ms": duracion_ms,
+        "latencia_suma_ms": round(sum(r.get("latencia_ms") or 0 for r in por_modelo.values()), 1),
+    }
+
+@app.route("/comparacion/estadisticas", methods=["GET"])
+def comparacion_estadisticas():
+    return jsonify(comparador_modelos.estadisticas())
+
+@app.route("/explain/<trabajo_id>", methods=["GET"])
+def explain(trabajo_id):
+    """Estado/resultado de un trabajo de explicación; con Accept: text/event-stream se emite por SSE"""
+    trabajo = gestor_explicaciones.obtener(trabajo_id)
+    if trabajo is None:
+        return jsonify({"error": "Trabajo no encontrado o expirado"}), 404
+
+    if "text/event-stream" not in request.headers.get("Accept", ""):
+        return jsonify(trabajo.a_diccionario())
+
+    def eventos():
+        while not trabajo.listo.wait(15):
+            yield ": en curso\n\n"
+        yield f"event: resultado\ndata: {json.dumps(trabajo.a_diccionario())}\n\n"
+
+    return Response(
+        stream_with_context(eventos()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/explain/estadisticas", methods=["GET"])
+def explain_estadisticas():
+    return jsonify(gestor_explicaciones.estadisticas())
+
+@app.route("/microlotes/estadisticas", methods=["GET"])
+def microlotes_estadisticas():
+    return jsonify({
+        "activo": USAR_MICROLOTES,
+        "modelos": {nombre: p.estadisticas() for nombre, p in list(planificadores.items())}
+    })
+
+@app.route("/modelos", methods=["GET"])
+def modelos_estadisticas():
+    """Versiones cargadas: activa, tiempo de carga, memoria y peticiones por modelo"""
+    return jsonify(registro_modelos.estadisticas())
+
+@app.route("/modelos/recargar", methods=["POST"])
+def modelos_recargar():
+    """Fuerza una revisión del directorio de modelos sin esperar al vigilante"""
+    registro_modelos.sincronizar()
+    return jsonify(registro_modelos.estadisticas())
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    metrica_cola_explicaciones.fijar(valor=gestor_explicaciones.estadisticas()["profundidad_cola"])
+    for version in registro_modelos.estadisticas()["versiones"]:
+        metrica_version_en_curso.fijar(version["version"], valor=version["en_curso"])
+    return Response(metricas.exponer(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/metrics/perfiles", methods=["GET"])
+def metrics_perfiles():
+    """Pilas muestreadas de las peticiones más lentas que PERFILADOR_UMBRAL_MS"""
+    return jsonify({
+        "activo": perfilador is not None,
+        "umbral_ms": PERFILADOR_UMBRAL_MS,
+        "perfiles": perfilador.obtener() if perfilador is not None else [],
+    })
+
+@app.route("/admision/estadisticas", methods=["GET"])
+def admision_estadisticas():
+    return jsonify(control_admision.estadisticas())
+
+@app.route("/auth/estadisticas", methods=["GET"])
+def auth_estadisticas():
+    return jsonify(servicio_contrasenas.estadisticas())
+
+@app.route("/cache/estadisticas", methods=["GET"])
+def cache_estadisticas():
+    return jsonify(cache_resultados.estadisticas())
+
+# Calentamiento y disponibilidad
+ENTRADA_CALENTAMIENTO = {
+    "B_MULTIPLE_CAE_n": 0, "B_ON_BEHALF_n": 0, "TYPE_OF_CONTRACT_w": 0,
+    "CAE_TYPE_4": 1, "GROUP_CPV_15": 1, "MAIN_ACTIVITY_general_public_services": 1,
+    "ISO_COUNTRY_CODE_lu": 1, "NUMBER_AWARDS": 1, "LOTS_NUMBER": 2,
+    "NUMBER_OFFERS": 2, "NUMBER_TENDERS_SME": 1,
+}
+
+estado_servicio = {"listo": False, "calentamiento_ms": None, "hasta_listo_ms": None}
+
+def calentar_claves(claves):
+    """Una petición sintética por modelo y por ruta de explicación"""
+    for clave in claves:
+        modelo = modelos[clave]
+        X = codificadores[clave].codificar_lote([ENTRADA_CALENTAMIENTO, ENTRADA_CALENTAMIENTO])
+        matriz_probas = predecir_probabilidades(clave, X)
+        probas = matriz_probas[0]
+        prediccion = modelo.classes_[probas.argmax()]
+        if not ARRANQUE_RAPIDO:
+            construir_respuesta(clave, X[0], prediccion, probas, explicar=True, grafico="imagen")
+        construir_respuesta(clave, X[0], prediccion, probas, explicar=False, grafico="datos")
+        if clave in explicadores_arboles:
+            generar_explicacion_arboles(clave, X[0], prediccion)
+
+def calentar():
+    """
+    Pasa una petición sintética por cada modelo y cada ruta de explicación
+    (import de lime, primera figura de matplotlib, primera validación de sklearn)
+    para que la primera petición real no pague esos costes.
+    Con ARRANQUE_RAPIDO solo se calienta la predicción (listo antes, LIME en la primera petición).
+    """
+    inicio = time.perf_counter()
+    calentar_claves(list(modelos))
+    estado_servicio["calentamiento_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+    estado_servicio["hasta_listo_ms"] = round((time.perf_counter() - INICIO_ARRANQUE) * 1000, 1)
+    estado_servicio["listo"] = True
+    log.info("🔥 Calentamiento completado en %s ms (listo a los %s ms del arranque)",
+             estado_servicio["calentamiento_ms"], estado_servicio["hasta_listo_ms"])
+
+def marcar_worker_listo():
+    """Tras el fork: recrea hilos propios del worker y publica su estado"""
+    reiniciar_tras_fork()
+    if not estado_servicio["listo"]:
+        calentar()
+    registrar_estado_worker(estado_servicio)
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Disponibilidad del worker que atiende (503 mientras no haya terminado el calentamiento)"""
+    registrar_estado_worker(estado_servicio)
+    cuerpo = dict(estado_servicio, pid=os.getpid(), memoria=memoria_proceso())
+    return jsonify(cuerpo), 200 if estado_servicio["listo"] else 503
+
+@app.route("/arranque", methods=["GET"])
+def arranque():
+    """Tiempos de arranque: importaciones, carga de cada versión y hasta estar listo"""
+    return jsonify(dict(
+        estado_arranque,
+        hasta_listo_ms=estado_servicio["hasta_listo_ms"],
+        calentamiento_ms=estado_servicio["calentamiento_ms"],
+        carga_modelos_ms={v["version"]: v["duracion_carga_ms"] for v in registro_modelos.estadisticas()["versiones"]},
+        importaciones=medidor_importaciones.resumen() if medidor_importaciones is not None else None,
+    ))
+
+@app.route("/workers", methods=["GET"])
+def workers():
+    """Memoria (RSS/PSS/compartida) de cada worker vivo"""
+    registrar_estado_worker(estado_servicio)
+    return jsonify({"workers": leer_estados_workers()})
+
+if os.environ.get("CALENTAR_AL_INICIAR", "1") == "1":
+    calentar()
+
+# Con gunicorn --preload el vigilante arranca en cada worker (marcar_worker_listo), no en el maestro
+if os.environ.get("MODELOS_VIGILAR_AL_INICIAR", "1") == "1":
+    registro_modelos.iniciar_vigilancia()
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
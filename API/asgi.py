@@ -0,0 +1,64 @@
+"""
+Punto de entrada ASGI para producción.
+
+/predict se atiende de forma asíncrona: el cuerpo pasa tal cual a la misma
+procesar_prediccion que usa Flask (mismas validaciones y mismos errores 400) y la
+inferencia + LIME corren en un pool de hilos, así el event loop nunca se bloquea.
+El resto de rutas (/login, /register, /logout, /, /explain, estadísticas) son las
+de la app Flask montada vía WSGI (a2wsgi), con las mismas sesiones y plantillas.
+
+Los modelos se cargan al importar este módulo; con gunicorn --preload se cargan
+una sola vez en el proceso maestro y los workers los comparten copy-on-write:
+    gunicorn -c gunicorn_conf.py asgi:app
+"""
+import asyncio
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from a2wsgi import WSGIMiddleware
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import Response
+
+import app as servicio
+
+
+# Pool dedicado a inferencia/LIME para no bloquear el event loop
+pool_inferencia = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("ASGI_HILOS_INFERENCIA", "4")),
+    thread_name_prefix="inferencia",
+)
+
+app = FastAPI(title="API Tesis 2025 - Duración de contratos")
+
+
+async def en_pool(funcion, *args):
+    return await asyncio.get_running_loop().run_in_executor(pool_inferencia, funcion, *args)
+
+
+@app.post("/predict")
+async def predict(request: Request, x_request_id: Optional[str] = Header(None)):
+    # El plazo se fija al llegar: la espera en el pool de inferencia también lo consume
+    limite = servicio.limite_desde_cabecera(request.headers.get(servicio.CABECERA_PLAZO))
+    id_peticion = x_request_id or uuid.uuid4().hex[:16]
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        cuerpo, codigo = await en_pool(servicio.procesar_prediccion_observada, data, "/predict", id_peticion, limite)
+    else:
+        cuerpo, codigo = {"error": "El cuerpo debe ser un objeto JSON"}, 400
+    cabeceras = {"X-Request-ID": id_peticion, "Vary": "Accept-Encoding", **servicio.cabeceras_respuesta(cuerpo, codigo)}
+    with servicio.instrumentacion.etapa("serializacion", ruta="/predict"):
+        contenido, codificacion = servicio.comprimir(
+            servicio.serializar(cuerpo), request.headers.get("accept-encoding"), servicio.COMPRESION_MIN_BYTES
+        )
+    if codificacion is not None:
+        cabeceras["Content-Encoding"] = codificacion
+    return Response(contenido, status_code=codigo, headers=cabeceras, media_type="application/json")
+
+
+# Resto de rutas: la app Flask (sesiones, plantillas, /explain, estadísticas)
+app.mount("/", WSGIMiddleware(servicio.app))
@@ -0,0 +1,30 @@
+"""
+Configuración de gunicorn para el modo ASGI (workers uvicorn).
+
+preload_app carga app.py (modelos, codificadores, explicadores) en el maestro
+antes de hacer fork, de modo que los workers comparten esa memoria copy-on-write.
+Al importarse en el maestro, app.py ya ejecuta el calentamiento; gc.freeze()
+antes de cada fork evita que el recolector toque (y copie) esas páginas.
+"""
+import gc
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WORKERS", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# El vigilante del directorio de modelos arranca en cada worker, no en el maestro
+os.environ.setdefault("MODELOS_VIGILAR_AL_INICIAR", "0")
+timeout = int(os.environ.get("TIMEOUT_WORKER", "120"))
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Los hilos del maestro (p. ej. micro-lotes) no se heredan con fork();
+    # el worker no atiende peticiones hasta que termina este hook
+    import app as servicio
+    servicio.marcar_worker_listo()
@@ -0,0 +1,78 @@
+"""
+Benchmark de arranque en frío: lanza procesos nuevos que importan app.py (con
+calentamiento) y mide el tiempo hasta estar listo, en modo normal y con
+ARRANQUE_RAPIDO=1 (artefacto rápido, lime y matplotlib diferidos). La primera
+ejecución del modo rápido genera el artefacto y no se cuenta.
+
+Uso:
+    python benchmarks/bench_arranque.py --repeticiones 5
+    python benchmarks/bench_arranque.py --sintetico --importaciones
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import comun
+
+HIJO = """
+import json, time
+inicio = time.perf_counter()
+import app
+import_app_ms = round((time.perf_counter() - inicio) * 1000, 1)
+with app.app.app_context():
+    datos = app.arranque().get_json()
+print(json.dumps(dict(datos, import_app_ms=import_app_ms)))
+"""
+
+
+def arrancar(entorno):
+    inicio = time.perf_counter()
+    salida = subprocess.run(
+        [sys.executable, "-c", HIJO], cwd=comun.API_DIR, env=entorno, capture_output=True, text=True, check=True
+    ).stdout
+    total_ms = (time.perf_counter() - inicio) * 1000
+    datos = json.loads(salida.strip().splitlines()[-1])
+    datos["proceso_ms"] = round(total_ms, 1)
+    return datos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sintetico", action="store_true")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--importaciones", action="store_true", help="Muestra los módulos más lentos de importar")
+    args = parser.parse_args()
+
+    entorno = dict(os.environ, LOG_NIVEL="WARNING", MODELOS_VIGILAR_AL_INICIAR="0", CALENTAR_AL_INICIAR="1")
+    if args.sintetico or not os.path.exists(comun.MODELO_REAL):
+        from modelo_sintetico import crear_modelos_sinteticos
+        directorio = tempfile.mkdtemp(prefix="bench_arranque_")
+        crear_modelos_sinteticos(directorio)
+        entorno["MODELOS_DIR"] = directorio
+    if args.importaciones:
+        entorno["ARRANQUE_MEDIR_IMPORTACIONES"] = "1"
+
+    for modo, rapido in (("normal", "0"), ("rapido", "1")):
+        entorno_modo = dict(entorno, ARRANQUE_RAPIDO=rapido)
+        if rapido == "1":
+            arrancar(entorno_modo)
+        ejecuciones = [arrancar(entorno_modo) for _ in range(args.repeticiones)]
+        resumen = {
+            clave: comun.resumir([e[clave] / 1000 for e in ejecuciones])
+            for clave in ("proceso_ms", "import_app_ms", "hasta_listo_ms")
+        }
+        print(f"{modo}: proceso p50 {resumen['proceso_ms']['p50_ms']:.0f} ms | "
+              f"import app p50 {resumen['import_app_ms']['p50_ms']:.0f} ms | "
+              f"listo p50 {resumen['hasta_listo_ms']['p50_ms']:.0f} ms | "
+              f"artefactos {ejecuciones[-1]['artefactos'] or 'pkl'}")
+        if args.importaciones and ejecuciones[-1].get("importaciones"):
+            for modulo, ms in ejecuciones[-1]["importaciones"]["mas_lentos_ms"].items():
+                print(f"    {modulo:<30} {ms:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Generador de carga en proceso: peticiones POST /predict concurrentes a través
+del test client de Flask (sin red ni servidor), con el mismo pipeline, hooks
+de métricas y caché que en producción.
+
+Cada escenario se ejecuta con cada nivel de concurrencia; las entradas se
+generan con semilla fija y distinta por nivel para no medir la caché de
+respuestas (--repetir-entrada la mide a propósito).
+
+Uso:
+    python benchmarks/bench_carga.py --concurrencia 1 4 8 --peticiones 200
+    python benchmarks/bench_carga.py --escenarios lime_imagen arboles_datos --salida carga.json
+"""
+import argparse
+import threading
+import time
+import warnings
+
+import comun
+
+warnings.filterwarnings("ignore")
+
+ESCENARIOS = {
+    "lime_imagen": {"explicador": "lime", "grafico": "imagen"},
+    "lime_datos": {"explicador": "lime", "grafico": "datos"},
+    "arboles_datos": {"explicador": "arboles", "grafico": "datos"},
+    "asincrono": {"explicador": "lime", "grafico": "datos", "asincrono": True},
+}
+
+
+def generar_carga(app, cuerpos, concurrencia):
+    """Reparte los cuerpos entre `concurrencia` hilos; devuelve (latencias, errores, duración)"""
+    latencias = []
+    errores = [0]
+    lock = threading.Lock()
+    siguiente = iter(range(len(cuerpos)))
+
+    def cliente():
+        local = []
+        fallos = 0
+        with app.test_client() as http:
+            while True:
+                with lock:
+                    i = next(siguiente, None)
+                if i is None:
+                    break
+                inicio = time.perf_counter()
+                respuesta = http.post("/predict", json=cuerpos[i])
+                local.append(time.perf_counter() - inicio)
+                if respuesta.status_code != 200:
+                    fallos += 1
+        with lock:
+            latencias.extend(local)
+            errores[0] += fallos
+
+    hilos = [threading.Thread(target=cliente) for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return latencias, errores[0], time.perf_counter() - inicio
+
+
+def ejecutar(app, args):
+    from modelo_sintetico import entradas_aleatorias
+
+    resultados = {}
+    for nombre in args.escenarios:
+        opciones = ESCENARIOS[nombre]
+        for nivel, concurrencia in enumerate(args.concurrencia):
+            semilla = args.semilla + 1000 * nivel
+            entradas = entradas_aleatorias(1 if args.repetir_entrada else args.peticiones, semilla)
+            cuerpos = [
+                dict(opciones, modelo=args.modelo, entrada=entradas[i % len(entradas)])
+                for i in range(args.peticiones)
+            ]
+            # Calentamiento fuera de la medición con otras entradas (no deja aciertos de caché)
+            calentamiento = [dict(opciones, modelo=args.modelo, entrada=e)
+                             for e in entradas_aleatorias(concurrencia, semilla + 500)]
+            generar_carga(app, calentamiento, concurrencia)
+            latencias, errores, duracion = generar_carga(app, cuerpos, concurrencia)
+            resumen = comun.resumir(latencias, duracion)
+            resumen["errores"] = errores
+            resumen["concurrencia"] = concurrencia
+            resultados[f"carga/{args.modelo}/{nombre}/c{concurrencia}"] = resumen
+    return resultados
+
+
+def agregar_argumentos(parser):
+    parser.add_argument("--modelo", default="random_forest")
+    parser.add_argument("--escenarios", nargs="+", choices=sorted(ESCENARIOS), default=["lime_imagen", "arboles_datos"])
+    parser.add_argument("--concurrencia", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--peticiones", type=int, default=200, help="Peticiones por escenario y nivel")
+    parser.add_argument("--repetir-entrada", action="store_true", help="Misma entrada en todas (mide la caché)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comun.agregar_argumentos_entorno(parser)
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    app, origen = comun.cargar_app(args)
+    datos = {"metadatos": comun.metadatos(origen, args), "resultados": ejecutar(app.app, args)}
+    comun.finalizar(datos, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: predict_proba de sklearn frente a la ruta rápida y al ensamble aplanado
+(Util.ensamble_plano) para entradas de 1, 100 y 5000 filas.
+
+Uso:
+    python benchmarks/bench_ensamble_plano.py --repeticiones 50
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "API"))
+
+import joblib
+import numpy as np
+
+from Util.ensamble_plano import aplanar_modelo, verificar_equivalencia
+from Util.prediccion_rapida import crear_predict_proba_rapido
+
+warnings.filterwarnings("ignore")
+
+TAMANOS = (1, 100, 5000)
+
+
+def medir(funcion, X, repeticiones):
+    funcion(X)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(X)
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo-path", default=os.path.join(RAIZ, "API", "model", "modelos_experimento_B.pkl"))
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    modelos = joblib.load(args.modelo_path)
+    rng = np.random.default_rng(0)
+    for nombre, modelo in modelos.items():
+        plano = aplanar_modelo(modelo)
+        if plano is None:
+            print(f"{nombre}: tipo {type(modelo).__name__} no soportado, se omite")
+            continue
+        rapido = crear_predict_proba_rapido(modelo)
+        for n in TAMANOS:
+            X = rng.integers(0, 5, (n, modelo.n_features_in_)).astype(np.float64)
+            error_max, _ = verificar_equivalencia(modelo, plano, X)
+            t_sklearn = medir(modelo.predict_proba, X, args.repeticiones)
+            t_rapido = medir(rapido, X, args.repeticiones)
+            t_plano = medir(plano.predict_proba, X, args.repeticiones)
+            print(f"{nombre:>18} n={n:>5}: sklearn {t_sklearn:8.3f} ms | rápido {t_rapido:8.3f} ms | "
+                  f"plano {t_plano:8.3f} ms (x{t_sklearn / t_plano:.1f}) | error máx. {error_max:.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Microbenchmarks de cada etapa de /predict, sobre la app importada (los mismos
+componentes que sirve la API): mapeo de campos, validación por diccionario
+(referencia de las reglas de CodificadorEntrada), construcción del DataFrame, codificación NumPy, predict_proba, LIME,
+explicación por árboles, plot_probabilidades_clases, construir_tabla_lime,
+generar_sugerencia_group_duration y la serialización/compresión de la respuesta.
+
+Las entradas se generan con semilla fija (modelo_sintetico.entradas_aleatorias)
+y se recorren en ciclo, así dos ejecuciones miden exactamente lo mismo.
+
+Uso:
+    python benchmarks/bench_etapas.py --salida etapas.json
+    python benchmarks/bench_etapas.py --base etapas.json --tolerancia 0.2
+"""
+import argparse
+import itertools
+import json
+import time
+import warnings
+
+import comun
+from Util.codificador import CAMPOS_MINIMO_UNO, CAMPOS_NUMERICOS, GRUPOS_ONE_HOT
+
+warnings.filterwarnings("ignore")
+
+
+def validar_entrada_modelo(entrada_mapeada):
+    """
+    Ruta original por diccionario (una entrada a la vez) con las reglas de
+    Util/codificador.py; sirve de referencia para medir la versión vectorizada.
+    """
+    for columnas, defecto, exclusivo in GRUPOS_ONE_HOT.values():
+        seleccionadas = [c for c in columnas if entrada_mapeada.get(c, 0) == 1]
+        if sum(entrada_mapeada.get(c, 0) for c in columnas) == 0:
+            entrada_mapeada[defecto] = 1
+        elif exclusivo and len(seleccionadas) > 1:
+            # Mantener solo la primera seleccionada
+            for c in seleccionadas[1:]:
+                entrada_mapeada[c] = 0
+
+    for campo in CAMPOS_NUMERICOS:
+        valor = entrada_mapeada.get(campo, 0)
+        if valor < 0:
+            entrada_mapeada[campo] = 0
+        elif valor == 0 and campo in CAMPOS_MINIMO_UNO:
+            entrada_mapeada[campo] = 1
+
+    # NUMBER_TENDERS_SME no puede ser mayor que NUMBER_OFFERS
+    if entrada_mapeada.get("NUMBER_TENDERS_SME", 0) > entrada_mapeada.get("NUMBER_OFFERS", 0):
+        entrada_mapeada["NUMBER_TENDERS_SME"] = entrada_mapeada.get("NUMBER_OFFERS", 0)
+    return entrada_mapeada
+
+
+def medir_etapa(funcion, argumentos, repeticiones, calentamiento=3):
+    """Latencia de cada llamada (s); argumentos es una lista que se recorre en ciclo"""
+    ciclo = itertools.cycle(argumentos)
+    for _ in range(calentamiento):
+        funcion(next(ciclo))
+    latencias = []
+    for _ in range(repeticiones):
+        arg = next(ciclo)
+        inicio = time.perf_counter()
+        funcion(arg)
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+
+def ejecutar(app, args):
+    import pandas as pd
+    from modelo_sintetico import entradas_aleatorias
+    from Util.Util import construir_tabla_lime, plot_probabilidades_clases
+
+    resultados = {}
+    inverso = {backend: frontend for frontend, backend in app.CAMPO_MAPEO_COMPLETO.items()}
+    entradas = [{inverso.get(k, k): v for k, v in e.items()} for e in entradas_aleatorias(args.entradas, args.semilla)]
+
+    for nombre in args.modelos:
+        clave = app.registro_modelos.reservar(nombre, None)
+        if clave is None:
+            print(f"⚠️ {nombre}: no disponible en el artefacto cargado")
+            continue
+        try:
+            modelo = app.modelos[clave]
+            codificador = app.codificadores[clave]
+            used = codificador.used_features
+
+            # Ruta original con diccionarios y pandas
+            mapeadas = [{app.CAMPO_MAPEO_COMPLETO.get(k, k): v for k, v in e.items()} for e in entradas]
+            validadas = [validar_entrada_modelo(dict(m)) for m in mapeadas]
+            filas = [codificador.codificar(e) for e in entradas]
+            probas = [app.predecir_probabilidades(clave, X)[0] for X in filas]
+            predicciones = [modelo.classes_[p.argmax()] for p in probas]
+            casos = list(zip(filas, probas, predicciones))
+
+            def lime(caso):
+                X, _, prediccion = caso
+                return app.generar_explicacion_lime(clave, X[0], prediccion)
+
+            explicador = app.obtener_explicador_lime(clave)
+            if explicador is None:
+                explicador = app.crear_explicador(filas[0], used, modelo.classes_)
+            X0, _, _ = casos[0]
+            exp = explicador.explain_instance(
+                X0[0], app.predictores_rapidos[clave], num_features=len(used), num_samples=args.lime_muestras
+            )
+            valores = dict(zip(used, X0[0].tolist()))
+
+            _, probas0, prediccion0 = casos[0]
+            respuesta = app.construir_respuesta(clave, X0[0], prediccion0, probas0, explicar=True, grafico="imagen")
+            json_respuesta = app.serializar(respuesta)
+
+            etapas = {
+                "mapeo": (lambda e: {app.CAMPO_MAPEO_COMPLETO.get(k, k): v for k, v in e.items()}, entradas),
+                "validar_entrada_modelo": (lambda m: validar_entrada_modelo(dict(m)), mapeadas),
+                "dataframe": (lambda v: pd.DataFrame([v]).reindex(columns=used, fill_value=0), validadas),
+                "codificacion": (codificador.codificar, entradas),
+                "predict_proba": (lambda X: app.predecir_probabilidades(clave, X), filas),
+                "predict_proba_sklearn": (
+                    lambda v: modelo.predict_proba(pd.DataFrame([v]).reindex(columns=used, fill_value=0)), validadas),
+                "plot_probabilidades_clases": (lambda c: plot_probabilidades_clases(c[1], modelo.classes_), casos),
+                "construir_tabla_lime": (lambda _: construir_tabla_lime(exp, valores), [None]),
+                "generar_sugerencia_group_duration": (
+                    lambda c: app.generar_sugerencia_group_duration(str(c[2]), c[1]), casos),
+                "json_stdlib": (lambda r: json.dumps(r), [respuesta]),
+                "serializar": (app.serializar, [respuesta]),
+                "comprimir": (lambda d: app.comprimir(d, "br, gzip"), [json_respuesta]),
+            }
+            for etapa, (funcion, argumentos) in etapas.items():
+                resultados[f"etapa/{nombre}/{etapa}"] = comun.resumir(
+                    medir_etapa(funcion, argumentos, args.repeticiones))
+
+            resultados[f"etapa/{nombre}/lime"] = comun.resumir(
+                medir_etapa(lime, casos, args.repeticiones_lime, calentamiento=1))
+            if clave in app.explicadores_arboles:
+                resultados[f"etapa/{nombre}/arboles"] = comun.resumir(medir_etapa(
+                    lambda c: app.generar_explicacion_arboles(clave, c[0][0], c[2]), casos, args.repeticiones))
+        finally:
+            app.registro_modelos.liberar(clave)
+    return resultados
+
+
+def agregar_argumentos(parser):
+    parser.add_argument("--modelos", nargs="+", default=["random_forest", "gradient_boosting"])
+    parser.add_argument("--entradas", type=int, default=50, help="Entradas distintas recorridas en ciclo")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--repeticiones-lime", type=int, default=20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comun.agregar_argumentos_entorno(parser)
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    app, origen = comun.cargar_app(args)
+    datos = {"metadatos": comun.metadatos(origen, args), "resultados": ejecutar(app, args)}
+    comun.finalizar(datos, args)
+
+
+if __name__ == "__main__":
+    main()
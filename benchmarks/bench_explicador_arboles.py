@@ -0,0 +1,132 @@
+"""
+Benchmark: explicación LIME frente a contribuciones exactas por árboles
+(Util.explicador_arboles), en latencia y estabilidad.
+
+Estabilidad: se repite la explicación con distintas semillas de LIME y se mide
+el solapamiento medio (Jaccard) del top-k de features y la desviación de los
+pesos. Las contribuciones por árboles son deterministas; además se comprueba
+que en bosques sesgo + suma de contribuciones reproduce predict_proba.
+
+Uso:
+    python benchmarks/bench_explicador_arboles.py --num-samples 5000 --repeticiones 5
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+import warnings
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "API"))
+
+import joblib
+import numpy as np
+
+from Util.codificador import CodificadorEntrada
+from Util.explicador_arboles import crear_explicador_arboles
+from Util.explicador_lime import cargar_fondo, crear_explicador
+from Util.prediccion_rapida import crear_predict_proba_rapido
+
+warnings.filterwarnings("ignore")
+
+ENTRADA_EJEMPLO = {
+    "B_MULTIPLE_CAE_n": 0, "B_ON_BEHALF_n": 0, "TYPE_OF_CONTRACT_w": 0,
+    "CAE_TYPE_4": 1, "GROUP_CPV_15": 1, "MAIN_ACTIVITY_general_public_services": 1,
+    "ISO_COUNTRY_CODE_lu": 1, "NUMBER_AWARDS": 1, "LOTS_NUMBER": 2,
+    "NUMBER_OFFERS": 2, "NUMBER_TENDERS_SME": 1,
+}
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos))
+
+
+def pesos_por_feature(exp, etiqueta, used):
+    """Vector de pesos en el orden de used a partir de as_list ('FEATURE ...' -> peso)"""
+    pesos = dict.fromkeys(used, 0.0)
+    for descripcion, peso in exp.as_list(label=etiqueta):
+        for token in descripcion.split():
+            if token in pesos:
+                pesos[token] = peso
+                break
+    return np.array([pesos[f] for f in used])
+
+
+def top_k(pesos, k):
+    return set(np.argsort(-np.abs(pesos))[:k].tolist())
+
+
+def estabilidad(vectores, k):
+    jaccard = [len(top_k(a, k) & top_k(b, k)) / len(top_k(a, k) | top_k(b, k))
+               for a, b in itertools.combinations(vectores, 2)]
+    return float(np.mean(jaccard)), float(np.std(vectores, axis=0).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo-path", default=os.path.join(RAIZ, "API", "model", "modelos_experimento_B.pkl"))
+    parser.add_argument("--num-samples", type=int, default=5000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    modelos = joblib.load(args.modelo_path)
+    for nombre in ("random_forest", "gradient_boosting"):
+        modelo = modelos.get(nombre)
+        if modelo is None:
+            continue
+        used = getattr(modelo, "used_features", None) or modelos["random_forest"].used_features
+        fila = CodificadorEntrada(used).codificar(ENTRADA_EJEMPLO)[0]
+        predict_proba = crear_predict_proba_rapido(modelo)
+        probas = predict_proba(fila.reshape(1, -1))[0]
+        etiqueta = int(probas.argmax())
+
+        arboles = crear_explicador_arboles(modelo, used)
+        if arboles is None:
+            print(f"⚠️ {nombre}: tipo {type(modelo).__name__} no soportado por el explicador de árboles")
+            continue
+
+        fondo = cargar_fondo(used)
+        if fondo is None:
+            fondo = fila.reshape(1, -1)
+
+        def explicar_lime(semilla):
+            explainer = crear_explicador(fondo, used, modelo.classes_, random_state=semilla)
+            return explainer.explain_instance(
+                fila, predict_proba, labels=(etiqueta,), num_features=len(used), num_samples=args.num_samples
+            )
+
+        t_lime = medir(lambda: explicar_lime(0), args.repeticiones)
+        t_arboles = medir(lambda: arboles.explain_instance(fila, etiqueta), args.repeticiones)
+
+        vectores_lime = [pesos_por_feature(explicar_lime(s), etiqueta, used) for s in range(args.repeticiones)]
+        vectores_arboles = [pesos_por_feature(arboles.explain_instance(fila, etiqueta), etiqueta, used)
+                            for _ in range(args.repeticiones)]
+        jaccard_lime, desviacion_lime = estabilidad(vectores_lime, args.top_k)
+        jaccard_arboles, desviacion_arboles = estabilidad(vectores_arboles, args.top_k)
+
+        contrib, sesgo = arboles.contribuciones(fila)
+        if arboles.bosque:
+            error = float(np.abs(sesgo + contrib.sum(axis=0) - probas).max())
+            exactitud = f"error sesgo+contribuciones vs predict_proba {error:.1e}"
+        else:
+            decision = np.atleast_1d(modelo.decision_function(fila.reshape(1, -1))[0])
+            reconstruido = (sesgo + contrib.sum(axis=0))[-len(decision):]
+            error = float(np.abs(reconstruido - decision).max())
+            exactitud = f"error sesgo+contribuciones vs decision_function {error:.1e}"
+
+        print(f"{nombre}: LIME {t_lime * 1000:.1f} ms | árboles {t_arboles * 1000:.2f} ms | "
+              f"x{t_lime / t_arboles:.0f} ({args.num_samples} muestras)")
+        print(f"  estabilidad top-{args.top_k} (Jaccard medio): LIME {jaccard_lime:.2f} | árboles {jaccard_arboles:.2f}; "
+              f"desviación media de pesos: LIME {desviacion_lime:.2e} | árboles {desviacion_arboles:.2e}")
+        print(f"  {exactitud}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: tiempo por explicación LIME con el wrapper original (DataFrame por
+lote) frente a la ruta rápida de Util.prediccion_rapida.
+
+Uso:
+    python benchmarks/bench_lime.py --num-samples 5000 --repeticiones 5
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "API"))
+
+import joblib
+import numpy as np
+import pandas as pd
+from lime.lime_tabular import LimeTabularExplainer
+
+from Util.codificador import CodificadorEntrada
+from Util.prediccion_rapida import crear_predict_proba_rapido
+
+warnings.filterwarnings("ignore")
+
+ENTRADA_EJEMPLO = {
+    "B_MULTIPLE_CAE_n": 0, "B_ON_BEHALF_n": 0, "TYPE_OF_CONTRACT_w": 0,
+    "CAE_TYPE_4": 1, "GROUP_CPV_15": 1, "MAIN_ACTIVITY_general_public_services": 1,
+    "ISO_COUNTRY_CODE_lu": 1, "NUMBER_AWARDS": 1, "LOTS_NUMBER": 2,
+    "NUMBER_OFFERS": 2, "NUMBER_TENDERS_SME": 1,
+}
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo-path", default=os.path.join(RAIZ, "API", "model", "modelos_experimento_B.pkl"))
+    parser.add_argument("--num-samples", type=int, default=5000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    modelos = joblib.load(args.modelo_path)
+    for nombre in ("random_forest", "gradient_boosting"):
+        modelo = modelos.get(nombre)
+        if modelo is None:
+            continue
+        used = getattr(modelo, "used_features", None) or modelos["random_forest"].used_features
+        fila = CodificadorEntrada(used).codificar(ENTRADA_EJEMPLO)[0]
+
+        def wrapper_original(x_array):
+            return modelo.predict_proba(pd.DataFrame(x_array, columns=used))
+
+        wrapper_rapido = crear_predict_proba_rapido(modelo)
+
+        explainer = LimeTabularExplainer(
+            training_data=fila.reshape(1, -1), feature_names=used,
+            class_names=modelo.classes_, mode="classification",
+        )
+
+        def explicar(wrapper):
+            return lambda: explainer.explain_instance(
+                fila, wrapper, num_features=len(used), num_samples=args.num_samples
+            )
+
+        X = np.random.default_rng(0).random((args.num_samples, len(used)))
+        diferencia = np.abs(wrapper_original(X) - wrapper_rapido(X)).max()
+
+        t_original = medir(explicar(wrapper_original), args.repeticiones)
+        t_rapido = medir(explicar(wrapper_rapido), args.repeticiones)
+        print(f"{nombre}: original {t_original * 1000:.1f} ms | rápido {t_rapido * 1000:.1f} ms | "
+              f"x{t_original / t_rapido:.2f} | diferencia máx. probas {diferencia:.1e} "
+              f"({args.num_samples} muestras)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Utilidades compartidas por la suite de benchmarks: preparación del entorno
+(modelo real o sintético), resumen de latencias y comparación con una línea base.
+"""
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(RAIZ, "API")
+MODELO_REAL = os.path.join(API_DIR, "model", "modelos_experimento_B.pkl")
+
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+
+def agregar_argumentos_entorno(parser):
+    parser.add_argument("--sintetico", action="store_true",
+                        help="Usa el modelo sintético aunque exista model/modelos_experimento_B.pkl")
+    parser.add_argument("--lime-muestras", type=int, default=1000)
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla de las entradas generadas")
+    parser.add_argument("--salida", help="Escribe los resultados en este JSON")
+    parser.add_argument("--base", help="JSON de una ejecución anterior con la que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.15,
+                        help="Empeoramiento relativo permitido antes de marcar regresión (0.15 = 15%%)")
+    parser.add_argument("--tolerancia-ms", type=float, default=0.05,
+                        help="Diferencia absoluta (ms por operación) por debajo de la cual no hay regresión")
+
+
+def cargar_app(args):
+    """
+    Importa app.py para la suite: modelo real si existe (salvo --sintetico), si no
+    el sintético en un directorio temporal. Sin calentamiento, vigilante ni logs INFO.
+    """
+    sintetico = args.sintetico or not os.path.exists(MODELO_REAL)
+    if sintetico:
+        from modelo_sintetico import crear_modelos_sinteticos
+        directorio = tempfile.mkdtemp(prefix="bench_modelos_")
+        crear_modelos_sinteticos(directorio)
+        os.environ["MODELOS_DIR"] = directorio
+    os.environ.setdefault("CALENTAR_AL_INICIAR", "0")
+    os.environ.setdefault("MODELOS_VIGILAR_AL_INICIAR", "0")
+    os.environ.setdefault("LOG_NIVEL", "WARNING")
+    os.environ["LIME_NUM_SAMPLES"] = str(args.lime_muestras)
+    import app
+    return app, ("sintetico" if sintetico else "real")
+
+
+def resumir(latencias_s, duracion_s=None):
+    """p50/p95/p99/media en ms y, con la duración total, rendimiento por segundo"""
+    ordenadas = sorted(latencias_s)
+    n = len(ordenadas)
+    if n == 0:
+        return {"n": 0}
+
+    def percentil(p):
+        return round(ordenadas[min(n - 1, int(round(p * (n - 1))))] * 1000, 3)
+
+    resumen = {
+        "n": n,
+        "p50_ms": percentil(0.50),
+        "p95_ms": percentil(0.95),
+        "p99_ms": percentil(0.99),
+        "media_ms": round(sum(ordenadas) / n * 1000, 3),
+    }
+    total = duracion_s if duracion_s is not None else sum(ordenadas)
+    resumen["por_segundo"] = round(n / total, 2) if total > 0 else None
+    return resumen
+
+
+def metadatos(origen_modelo, args):
+    return {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "modelo": origen_modelo,
+        "lime_muestras": args.lime_muestras,
+    }
+
+
+def guardar(ruta, datos):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+
+
+def comparar(actual, base, tolerancia, tolerancia_ms=0.05):
+    """
+    Compara p50/p95 (más alto = peor) y por_segundo (más bajo = peor) de cada
+    resultado presente en ambas ejecuciones. Devuelve la lista de regresiones.
+    Hace falta superar las dos tolerancias: la relativa y la absoluta en ms por
+    operación, así las etapas de microsegundos no se marcan por ruido.
+    """
+    regresiones = []
+    for nombre, resultado in actual["resultados"].items():
+        anterior = base.get("resultados", {}).get(nombre)
+        if not anterior:
+            continue
+        for metrica in ("p50_ms", "p95_ms"):
+            a, b = resultado.get(metrica), anterior.get(metrica)
+            if a is not None and b and a > b * (1 + tolerancia) and a - b > tolerancia_ms:
+                regresiones.append((nombre, metrica, b, a))
+        a, b = resultado.get("por_segundo"), anterior.get("por_segundo")
+        if a and b and a < b * (1 - tolerancia) and 1000 / a - 1000 / b > tolerancia_ms:
+            regresiones.append((nombre, "por_segundo", b, a))
+    return regresiones
+
+
+def imprimir_tabla(resultados):
+    print(f"{'resultado':<40} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'/s':>10}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<40} {r.get('n', 0):>6} {r.get('p50_ms', 0):>10.3f} {r.get('p95_ms', 0):>10.3f} "
+              f"{r.get('p99_ms', 0):>10.3f} {r.get('por_segundo') or 0:>10.1f}")
+
+
+def finalizar(datos, args):
+    """Imprime, guarda y compara con la base; sale con código 1 si hay regresiones"""
+    imprimir_tabla(datos["resultados"])
+    if args.salida:
+        guardar(args.salida, datos)
+        print(f"💾 Resultados en {args.salida}")
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(datos, base, args.tolerancia, args.tolerancia_ms)
+        if regresiones:
+            print(f"❌ {len(regresiones)} regresión(es) respecto a {args.base} (tolerancia {args.tolerancia:.0%}, {args.tolerancia_ms} ms):")
+            for nombre, metrica, antes, ahora in regresiones:
+                print(f"   {nombre} {metrica}: {antes} -> {ahora}")
+            raise SystemExit(1)
+        print(f"✅ Sin regresiones respecto a {args.base} (tolerancia {args.tolerancia:.0%}, {args.tolerancia_ms} ms)")
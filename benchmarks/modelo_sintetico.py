@@ -0,0 +1,101 @@
+"""
+Modelo sintético para los benchmarks: mismo contrato que
+model/modelos_experimento_B.pkl (diccionario {"random_forest", "gradient_boosting"},
+used_features en el bosque, clases como intervalos de meses) pero entrenado en
+segundos con datos generados, para que la suite corra sin el artefacto real.
+
+Uso:
+    python benchmarks/modelo_sintetico.py /tmp/modelos_bench --arboles 100
+"""
+import argparse
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.join(RAIZ, "API") not in sys.path:
+    sys.path.insert(0, os.path.join(RAIZ, "API"))
+
+import joblib
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+from Util.codificador import CAMPOS_NUMERICOS, CodificadorEntrada, GRUPOS_ONE_HOT
+
+FEATURES_BINARIAS = ["B_MULTIPLE_CAE_n", "B_ON_BEHALF_n", "TYPE_OF_CONTRACT_w"]
+USED_FEATURES = (
+    FEATURES_BINARIAS
+    + [c for columnas, _, _ in GRUPOS_ONE_HOT.values() for c in columnas]
+    + CAMPOS_NUMERICOS
+)
+CLASES = ["(0.0, 6.0]", "(6.0, 12.0]", "(12.0, 24.0]", "(24.0, 48.0]"]
+NOMBRE_ARTEFACTO = "modelos_experimento_B.pkl"
+
+
+def entradas_aleatorias(n, semilla=0):
+    """Diccionarios con la forma del formulario (claves del backend), reproducibles"""
+    rng = np.random.default_rng(semilla)
+    entradas = []
+    for _ in range(n):
+        entrada = {f: int(rng.integers(0, 2)) for f in FEATURES_BINARIAS}
+        for columnas, _, _ in GRUPOS_ONE_HOT.values():
+            entrada[columnas[int(rng.integers(len(columnas)))]] = 1
+        ofertas = int(rng.integers(1, 30))
+        entrada.update({
+            "NUMBER_AWARDS": int(rng.integers(1, 10)),
+            "LOTS_NUMBER": int(rng.integers(1, 20)),
+            "NUMBER_OFFERS": ofertas,
+            "NUMBER_TENDERS_SME": int(rng.integers(0, ofertas + 1)),
+        })
+        entradas.append(entrada)
+    return entradas
+
+
+def generar_datos(n, semilla=0):
+    """Matriz ya validada (reglas de CodificadorEntrada) y una etiqueta que depende de ella"""
+    X = CodificadorEntrada(USED_FEATURES).codificar_lote(entradas_aleatorias(n, semilla))
+    columna = {nombre: i for i, nombre in enumerate(USED_FEATURES)}
+    rng = np.random.default_rng(semilla + 1)
+    puntaje = (
+        0.08 * X[:, columna["LOTS_NUMBER"]]
+        + 0.05 * X[:, columna["NUMBER_OFFERS"]]
+        + 0.6 * X[:, columna["TYPE_OF_CONTRACT_w"]]
+        + 0.4 * X[:, columna["GROUP_CPV_45"]]
+        - 0.3 * X[:, columna["MAIN_ACTIVITY_health"]]
+        + rng.normal(0, 0.35, n)
+    )
+    cortes = np.quantile(puntaje, [0.25, 0.5, 0.75])
+    y = np.array(CLASES, dtype=object)[np.searchsorted(cortes, puntaje)]
+    return X, y
+
+
+def crear_modelos_sinteticos(directorio, n_muestras=4000, arboles=100, semilla=0):
+    """Entrena y guarda el artefacto en directorio; devuelve su ruta"""
+    X, y = generar_datos(n_muestras, semilla)
+    bosque = RandomForestClassifier(
+        n_estimators=arboles, max_depth=12, class_weight="balanced", random_state=semilla, n_jobs=1
+    ).fit(X, y)
+    bosque.used_features = list(USED_FEATURES)
+    boosting = GradientBoostingClassifier(
+        n_estimators=arboles, max_depth=3, random_state=semilla
+    ).fit(X, y)
+    boosting.used_features = list(USED_FEATURES)
+
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, NOMBRE_ARTEFACTO)
+    joblib.dump({"random_forest": bosque, "gradient_boosting": boosting}, ruta)
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directorio")
+    parser.add_argument("--muestras", type=int, default=4000)
+    parser.add_argument("--arboles", type=int, default=100)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    ruta = crear_modelos_sinteticos(args.directorio, args.muestras, args.arboles, args.semilla)
+    print(f"✅ Modelo sintético en {ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Suite reproducible de rendimiento: microbenchmarks por etapa (bench_etapas.py)
+y carga concurrente en proceso (bench_carga.py) en una sola ejecución, con un
+único JSON de resultados (p50/p95/p99, media y rendimiento por segundo).
+
+Sin model/modelos_experimento_B.pkl (o con --sintetico) se entrena un modelo
+sintético con el mismo contrato (modelo_sintetico.py). Con --base se compara
+contra una ejecución guardada y se sale con código 1 si algún p50/p95 empeora,
+o el rendimiento cae, más que --tolerancia.
+
+Uso:
+    python benchmarks/suite.py --sintetico --salida benchmarks/base.json
+    python benchmarks/suite.py --sintetico --base benchmarks/base.json --tolerancia 0.2
+    python benchmarks/suite.py --solo etapas --repeticiones 500
+"""
+import argparse
+import warnings
+
+import bench_carga
+import bench_etapas
+import comun
+
+warnings.filterwarnings("ignore")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comun.agregar_argumentos_entorno(parser)
+    bench_etapas.agregar_argumentos(parser)
+    bench_carga.agregar_argumentos(parser)
+    parser.add_argument("--solo", choices=["etapas", "carga"], help="Ejecuta solo una parte de la suite")
+    args = parser.parse_args()
+
+    app, origen = comun.cargar_app(args)
+    resultados = {}
+    if args.solo != "carga":
+        resultados.update(bench_etapas.ejecutar(app, args))
+    if args.solo != "etapas":
+        resultados.update(bench_carga.ejecutar(app.app, args))
+    comun.finalizar({"metadatos": comun.metadatos(origen, args), "resultados": resultados}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Puntuación offline de archivos NDJSON o CSV, sin la capa HTTP.
+
+Usa el mismo mapeo de campos (CAMPO_MAPEO_COMPLETO), las mismas reglas de
+validación (CodificadorEntrada) y el mismo
+post-proceso (interpretar_etiqueta_duracion, generar_sugerencia_group_duration)
+que /predict, pero sin importar app.py: solo se cargan el registro de modelos,
+los codificadores y predict_proba (ni Flask, ni usuarios, ni pools de la API).
+Los mensajes del registro van a stderr, así "-" como salida queda limpio.
+
+La entrada se lee en bloques y se reparte entre un pool de procesos creado por
+fork después de cargar los modelos (páginas compartidas); los resultados se
+escriben en orden a medida que llegan, con un número acotado de bloques en vuelo.
+
+Uso:
+    python puntuar.py historico.csv resultados.ndjson --modelo random_forest
+    python puntuar.py entradas.ndjson.gz resultados.csv --procesos 8 --bloque 5000 --id-campo ID
+"""
+import argparse
+import csv
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+from collections import deque
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(RAIZ, "API")
+
+COLUMNAS_SALIDA = ["id", "prediccion", "probabilidad", "duracion_estimada", "sugerencia_meses", "confianza", "error"]
+
+servicio = None
+clave_modelo = None
+opciones_salida = {}
+
+
+class ServicioPuntuacion:
+    """Registro de versiones con los componentes que usa la puntuación (codificador y predict_proba)"""
+
+    def __init__(self, directorio):
+        import joblib
+        from Util.codificador import CAMPO_MAPEO_COMPLETO, CodificadorEntrada
+        from Util.duracion import generar_sugerencia_group_duration, interpretar_etiqueta_duracion
+        from Util.ensamble_plano import aplanar_modelo
+        from Util.prediccion_rapida import crear_predict_proba_rapido
+        from Util.registro_modelos import RegistroModelos
+        from Util.tabla_prediccion import cargar_tablas
+
+        self.generar_sugerencia_group_duration = generar_sugerencia_group_duration
+        self.interpretar_etiqueta_duracion = interpretar_etiqueta_duracion
+        self.modelos = {}
+        self.codificadores = {}
+        self.predictores_rapidos = {}
+        self.tablas_prediccion = {}
+        usar_plano = os.environ.get("ENSAMBLE_PLANO", "0") == "1"
+        usar_tablas = os.environ.get("USAR_TABLAS_PREDICCION", "0") == "1"
+        mmap = "r" if os.environ.get("MODELO_MMAP", "0") == "1" else None
+
+        def registrar(version):
+            # Mismos componentes que registrar_componentes de app.py, sin LIME ni micro-lotes
+            respaldo = getattr(version.modelos.get("random_forest"), "used_features", None)
+            tablas = cargar_tablas(version.modelos, version.ruta) if usar_tablas else {}
+            for nombre, modelo in version.modelos.items():
+                clave = version.clave(nombre)
+                codificador = CodificadorEntrada(getattr(modelo, "used_features", None) or respaldo,
+                                                 CAMPO_MAPEO_COMPLETO)
+                plano = aplanar_modelo(modelo) if usar_plano else None
+                self.codificadores[clave] = codificador
+                self.predictores_rapidos[clave] = (
+                    plano.predict_proba if plano is not None else crear_predict_proba_rapido(modelo)
+                )
+                tabla = tablas.get(nombre)
+                if tabla is not None and tabla.used_features == codificador.used_features:
+                    self.tablas_prediccion[clave] = tabla
+                self.modelos[clave] = modelo
+
+        def retirar(version):
+            for clave in version.claves():
+                for componentes in (self.modelos, self.codificadores, self.predictores_rapidos,
+                                    self.tablas_prediccion):
+                    componentes.pop(clave, None)
+
+        self.registro_modelos = RegistroModelos(
+            directorio,
+            cargar=lambda ruta: joblib.load(ruta, mmap_mode=mmap),
+            al_registrar=registrar,
+            al_retirar=retirar,
+            intervalo_segundos=0,
+            max_versiones=int(os.environ.get("MODELOS_MAX_VERSIONES", "2")),
+        )
+        self.registro_modelos.cargar_inicial()
+
+    def predecir_probabilidades(self, clave, X):
+        """Igual que en app.py: tabla precalculada si existe, el modelo para el resto"""
+        predict_proba = self.predictores_rapidos[clave]
+        tabla = self.tablas_prediccion.get(clave)
+        if tabla is None:
+            return predict_proba(X)
+        probas, validos = tabla.consultar(X)
+        if not validos.all():
+            probas[~validos] = predict_proba(X[~validos])
+        return probas
+
+
+def cargar_servicio():
+    """Carga los modelos de MODELOS_DIR (por defecto API/model) sin importar la app web"""
+    global servicio
+    # Los logs del registro ("api.modelos") van a stderr: stdout puede ser la salida de resultados
+    logging.basicConfig(stream=sys.stderr, level=os.environ.get("LOG_NIVEL", "WARNING").upper(),
+                        format="%(levelname)s %(name)s %(message)s")
+    warnings.filterwarnings("ignore", category=FutureWarning)
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    servicio = ServicioPuntuacion(os.environ.get("MODELOS_DIR", os.path.join(API_DIR, "model")))
+    return servicio
+
+
+def inicializar_worker(modelo, version, opciones):
+    """En fork el módulo ya está cargado; en spawn (Windows) cada proceso lo importa"""
+    global clave_modelo, opciones_salida
+    if servicio is None:
+        cargar_servicio()
+    clave_modelo = servicio.registro_modelos.reservar(modelo, version)
+    opciones_salida = opciones
+
+
+def abrir(ruta, modo):
+    if ruta == "-":
+        return sys.stdin if "r" in modo else sys.stdout
+    if ruta.endswith(".gz"):
+        return gzip.open(ruta, modo + "t", encoding="utf-8", newline="")
+    return open(ruta, modo, encoding="utf-8", newline="")
+
+
+def formato_de(ruta, forzado):
+    if forzado:
+        return forzado
+    base = ruta[:-3] if ruta.endswith(".gz") else ruta
+    return "csv" if base.lower().endswith(".csv") else "ndjson"
+
+
+def leer_filas(f, formato):
+    """Genera diccionarios de entrada; en CSV se omiten las celdas vacías"""
+    if formato == "csv":
+        for fila in csv.DictReader(f):
+            yield {k: v for k, v in fila.items() if k is not None and v not in (None, "")}
+    else:
+        for linea in f:
+            linea = linea.strip()
+            if linea:
+                yield json.loads(linea)
+
+
+def bloques(filas, tamano):
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) >= tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def resultado_fila(identificador, prediccion, probas, clases):
+    etiqueta = str(prediccion)
+    sugerencias = servicio.generar_sugerencia_group_duration(etiqueta, probas)
+    resultado = {
+        "id": identificador,
+        "prediccion": etiqueta,
+        "probabilidad": round(float(probas.max()), 4),
+        "duracion_estimada": servicio.interpretar_etiqueta_duracion(etiqueta),
+        "sugerencia_meses": sugerencias["opcion_recomendada"]["valor"],
+        "confianza": sugerencias.get("confianza", {}).get("nivel"),
+    }
+    if opciones_salida.get("probabilidades"):
+        resultado["probabilidades"] = {str(c): round(float(p), 4) for c, p in zip(clases, probas)}
+    if opciones_salida.get("completo"):
+        resultado["sugerencias_duracion"] = sugerencias
+    return resultado
+
+
+def puntuar_bloque(filas):
+    """Codifica y puntúa un bloque con una sola llamada al modelo; errores por fila si hace falta"""
+    id_campo = opciones_salida.get("id_campo")
+    identificadores = [fila.get(id_campo) if id_campo else None for fila in filas]
+    entradas = [fila.get("entrada", fila) if isinstance(fila, dict) else fila for fila in filas]
+    codificador = servicio.codificadores[clave_modelo]
+    clases = servicio.modelos[clave_modelo].classes_
+
+    try:
+        X = codificador.codificar_lote(entradas)
+        validas = list(range(len(entradas)))
+        errores = {}
+    except (TypeError, ValueError, AttributeError):
+        # Alguna fila no se puede codificar: se aíslan una por una
+        validas, errores, codificadas = [], {}, []
+        for i, entrada in enumerate(entradas):
+            try:
+                codificadas.append(codificador.codificar(entrada)[0])
+                validas.append(i)
+            except (TypeError, ValueError, AttributeError) as e:
+                errores[i] = str(e)
+        X = np.array(codificadas).reshape(len(codificadas), codificador.n_features)
+
+    matriz_probas = servicio.predecir_probabilidades(clave_modelo, X) if validas else []
+    resultados = [None] * len(entradas)
+    for j, i in enumerate(validas):
+        probas = matriz_probas[j]
+        resultados[i] = resultado_fila(identificadores[i], clases[probas.argmax()], probas, clases)
+    for i, mensaje in errores.items():
+        resultados[i] = {"id": identificadores[i], "error": mensaje}
+    return resultados
+
+
+class Escritor:
+    def __init__(self, f, formato):
+        self.f = f
+        self.formato = formato
+        if formato == "csv":
+            self.csv = csv.DictWriter(f, fieldnames=COLUMNAS_SALIDA, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def escribir(self, resultados):
+        if self.formato == "csv":
+            self.csv.writerows(resultados)
+        else:
+            self.f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in resultados))
+
+
+class Progreso:
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self.inicio = time.perf_counter()
+        self.ultimo = self.inicio
+        self.filas = 0
+        self.errores = 0
+
+    def sumar(self, resultados):
+        self.filas += len(resultados)
+        self.errores += sum(1 for r in resultados if "error" in r)
+        ahora = time.perf_counter()
+        if ahora - self.ultimo >= self.intervalo:
+            self.ultimo = ahora
+            self.reportar()
+
+    def reportar(self, final=False):
+        transcurrido = time.perf_counter() - self.inicio
+        ritmo = self.filas / transcurrido if transcurrido > 0 else 0.0
+        prefijo = "✅ Total" if final else "⏱️"
+        print(f"{prefijo} {self.filas} filas ({self.errores} con error) en {transcurrido:.1f} s "
+              f"-> {ritmo:,.0f} filas/s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entrada", help="Archivo .csv/.ndjson (opcionalmente .gz) o - para stdin")
+    parser.add_argument("salida", help="Archivo .csv/.ndjson (opcionalmente .gz) o - para stdout")
+    parser.add_argument("--modelo", default="random_forest")
+    parser.add_argument("--version", default=None, help="Versión del modelo (por defecto la activa)")
+    parser.add_argument("--formato-entrada", choices=["csv", "ndjson"])
+    parser.add_argument("--formato-salida", choices=["csv", "ndjson"])
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--bloque", type=int, default=2000, help="Filas por bloque enviado a cada proceso")
+    parser.add_argument("--id-campo", help="Campo de la entrada que se copia como 'id' en la salida")
+    parser.add_argument("--probabilidades", action="store_true", help="Incluye el vector de probabilidades (NDJSON)")
+    parser.add_argument("--completo", action="store_true", help="Incluye sugerencias_duracion completas (NDJSON)")
+    parser.add_argument("--intervalo-progreso", type=float, default=5.0)
+    args = parser.parse_args()
+
+    ruta_entrada = os.path.abspath(args.entrada) if args.entrada != "-" else "-"
+    ruta_salida = os.path.abspath(args.salida) if args.salida != "-" else "-"
+    opciones = {"id_campo": args.id_campo, "probabilidades": args.probabilidades, "completo": args.completo}
+
+    cargar_servicio()
+    inicializar_worker(args.modelo, args.version, opciones)
+    if clave_modelo is None:
+        raise SystemExit(f"Modelo '{args.modelo}' no disponible" + (f" en la versión '{args.version}'" if args.version else ""))
+    print(f"📦 Puntuando con {clave_modelo} en {args.procesos} proceso(s)", file=sys.stderr)
+
+    formato_entrada = formato_de(args.entrada, args.formato_entrada)
+    formato_salida = formato_de(args.salida, args.formato_salida)
+    progreso = Progreso(args.intervalo_progreso)
+
+    with abrir(ruta_entrada, "r") as f_entrada, abrir(ruta_salida, "w") as f_salida:
+        escritor = Escritor(f_salida, formato_salida)
+        pendientes_bloques = bloques(leer_filas(f_entrada, formato_entrada), args.bloque)
+
+        if args.procesos <= 1:
+            for bloque in pendientes_bloques:
+                resultados = puntuar_bloque(bloque)
+                escritor.escribir(resultados)
+                progreso.sumar(resultados)
+        else:
+            # fork: los hijos heredan los modelos ya cargados; en Windows se usa spawn
+            metodo = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+            contexto = multiprocessing.get_context(metodo)
+            with contexto.Pool(args.procesos, initializer=inicializar_worker,
+                               initargs=(args.modelo, args.version, opciones)) as pool:
+                # Memoria acotada: como mucho 2 bloques en vuelo por proceso, escritos en orden
+                en_vuelo = deque()
+                for bloque in pendientes_bloques:
+                    en_vuelo.append(pool.apply_async(puntuar_bloque, (bloque,)))
+                    while len(en_vuelo) >= 2 * args.procesos:
+                        resultados = en_vuelo.popleft().get()
+                        escritor.escribir(resultados)
+                        progreso.sumar(resultados)
+                while en_vuelo:
+                    resultados = en_vuelo.popleft().get()
+                    escritor.escribir(resultados)
+                    progreso.sumar(resultados)
+
+    progreso.reportar(final=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,30 @@
+import argparse
+import os
 import subprocess
+import sys
 import webbrowser
 import threading
 
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(RAIZ, "API")
+
+parser = argparse.ArgumentParser(description="Lanza el prototipo")
+parser.add_argument("--asgi", action="store_true", help="Servidor ASGI de producción (gunicorn + uvicorn)")
+parser.add_argument("--workers", type=int, default=int(os.environ.get("WORKERS", "4")))
+parser.add_argument("--sin-navegador", action="store_true")
+args = parser.parse_args()
+
 def abrir_navegador():
     webbrowser.open_new("http://localhost:5000")
 
-threading.Timer(1.5, abrir_navegador).start()
+if not args.sin_navegador:
+    threading.Timer(1.5, abrir_navegador).start()
 
-subprocess.call(["python", "API/app.py"])
+if not args.asgi:
+    subprocess.call(["python", "API/app.py"])
+elif os.name == "nt":
+    # gunicorn no existe en Windows: un solo proceso uvicorn
+    subprocess.call([sys.executable, "-m", "uvicorn", "asgi:app", "--port", "5000"], cwd=API_DIR)
+else:
+    entorno = dict(os.environ, WORKERS=str(args.workers))
+    subprocess.call([sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "asgi:app"], cwd=API_DIR, env=entorno)
@@ -0,0 +1,8 @@
+# Las pruebas importan los módulos como la API (desde API/) y el modelo sintético de benchmarks/
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for ruta in (os.path.join(RAIZ, "API"), os.path.join(RAIZ, "benchmarks")):
+    if ruta not in sys.path:
+        sys.path.insert(0, ruta)
@@ -0,0 +1,19 @@
+from comun import comparar
+
+
+def ejecucion(p50_ms, por_segundo):
+    return {"resultados": {"etapa": {"p50_ms": p50_ms, "p95_ms": p50_ms, "por_segundo": por_segundo}}}
+
+
+def test_etapa_de_microsegundos_no_es_regresion():
+    # 0.004 -> 0.005 ms es +25 %, pero por debajo de la tolerancia absoluta
+    assert comparar(ejecucion(0.005, 200000), ejecucion(0.004, 250000), tolerancia=0.15) == []
+
+
+def test_regresion_relativa_y_absoluta():
+    regresiones = comparar(ejecucion(2.0, 500), ejecucion(1.0, 1000), tolerancia=0.15)
+    assert {metrica for _, metrica, _, _ in regresiones} == {"p50_ms", "p95_ms", "por_segundo"}
+
+
+def test_dentro_de_la_tolerancia_relativa():
+    assert comparar(ejecucion(1.1, 910), ejecucion(1.0, 1000), tolerancia=0.15) == []
@@ -0,0 +1,46 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier
+
+from modelo_sintetico import crear_modelos_sinteticos, entradas_aleatorias, generar_datos, USED_FEATURES
+from Util.codificador import CodificadorEntrada
+from Util.ensamble_plano import aplanar_modelo, verificar_equivalencia
+
+TOLERANCIA = 1e-12
+
+
+@pytest.fixture(scope="module")
+def modelos(tmp_path_factory):
+    ruta = crear_modelos_sinteticos(str(tmp_path_factory.mktemp("modelos")), n_muestras=2000, arboles=40)
+    return joblib.load(ruta)
+
+
+@pytest.fixture(scope="module")
+def X():
+    # Entradas del formulario (validadas) más filas fuera de la distribución de entrenamiento
+    validadas = CodificadorEntrada(USED_FEATURES).codificar_lote(entradas_aleatorias(500, semilla=7))
+    rng = np.random.default_rng(7)
+    extremas = rng.integers(0, 2, (500, len(USED_FEATURES))).astype(np.float64)
+    extremas += rng.integers(0, 60, extremas.shape) * (rng.random(extremas.shape) < 0.3)
+    return np.vstack([validadas, extremas])
+
+
+@pytest.mark.parametrize("nombre", ["random_forest", "gradient_boosting"])
+def test_predict_proba_igual_que_sklearn(modelos, X, nombre):
+    modelo = modelos[nombre]
+    plano = aplanar_modelo(modelo)
+    assert plano is not None
+    error_max, coincidencia = verificar_equivalencia(modelo, plano, X)
+    assert error_max < TOLERANCIA
+    assert coincidencia == 1.0
+    assert list(plano.predict(X)) == list(modelo.predict(X))
+
+
+def test_gradient_boosting_binario(X):
+    # Una sola salida: la probabilidad sale de la sigmoide del logit (init + tasa * suma de hojas)
+    Xe, y = generar_datos(1500, semilla=3)
+    modelo = GradientBoostingClassifier(n_estimators=30, learning_rate=0.3, max_depth=3, random_state=0)
+    modelo.fit(Xe, y == y[0])
+    error_max, _ = verificar_equivalencia(modelo, aplanar_modelo(modelo), X)
+    assert error_max < TOLERANCIA
@@ -0,0 +1,38 @@
+from Util.respuestas import aplicar_seleccion, indice_clase
+
+CLASES = ["(0.0, 6.0]", "(6.0, 12.0]", "(12.0, 24.0]"]
+
+
+def respuesta(prediccion):
+    # reglas_por_clase va por índice de clase (str), como en resumir_explicacion de app.py
+    return {
+        "prediccion": prediccion,
+        "probabilidad": 0.7,
+        "reglas_por_clase": {"0": ["regla 0"], "1": ["regla 1"], "2": ["regla 2"]},
+        "mensaje_explicativo": "texto",
+        "grafico_probabilidades_base64": "png",
+    }
+
+
+def test_indice_clase():
+    assert indice_clase("(6.0, 12.0]", CLASES) == "1"
+    assert indice_clase("(48.0, 96.0]", CLASES) is None
+    assert indice_clase("(6.0, 12.0]", None) is None
+
+
+def test_estandar_deja_solo_las_reglas_de_la_clase_predicha():
+    recortado = aplicar_seleccion(respuesta("(6.0, 12.0]"), "estandar", None, CLASES)
+    assert recortado["reglas_por_clase"] == {"1": ["regla 1"]}
+    assert "mensaje_explicativo" not in recortado
+    assert "grafico_probabilidades_base64" not in recortado
+
+
+def test_estandar_sin_reglas_de_la_clase_predicha():
+    cuerpo = respuesta("(0.0, 6.0]")
+    del cuerpo["reglas_por_clase"]["0"]
+    assert aplicar_seleccion(cuerpo, "estandar", None, CLASES)["reglas_por_clase"] == {}
+
+
+def test_completo_no_recorta():
+    cuerpo = respuesta("(6.0, 12.0]")
+    assert aplicar_seleccion(cuerpo, "completo", None, CLASES) == cuerpo